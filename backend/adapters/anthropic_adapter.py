@@ -8,40 +8,68 @@ from utils.config import settings
 
 logger = logging.getLogger(__name__)
 
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
 
 class AnthropicAdapter(LLMInterface):
     def __init__(self):
+        super().__init__()
         self.client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.model = settings.ANTHROPIC_MODEL
         self.max_tokens = settings.ANTHROPIC_MAX_TOKENS
         self.temperature = settings.ANTHROPIC_TEMPERATURE
-    
-    async def generate(self, prompt: str, system_prompt: str = "", 
-                      json_mode: bool = False) -> str:
+        self.prompt_caching = settings.ANTHROPIC_PROMPT_CACHING
+
+    def _text_block(self, text: str, cacheable: bool = False) -> Dict[str, Any]:
+        block = {"type": "text", "text": text}
+        if cacheable and self.prompt_caching:
+            block["cache_control"] = {"type": "ephemeral"}
+        return block
+
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
         """Generate completion"""
         try:
+            # Stable prefix first (cache breakpoint), per-call suffix last
+            content = [self._text_block(prompt)]
+            if prefix:
+                content.insert(0, self._text_block(prefix, cacheable=True))
+
             kwargs = {
                 "model": self.model,
                 "max_tokens": self.max_tokens,
                 "temperature": self.temperature,
-                "messages": [{"role": "user", "content": prompt}]
+                "messages": [{"role": "user", "content": content}]
             }
-            
+
             if system_prompt:
-                kwargs["system"] = system_prompt
-            
+                kwargs["system"] = [self._text_block(system_prompt, cacheable=True)]
+
+            if self.prompt_caching:
+                kwargs["extra_headers"] = {"anthropic-beta": PROMPT_CACHING_BETA}
+
             response = await self.client.messages.create(**kwargs)
+
+            usage = response.usage
+            self.record_usage(
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+                cache_read_input_tokens=getattr(usage, "cache_read_input_tokens", 0),
+                cache_creation_input_tokens=getattr(usage, "cache_creation_input_tokens", 0),
+            )
+
             return response.content[0].text
-            
+
         except Exception as e:
             logger.error(f"Anthropic API error: {e}")
             raise
-    
-    async def generate_json(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
+
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
         """Generate JSON response"""
         json_instruction = "\n\nRespond ONLY with valid JSON. No other text."
-        response = await self.generate(prompt + json_instruction, system_prompt)
-        
+        response = await self.generate(prompt + json_instruction, system_prompt, prefix=prefix)
+
         # Extract JSON from response (Claude sometimes adds text)
         try:
             return json.loads(response)
@@ -0,0 +1,100 @@
+"""
+Single-flight LLM requests (LLM_COALESCING_ENABLED)
+Concurrent callers sending an identical prompt (same provider, system
+prompt, prefix and prompt hash) share one in-flight provider call instead
+of each paying for it, e.g. the same document uploaded twice at once or a
+double-submitted answer. The shared call runs as its own task: a caller
+that goes away stops waiting without cancelling it for the others, and the
+call is cancelled only once every caller has left. Nothing is cached after
+the call completes.
+
+The shared task runs in a fresh context carrying only the admission lane of
+the caller that started it: its LLM slot keeps that caller's priority, but
+it is not nested under that caller's trace span. Its token usage is captured separately and recorded by every caller
+that joined, so each run's usage counts the call it depended on.
+"""
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+from adapters.llm_interface import LLMInterface, capture_usage
+from adapters.replay_adapter import prompt_key
+from utils.admission import lane_context
+from utils.config import settings
+from utils.metrics import metrics
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "usage")
+
+    def __init__(self, call: Callable[[], Awaitable[Any]]):
+        self.waiters = 0
+        self.usage: Dict[str, int] = {}
+        self.task = asyncio.get_running_loop().create_task(
+            self._run(call), context=lane_context()
+        )
+
+    async def _run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        with capture_usage(self.usage):
+            return await call()
+
+
+# Process-wide: every adapter instance joins the same flights
+_in_flight: Dict[str, _Flight] = {}
+
+
+class CoalescingLLM(LLMInterface):
+    coalesced = metrics.counter("llm.coalesced")
+    abandoned = metrics.counter("llm.coalesce_abandoned")
+
+    def __init__(self, inner: LLMInterface):
+        super().__init__()
+        self.inner = inner
+        # Share the counters; usage of shared calls is added by each caller in _join
+        self.usage = inner.usage
+
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
+        """Generate completion"""
+        key = prompt_key(f"text:{json_mode}", prompt, system_prompt, prefix)
+        return await self._join(
+            key, lambda: self.inner.generate(prompt, system_prompt, json_mode, prefix)
+        )
+
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
+        """Generate JSON response"""
+        key = prompt_key("json", prompt, system_prompt, prefix)
+        return await self._join(
+            key, lambda: self.inner.generate_json(prompt, system_prompt, prefix)
+        )
+
+    async def _join(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        key = f"{settings.LLM_PROVIDER}:{key}"
+        flight = _in_flight.get(key)
+        if flight is None:
+            flight = _Flight(call)
+            _in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: _forget(key, flight))
+        else:
+            self.coalesced.inc()
+
+        flight.waiters += 1
+        try:
+            # Callers may mutate the parsed response; each gets its own copy
+            return copy.deepcopy(await asyncio.shield(flight.task))
+        finally:
+            flight.waiters -= 1
+            if flight.task.done():
+                if not flight.task.cancelled():
+                    self.record_usage(**flight.usage)
+            elif flight.waiters == 0:
+                # Every caller went away: stop paying for the call
+                _forget(key, flight)
+                flight.task.cancel()
+                self.abandoned.inc()
+
+
+def _forget(key: str, flight: _Flight) -> None:
+    if _in_flight.get(key) is flight:
+        del _in_flight[key]
@@ -0,0 +1,28 @@
+"""LLM adapter wrapper that bounds concurrent provider calls (ADMISSION_MAX_LLM_CALLS)"""
+from typing import Any, Dict
+
+from adapters.llm_interface import LLMInterface
+from utils.admission import PriorityLimiter, current_lane, llm_limiter
+
+
+class ConcurrencyLimitedLLM(LLMInterface):
+    """Each call waits for a process-wide LLM slot, in the lane of the run making it"""
+
+    def __init__(self, inner: LLMInterface, limiter: PriorityLimiter = llm_limiter):
+        super().__init__()
+        self.inner = inner
+        self.limiter = limiter
+        # Share the counters so callers keep reading usage from this object
+        self.usage = inner.usage
+
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
+        """Generate completion"""
+        async with self.limiter.acquire(current_lane()):
+            return await self.inner.generate(prompt, system_prompt, json_mode, prefix)
+
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
+        """Generate JSON response"""
+        async with self.limiter.acquire(current_lane()):
+            return await self.inner.generate_json(prompt, system_prompt, prefix)
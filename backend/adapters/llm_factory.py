@@ -1,17 +1,36 @@
 """LLM factory"""
+from adapters.coalescing_adapter import CoalescingLLM
+from adapters.limited_adapter import ConcurrencyLimitedLLM
 from adapters.llm_interface import LLMInterface
 from adapters.openai_adapter import OpenAIAdapter
 from adapters.anthropic_adapter import AnthropicAdapter
+from adapters.replay_adapter import ReplayAdapter
 from utils.config import settings
 
 
-def get_llm() -> LLMInterface:
-    """Get LLM adapter based on configuration"""
-    provider = settings.LLM_PROVIDER.lower()
+def _provider(name: str) -> LLMInterface:
+    provider = name.lower()
     
     if provider == "openai":
         return OpenAIAdapter()
     elif provider == "anthropic":
         return AnthropicAdapter()
+    elif provider == "replay":
+        # Record mode wraps a real provider; replay/synthetic need none
+        if settings.REPLAY_MODE.lower() == "record":
+            return ReplayAdapter(upstream=_provider(settings.REPLAY_UPSTREAM_PROVIDER))
+        return ReplayAdapter()
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def get_llm() -> LLMInterface:
+    """Get LLM adapter based on configuration"""
+    llm = _provider(settings.LLM_PROVIDER)
+    # Provider calls from all runs share ADMISSION_MAX_LLM_CALLS slots
+    if settings.ADMISSION_MAX_LLM_CALLS > 0:
+        llm = ConcurrencyLimitedLLM(llm)
+    # Outermost, so duplicate prompts wait on the shared call without taking a slot
+    if settings.LLM_COALESCING_ENABLED:
+        llm = CoalescingLLM(llm)
+    return llm
@@ -1,18 +1,58 @@
 """LLM adapter interface"""
+import contextvars
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+# Token counters accumulated per adapter instance
+USAGE_KEYS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+_usage_capture: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "llm_usage_capture", default=None
+)
+
+
+@contextmanager
+def capture_usage(into: Dict[str, int]) -> Iterator[Dict[str, int]]:
+    """Send usage recorded in this context to `into` instead of the adapters' own counters"""
+    token = _usage_capture.set(into)
+    try:
+        yield into
+    finally:
+        _usage_capture.reset(token)
 
 
 class LLMInterface(ABC):
     """Abstract interface for LLM providers"""
-    
+
+    def __init__(self):
+        self.usage: Dict[str, int] = {key: 0 for key in USAGE_KEYS}
+
     @abstractmethod
-    async def generate(self, prompt: str, system_prompt: str = "", 
-                      json_mode: bool = False) -> str:
-        """Generate completion from LLM"""
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
+        """Generate completion from LLM
+
+        `prefix` is a stable block (e.g. the document excerpt) sent before
+        `prompt` so providers can cache it across calls.
+        """
         pass
-    
+
     @abstractmethod
-    async def generate_json(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
         """Generate JSON response from LLM"""
         pass
+
+    def record_usage(self, **counts: int) -> None:
+        """Accumulate token usage reported by the provider"""
+        usage = _usage_capture.get()
+        if usage is None:
+            usage = self.usage
+        for key, value in counts.items():
+            usage[key] = usage.get(key, 0) + (value or 0)
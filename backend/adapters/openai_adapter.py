@@ -9,40 +9,64 @@ from utils.config import settings
 logger = logging.getLogger(__name__)
 
 
+def _cached_prompt_tokens(usage: Any) -> int:
+    """Read `prompt_tokens_details.cached_tokens` (may be absent or a dict)"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None:
+        return 0
+    if isinstance(details, dict):
+        return details.get("cached_tokens", 0) or 0
+    return getattr(details, "cached_tokens", 0) or 0
+
+
 class OpenAIAdapter(LLMInterface):
     def __init__(self):
+        super().__init__()
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
-    
-    async def generate(self, prompt: str, system_prompt: str = "", 
-                      json_mode: bool = False) -> str:
+
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
         """Generate completion"""
         try:
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
+            # OpenAI caches identical prompt prefixes automatically,
+            # so the stable block just has to come first
+            user_content = f"{prefix}\n\n{prompt}" if prefix else prompt
+            messages.append({"role": "user", "content": user_content})
+
             kwargs = {
                 "model": self.model,
                 "messages": messages,
                 "max_tokens": self.max_tokens,
                 "temperature": self.temperature,
             }
-            
+
             if json_mode:
                 kwargs["response_format"] = {"type": "json_object"}
-            
+
             response = await self.client.chat.completions.create(**kwargs)
+
+            if response.usage:
+                cached = _cached_prompt_tokens(response.usage)
+                self.record_usage(
+                    input_tokens=response.usage.prompt_tokens - cached,
+                    output_tokens=response.usage.completion_tokens,
+                    cache_read_input_tokens=cached,
+                )
+
             return response.choices[0].message.content
-            
+
         except Exception as e:
             logger.error(f"OpenAI API error: {e}")
             raise
-    
-    async def generate_json(self, prompt: str, system_prompt: str = "") -> Dict[str, Any]:
+
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
         """Generate JSON response"""
-        response = await self.generate(prompt, system_prompt, json_mode=True)
+        response = await self.generate(prompt, system_prompt, json_mode=True, prefix=prefix)
         return json.loads(response)
@@ -0,0 +1,187 @@
+"""
+Record-and-replay LLM adapter (LLM_PROVIDER=replay)
+Three modes (REPLAY_MODE), for load and regression testing without a live
+provider:
+- record: forwards to REPLAY_UPSTREAM_PROVIDER and appends every prompt
+  hash, response, latency and token usage to REPLAY_FILE (JSON Lines)
+- replay: serves recorded responses by prompt hash, sleeping for the
+  recorded latency (or one sampled from all recordings) times
+  REPLAY_LATENCY_SCALE; recorded errors are raised again
+- synthetic: deterministic verdicts per prompt with configurable latency
+  and error rate
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from adapters.llm_interface import LLMInterface, capture_usage
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay", "synthetic")
+SYNTHETIC_ESTADOS = ("CUMPLE", "CUMPLE", "PARCIAL", "NO")
+
+_write_lock = threading.Lock()
+_recordings_lock = threading.Lock()
+# path -> ((mtime_ns, size), Recordings)
+_recordings_cache: Dict[str, Tuple[Tuple[int, int], "Recordings"]] = {}
+
+
+class ReplayMissError(KeyError):
+    """Raised in replay mode when a prompt was never recorded"""
+
+
+class SyntheticLLMError(RuntimeError):
+    """Injected failure in synthetic mode"""
+
+
+class RecordedLLMError(RuntimeError):
+    """A provider error captured in record mode, raised again on replay"""
+
+
+def prompt_key(kind: str, prompt: str, system_prompt: str = "", prefix: str = "") -> str:
+    """Stable hash of everything that determines a response"""
+    payload = json.dumps([kind, system_prompt, prefix, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Recordings:
+    """Recorded entries indexed by prompt hash, plus every recorded latency"""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        # Entries with neither response nor error (cancelled calls) cannot be replayed
+        entries = [e for e in entries if "response" in e or "error" in e]
+        self.by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for entry in entries:
+            self.by_key[entry["key"]].append(entry)
+        self.latencies_ms = [entry["latency_ms"] for entry in entries]
+
+    @classmethod
+    def load(cls, path: str) -> "Recordings":
+        """Parse a recording file once; reloaded only when it changes"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with _recordings_lock:
+            cached = _recordings_cache.get(path)
+            if cached and cached[0] == signature:
+                return cached[1]
+            with open(path, "r", encoding="utf-8") as f:
+                recordings = cls([json.loads(line) for line in f if line.strip()])
+            _recordings_cache[path] = (signature, recordings)
+            return recordings
+
+
+def _append_entry(path: str, entry: Dict[str, Any]) -> None:
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class ReplayAdapter(LLMInterface):
+    def __init__(self, mode: Optional[str] = None, path: Optional[str] = None,
+                 upstream: Optional[LLMInterface] = None):
+        super().__init__()
+        self.mode = (mode or settings.REPLAY_MODE).lower()
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {self.mode}")
+        if self.mode == "record" and upstream is None:
+            raise ValueError("Record mode needs an upstream adapter")
+        self.path = path or settings.REPLAY_FILE
+        self.upstream = upstream
+        self.latency_scale = settings.REPLAY_LATENCY_SCALE
+        # Occurrences per key: repeated prompts cycle through their recordings
+        # (replay) or draw fresh deterministic outcomes (synthetic)
+        self._seen: Dict[str, int] = defaultdict(int)
+        self._recordings = Recordings.load(self.path) if self.mode == "replay" else None
+
+    async def generate(self, prompt: str, system_prompt: str = "",
+                      json_mode: bool = False, prefix: str = "") -> str:
+        """Generate completion"""
+        if self.mode == "record":
+            return await self._record(
+                "text", prompt, system_prompt, prefix,
+                lambda: self.upstream.generate(prompt, system_prompt, json_mode, prefix)
+            )
+        if self.mode == "replay":
+            return await self._replay("text", prompt, system_prompt, prefix)
+        return json.dumps(await self._synthetic(prompt, system_prompt, prefix), ensure_ascii=False)
+
+    async def generate_json(self, prompt: str, system_prompt: str = "",
+                            prefix: str = "") -> Dict[str, Any]:
+        """Generate JSON response"""
+        if self.mode == "record":
+            return await self._record(
+                "json", prompt, system_prompt, prefix,
+                lambda: self.upstream.generate_json(prompt, system_prompt, prefix)
+            )
+        if self.mode == "replay":
+            return await self._replay("json", prompt, system_prompt, prefix)
+        return await self._synthetic(prompt, system_prompt, prefix)
+
+    async def _record(self, kind: str, prompt: str, system_prompt: str, prefix: str, call) -> Any:
+        key = prompt_key(kind, prompt, system_prompt, prefix)
+        usage: Dict[str, int] = {}
+        entry = {"key": key, "kind": kind, "recorded_at": time.time()}
+        start = time.perf_counter()
+        try:
+            with capture_usage(usage):
+                response = await call()
+            entry["response"] = response
+            return response
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            entry["usage"] = {k: v for k, v in usage.items() if v}
+            self.record_usage(**entry["usage"])
+            # A cancelled call has no outcome to replay and a truncated latency
+            if "response" in entry or "error" in entry:
+                entry["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                await asyncio.to_thread(_append_entry, self.path, entry)
+
+    async def _replay(self, kind: str, prompt: str, system_prompt: str, prefix: str) -> Any:
+        key = prompt_key(kind, prompt, system_prompt, prefix)
+        entries = self._recordings.by_key.get(key)
+        if not entries:
+            raise ReplayMissError(f"No recording for {kind} prompt {key[:12]}")
+        entry = entries[self._seen[key] % len(entries)]
+        self._seen[key] += 1
+
+        latency_ms = entry["latency_ms"]
+        if settings.REPLAY_LATENCY_MODE == "distribution":
+            rng = random.Random(f"{key}:{self._seen[key]}")
+            latency_ms = rng.choice(self._recordings.latencies_ms)
+        await asyncio.sleep(latency_ms * self.latency_scale / 1000)
+
+        self.record_usage(**entry.get("usage", {}))
+        if "error" in entry:
+            raise RecordedLLMError(entry["error"])
+        return entry["response"]
+
+    async def _synthetic(self, prompt: str, system_prompt: str, prefix: str) -> Dict[str, Any]:
+        key = prompt_key("json", prompt, system_prompt, prefix)
+        rng = random.Random(f"{settings.SYNTHETIC_SEED}:{key}:{self._seen[key]}")
+        self._seen[key] += 1
+
+        latency_ms = max(0.0, rng.gauss(settings.SYNTHETIC_LATENCY_MEAN_MS,
+                                        settings.SYNTHETIC_LATENCY_STDDEV_MS))
+        await asyncio.sleep(latency_ms * self.latency_scale / 1000)
+        if rng.random() < settings.SYNTHETIC_ERROR_RATE:
+            raise SyntheticLLMError(f"Synthetic failure for prompt {key[:12]}")
+
+        self.record_usage(input_tokens=(len(system_prompt) + len(prefix) + len(prompt)) // 4,
+                          output_tokens=40)
+        return {
+            "estado": rng.choice(SYNTHETIC_ESTADOS),
+            "justificacion": f"Veredicto sintético ({key[:8]})",
+            "evidencia": [],
+        }
@@ -0,0 +1,56 @@
+"""
+Admission before the request body is read
+FastAPI parses multipart/JSON bodies before it resolves route dependencies,
+so admission runs as ASGI middleware instead: the route a request matches
+declares its lane with @admission_lane, and the middleware holds a
+run_admission slot around the whole request. A rejected upload gets its
+429 without the server receiving the file.
+"""
+from typing import Callable, Optional, TypeVar
+
+from fastapi.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from utils import admission
+
+F = TypeVar("F", bound=Callable)
+
+
+def admission_lane(lane: str) -> Callable[[F], F]:
+    """Mark an endpoint as admitted through `lane`"""
+    def mark(endpoint: F) -> F:
+        endpoint.admission_lane = lane
+        return endpoint
+    return mark
+
+
+def route_lane(scope: Scope) -> Optional[str]:
+    """Lane of the route `scope` matches, if that route is admission-controlled"""
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(getattr(route, "endpoint", None), "admission_lane", None)
+    return None
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        lane = route_lane(scope) if scope["type"] == "http" else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            async with admission.run_admission.acquire(lane):
+                await self.app(scope, receive, send)
+        except admission.AdmissionRejected as exc:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": str(exc)},
+                headers={"Retry-After": str(exc.retry_after)}
+            )
+            await response(scope, receive, send)
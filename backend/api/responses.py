@@ -0,0 +1,25 @@
+"""Fast JSON responses"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from utils.json_codec import dumps
+
+
+def model_json(model: BaseModel, **kwargs: Any) -> bytes:
+    """Serialize a model straight to JSON bytes (no intermediate dict)"""
+    return model.__pydantic_serializer__.to_json(model, **kwargs)
+
+
+def fragment(encoded: bytes) -> orjson.Fragment:
+    """Embed already-encoded JSON in a response without re-encoding it"""
+    return orjson.Fragment(encoded)
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-rendered JSONResponse; understands orjson.Fragment values"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,27 +1,72 @@
 """API routes"""
-import os
+import asyncio
 import uuid
+import base64
+import json
 import logging
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse, PlainTextResponse
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-
-from domain.models import AnswersSubmission, EvaluationResult
-from storage.database import get_session, Run, Question
+from typing import List, Literal, Optional
+import orjson
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.orm import undefer
+
+from api.admission import admission_lane
+from api.responses import FastJSONResponse, fragment, model_json
+from domain.models import (
+    AnswersSubmission, EvaluationResult, RescoreRequest, RubricSimulationRequest,
+    Decision, DocumentType, Pregunta
+)
+from storage.database import get_session, get_session_maker, Run, Question, RunArtifact
+from storage.blob_store import blob_store
+from storage.artifacts import (
+    CODEC_REF_EVALUATION, save_outline, load_outline, load_report, get_report_artifact,
+    mark_report, decode_artifact, append_trace, load_traces, save_profile, load_artifact
+)
 from utils.docx_parser import extract_document_structure
 from services.doc_type_detector import detect_document_type
+from services.classifier import evaluate_with_speculative_tiebreak, tie_candidates
 from services.evaluator import DocumentEvaluator
+from services.batch_scoring import BatchScorer, RunScoringInput
+from services.rubric_registry import (
+    RubricValidationError, apply_overrides, get_rubrica, get_rubrica_version
+)
+from services.rubric_simulator import RubricSimulation
+from services.revision_reuse import DocumentFingerprint, find_prior_revision, save_fingerprint
+from services.report_renderer import (
+    MEDIA_TYPES, ReportContext, etag_matches, render, report_cache, report_etag
+)
 from utils.config import settings
+from utils.json_codec import PreEncodedJSON
+from utils.metrics import metrics
+from utils.profiling import ADMIN_TOKEN_HEADER, RunProfile, is_admin, profile_run, profiling_reason
+from utils.tracing import Trace, set_attribute, span, start_trace
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
+
+RESCORE_CHUNK_SIZE = 1000
+RUNS_PAGE_MAX = 500
+EXPORT_YIELD_PER = 200
+EXPORT_FLUSH_BYTES = 256 * 1024
+
+PRELIMINARY_FIELDS = {"score", "decision", "fail_fast", "score_potencial"}
+preguntas_adapter = TypeAdapter(List[Pregunta])
+
+# Scalar columns only: listing never touches the JSON blobs
+RUN_SUMMARY_COLUMNS = (
+    Run.id, Run.filename, Run.doc_type, Run.doc_type_confidence,
+    Run.decision, Run.score, Run.created_at
+)
 
 
 @router.post("/runs")
+@admission_lane("upload")
 async def create_run(
+    request: Request,
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_session)
 ):
@@ -30,55 +75,126 @@ async def create_run(
     Returns: run_id, outline, preliminary score, questions
     """
     run_id = str(uuid.uuid4())
-    logger.info(f"Creating run", extra={"run_id": run_id, "filename": file.filename})
+    with start_trace("create", run_id) as trace, \
+            profile_run(run_id, profiling_reason(request.headers)) as profile:
+        response = await _create_run(run_id, file, session)
+    await _save_diagnostics(session, run_id, trace, profile)
+    return response
+
+
+async def _save_diagnostics(session: AsyncSession, run_id: str, trace: Trace,
+                            profile: Optional[RunProfile] = None) -> None:
+    """Store the finished trace/profile after the run's own commit; never fails the request"""
+    if not settings.TRACING_ENABLED and profile is None:
+        return
+    try:
+        if settings.TRACING_ENABLED:
+            await append_trace(session, run_id, trace.to_dict())
+        if profile is not None:
+            save_profile(session, run_id, profile.stats, profile.summary)
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.warning(f"Could not store diagnostics: {e}", extra={"run_id": run_id})
+
+
+async def _create_run(run_id: str, file: UploadFile, session: AsyncSession):
+    logger.info(f"Creating run", extra={"run_id": run_id, "upload_filename": file.filename})
     
     # Validate file type
     if not file.filename.endswith('.docx'):
         raise HTTPException(400, "Only DOCX files are supported")
     
-    # Save file
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{run_id}_{file.filename}")
-    with open(file_path, "wb") as f:
+    # Save file (content-addressed: identical uploads share one blob)
+    with span("upload.write"):
         content = await file.read()
-        f.write(content)
+        # write + fsync off the event loop
+        upload_sha256, written = await asyncio.to_thread(blob_store.put, content)
+        set_attribute("bytes", len(content))
+        set_attribute("deduplicated", not written)
+    file_path = blob_store.path_for(upload_sha256)
+    metrics.counter("uploads.blob_written" if written else "uploads.blob_deduplicated").inc()
     
     try:
         # Extract structure
-        outline = extract_document_structure(file_path)
+        with span("parse"):
+            outline = extract_document_structure(file_path, filename=file.filename)
+            set_attribute("sections", len(outline.sections))
+            set_attribute("word_count", outline.word_count)
         
         # Detect document type with new deterministic detector
-        headings = [s.title for s in outline.sections]
-        tables = [{"context": "table"} for _ in range(outline.tables_count)]
-        full_text = "\n".join([s.content for s in outline.sections])
+        with span("detection"):
+            tables = [{"context": "table"} for _ in range(outline.tables_count)]
+            
+            detection_result = detect_document_type(
+                filename=file.filename,
+                headings=outline.headings,
+                tables=tables,
+                full_text=outline.full_text,
+                context=outline.analysis
+            )
+            
+            doc_type = detection_result["tipo_detectado"]
+            confidence = detection_result["confianza"]
+            set_attribute("doc_type", doc_type)
+            set_attribute("confidence", confidence)
         
-        detection_result = detect_document_type(
-            filename=file.filename,
-            headings=headings,
-            tables=tables,
-            full_text=full_text
-        )
+        fingerprint = DocumentFingerprint.from_outline(outline, file.filename)
+        
+        async def prepare_evaluator(candidate_type: str) -> DocumentEvaluator:
+            evaluator = DocumentEvaluator(outline, candidate_type, run_id, detection_result)
+            # Earlier revision of the same document: unchanged criterios keep their verdicts
+            if settings.REVISION_REUSE_ENABLED:
+                with span("revision.lookup", doc_type=candidate_type):
+                    evaluator.prior_revision = await find_prior_revision(
+                        session, fingerprint, candidate_type, evaluator.rubrica.version
+                    )
+            return evaluator
         
-        doc_type = detection_result["tipo_detectado"]
-        confidence = detection_result["confianza"]
+        # Close tie: tiebreaker and candidate evaluations run concurrently
+        tie = tie_candidates(detection_result) if settings.SPECULATIVE_TIE_EVALUATION else None
+        if tie:
+            evaluators = {t: await prepare_evaluator(t) for t in dict.fromkeys((doc_type, *tie))}
+        else:
+            evaluator = await prepare_evaluator(doc_type)
+        # End the read transaction so no connection is held during LLM calls
+        await session.commit()
         
         # Initial evaluation
-        evaluator = DocumentEvaluator(outline, doc_type, run_id, detection_result)
-        evaluation = await evaluator.evaluate()
+        if tie:
+            doc_type, evaluation = await evaluate_with_speculative_tiebreak(
+                outline, run_id, detection_result, evaluators
+            )
+            evaluator = evaluators[doc_type]
+        else:
+            evaluation = await evaluator.evaluate()
         evaluation.doc_type_confidence = confidence
+        prior_run_id = evaluator.prior_revision.run_id if evaluator.prior_revision else None
         
-        # Save to database
+        # Encode each model once; the bytes feed both storage and the response
+        outline_bytes = model_json(outline)
+        evaluation_bytes = model_json(evaluation)
+        
+        # Save to database (outline goes compressed to run_artifacts)
         db_run = Run(
             id=run_id,
             filename=file.filename,
+            upload_sha256=upload_sha256,
             doc_type=doc_type,
             doc_type_confidence=confidence,
             decision=evaluation.decision,
             score=evaluation.score,
-            outline_json=outline.model_dump(),
-            evaluation_json=evaluation.model_dump(),
+            evaluation_json=PreEncodedJSON(evaluation_bytes.decode("utf-8")),
             detection_result_json=detection_result  # MVP1.1
         )
         session.add(db_run)
+        save_outline(session, run_id, outline_bytes)
+        save_fingerprint(
+            session, run_id, fingerprint, doc_type, evaluator.rubrica.version,
+            [c for c in evaluation.criterios if c.criterio_id not in evaluator.failed_criterios],
+            evaluator.prompt_locations,
+            parent_run_id=prior_run_id
+        )
         
         # Save questions
         for q in evaluation.preguntas:
@@ -90,37 +206,114 @@ async def create_run(
             )
             session.add(db_question)
         
-        await session.commit()
+        with span("db.commit"):
+            await session.commit()
         
         logger.info(f"Run created successfully", extra={
             "run_id": run_id,
             "doc_type": doc_type,
             "score": evaluation.score,
-            "decision": evaluation.decision
+            "decision": evaluation.decision,
+            "revision_of": prior_run_id
         })
         
-        return {
+        return FastJSONResponse({
             "run_id": run_id,
             "filename": file.filename,
             "doc_type": doc_type,
             "doc_type_confidence": confidence,
             "detection_result": detection_result,  # MVP1.1: Include full detection result
-            "outline": outline.model_dump(),
-            "preliminary_evaluation": {
-                "score": evaluation.score,
-                "decision": evaluation.decision,
-                "fail_fast": [ff.model_dump() for ff in evaluation.fail_fast],
-                "score_potencial": evaluation.score_potencial.model_dump()
-            },
-            "preguntas": [q.model_dump() for q in evaluation.preguntas]
-        }
+            "revision_of": prior_run_id,
+            "outline": fragment(outline_bytes),
+            "preliminary_evaluation": fragment(model_json(evaluation, include=PRELIMINARY_FIELDS)),
+            "preguntas": fragment(preguntas_adapter.dump_json(evaluation.preguntas))
+        })
         
     except Exception as e:
         logger.error(f"Error processing document: {e}", extra={"run_id": run_id})
         raise HTTPException(500, f"Error processing document: {str(e)}")
 
 
+@router.post("/runs/rescore")
+@admission_lane("batch")
+async def rescore_runs(
+    request: RescoreRequest,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Re-score all stored runs under a rubric version (no LLM calls)
+    Returns: per-run score, decision and score_potencial under that version
+    """
+    try:
+        rubrica = get_rubrica_version(request.rubric_version)
+    except KeyError:
+        raise HTTPException(404, f"Rubric version not found: {request.rubric_version}")
+    
+    logger.info(f"Re-scoring runs", extra={"rubric_version": rubrica.version, "doc_type": request.doc_type})
+    
+    scorer = BatchScorer(rubrica)
+    results = []
+    async for chunk in _stream_scoring_inputs(session, request.doc_type):
+        results.extend(scorer.score(chunk).to_records())
+    
+    return {
+        "rubric_version": rubrica.version,
+        "runs": len(results),
+        "results": results
+    }
+
+
+@router.post("/rubric/simulate")
+@admission_lane("batch")
+async def simulate_rubric(
+    request: RubricSimulationRequest,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    What-if: replay stored verdicts under proposed weights/thresholds/penalties
+    Returns: decision flips and score deltas per doc_type (no LLM calls)
+    """
+    baseline = get_rubrica()
+    try:
+        proposed = apply_overrides(
+            baseline,
+            pesos=request.pesos,
+            umbrales_decision=request.umbrales_decision,
+            penalizaciones=request.penalizaciones_tipicas
+        )
+    except RubricValidationError as e:
+        raise HTTPException(422, f"Invalid rubric overrides: {e}")
+    
+    simulation = RubricSimulation(baseline, proposed)
+    async for chunk in _stream_scoring_inputs(session, request.doc_type):
+        simulation.add_chunk(chunk)
+    
+    summary = simulation.summary()
+    logger.info(f"Rubric simulation complete", extra={
+        "runs": summary["total"]["runs"],
+        "decision_flips": summary["total"]["decision_flips"]
+    })
+    return summary
+
+
+async def _stream_scoring_inputs(session: AsyncSession, doc_type: Optional[str] = None):
+    """Yield stored evaluations as RunScoringInput lists, RESCORE_CHUNK_SIZE rows at a time"""
+    query = select(Run.id, Run.doc_type, Run.evaluation_json, Run.detection_result_json).where(
+        Run.evaluation_json.is_not(None)
+    )
+    if doc_type:
+        query = query.where(Run.doc_type == doc_type)
+    
+    stream = await session.stream(query.execution_options(yield_per=RESCORE_CHUNK_SIZE))
+    async for rows in stream.partitions():
+        yield [
+            RunScoringInput.from_evaluation(row.id, row.doc_type, row.evaluation_json, row.detection_result_json)
+            for row in rows
+        ]
+
+
 @router.post("/runs/{run_id}/answers")
+@admission_lane("interactive")
 async def submit_answers(
     run_id: str,
     submission: AnswersSubmission,
@@ -130,32 +323,48 @@ async def submit_answers(
     Submit answers and re-evaluate
     Returns: complete evaluation report
     """
+    with start_trace("answers", run_id) as trace:
+        response = await _submit_answers(run_id, submission, session)
+    await _save_diagnostics(session, run_id, trace)
+    return response
+
+
+async def _submit_answers(run_id: str, submission: AnswersSubmission, session: AsyncSession):
     logger.info(f"Submitting answers", extra={"run_id": run_id})
     
     # Get run
-    result = await session.execute(select(Run).where(Run.id == run_id))
+    result = await session.execute(
+        select(Run).options(undefer(Run.detection_result_json)).where(Run.id == run_id)
+    )
     run = result.scalar_one_or_none()
     
     if not run:
         raise HTTPException(404, "Run not found")
     
-    # Update answers in database
-    for answer in submission.answers:
+    outline_json = await load_outline(session, run_id)
+    report_artifact = await get_report_artifact(session, run_id)
+    
+    # Resolve all answered questions in one query
+    answers = {a.question_id: a.answer for a in submission.answers}
+    question_updates = []
+    if answers:
         result = await session.execute(
-            select(Question).where(
+            select(Question.id, Question.question_id).where(
                 Question.run_id == run_id,
-                Question.question_id == answer.question_id
+                Question.question_id.in_(answers)
             )
         )
-        question = result.scalar_one_or_none()
-        if question:
-            question.answer = answer.answer
+        question_updates = [
+            {"id": row.id, "answer": answers[row.question_id]}
+            for row in result
+        ]
     
+    # End the read transaction so no connection is held during LLM calls
     await session.commit()
     
     # Re-evaluate with answers
     from domain.models import DocumentOutline
-    outline = DocumentOutline(**run.outline_json)
+    outline = DocumentOutline(**outline_json)
     detection_result = run.detection_result_json  # MVP1.1
     
     user_answers = {
@@ -166,12 +375,20 @@ async def submit_answers(
     evaluator = DocumentEvaluator(outline, run.doc_type, run_id, detection_result)  # MVP1.1: Pass detection_result
     evaluation = await evaluator.evaluate(user_answers)
     
-    # Update run
+    # Answers and run update in a single transaction
+    if question_updates:
+        await session.execute(update(Question), question_updates)
+    
+    evaluation_bytes = model_json(evaluation)
     run.decision = evaluation.decision
     run.score = evaluation.score
-    run.evaluation_json = evaluation.model_dump()
-    run.report_json = evaluation.model_dump()
-    await session.commit()
+    run.evaluation_json = PreEncodedJSON(evaluation_bytes.decode("utf-8"))
+    run.report_json = None  # report now references evaluation_json
+    mark_report(session, run_id, report_artifact)
+    with span("db.commit"):
+        await session.commit()
+    # New version; drop renders of the previous one
+    report_cache.invalidate(run_id)
     
     logger.info(f"Re-evaluation complete", extra={
         "run_id": run_id,
@@ -179,18 +396,99 @@ async def submit_answers(
         "decision": evaluation.decision
     })
     
-    return evaluation.model_dump()
+    return FastJSONResponse(fragment(evaluation_bytes))
+
+
+def _encode_cursor(created_at: datetime, run_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), run_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, run_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(run_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+@router.get("/runs")
+async def list_runs(
+    doc_type: Optional[DocumentType] = None,
+    decision: Optional[Decision] = None,
+    score_min: Optional[float] = None,
+    score_max: Optional[float] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=RUNS_PAGE_MAX),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    List runs, newest first, with keyset pagination
+    Returns: scalar run summaries + next_cursor (null on last page)
+    """
+    query = select(*RUN_SUMMARY_COLUMNS)
+    
+    if doc_type:
+        query = query.where(Run.doc_type == doc_type)
+    if decision:
+        query = query.where(Run.decision == decision)
+    if score_min is not None:
+        query = query.where(Run.score >= score_min)
+    if score_max is not None:
+        query = query.where(Run.score <= score_max)
+    if created_from:
+        query = query.where(Run.created_at >= created_from)
+    if created_to:
+        query = query.where(Run.created_at < created_to)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            Run.created_at < cursor_created_at,
+            and_(Run.created_at == cursor_created_at, Run.id < cursor_id)
+        ))
+    
+    query = query.order_by(Run.created_at.desc(), Run.id.desc()).limit(limit + 1)
+    rows = (await session.execute(query)).all()
+    
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = _encode_cursor(last.created_at, last.id)
+    
+    return {
+        "items": [
+            {
+                "run_id": row.id,
+                "filename": row.filename,
+                "doc_type": row.doc_type,
+                "doc_type_confidence": row.doc_type_confidence,
+                "decision": row.decision,
+                "score": row.score,
+                "created_at": row.created_at.isoformat()
+            }
+            for row in page
+        ],
+        "next_cursor": next_cursor
+    }
 
 
 @router.get("/runs/{run_id}")
 async def get_run(run_id: str, session: AsyncSession = Depends(get_session)):
     """Get run status and report"""
-    result = await session.execute(select(Run).where(Run.id == run_id))
+    result = await session.execute(
+        select(Run).options(undefer(Run.evaluation_json)).where(Run.id == run_id)
+    )
     run = result.scalar_one_or_none()
     
     if not run:
         raise HTTPException(404, "Run not found")
     
+    report = await load_report(session, run_id, run.evaluation_json)
+    
     return {
         "run_id": run.id,
         "filename": run.filename,
@@ -199,76 +497,200 @@ async def get_run(run_id: str, session: AsyncSession = Depends(get_session)):
         "score": run.score,
         "created_at": run.created_at.isoformat(),
         "evaluation": run.evaluation_json,
-        "report": run.report_json
+        "report": report
     }
 
 
+@router.get("/runs/{run_id}/trace")
+async def get_run_trace(run_id: str, session: AsyncSession = Depends(get_session)):
+    """Span timelines of the run's evaluations (creation, then each re-evaluation)"""
+    traces = await load_traces(session, run_id)
+    if not traces:
+        raise HTTPException(404, "Trace not found")
+    
+    return {"run_id": run_id, "traces": traces}
+
+
+def _require_admin(request: Request) -> None:
+    if not is_admin(request.headers.get(ADMIN_TOKEN_HEADER)):
+        raise HTTPException(403, "Admin token required")
+
+
+@router.get("/runs/{run_id}/profile")
+async def get_run_profile(run_id: str, request: Request,
+                          session: AsyncSession = Depends(get_session)):
+    """Profile digest: hottest functions, allocations and peak memory (admin only)"""
+    _require_admin(request)
+    summary = await load_artifact(session, run_id, "profile_summary")
+    if summary is None:
+        raise HTTPException(404, "Profile not found")
+    
+    return summary
+
+
+@router.get("/runs/{run_id}/profile.prof")
+async def download_run_profile(run_id: str, request: Request,
+                               session: AsyncSession = Depends(get_session)):
+    """Raw pstats dump for snakeviz / pstats.Stats (admin only)"""
+    _require_admin(request)
+    stats = await load_artifact(session, run_id, "profile")
+    if stats is None:
+        raise HTTPException(404, "Profile not found")
+    
+    return Response(
+        content=stats,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{run_id}.prof"'}
+    )
+
+
 @router.get("/runs/{run_id}/export.json")
 async def export_json(run_id: str, session: AsyncSession = Depends(get_session)):
     """Export report as JSON"""
-    result = await session.execute(select(Run).where(Run.id == run_id))
-    run = result.scalar_one_or_none()
+    report = await load_report(session, run_id)
     
-    if not run or not run.report_json:
+    if not report:
         raise HTTPException(404, "Report not found")
     
-    return JSONResponse(content=run.report_json)
+    return FastJSONResponse(content=report)
 
 
-@router.get("/runs/{run_id}/export.md")
-async def export_markdown(run_id: str, session: AsyncSession = Depends(get_session)):
-    """Export report as Markdown"""
-    result = await session.execute(select(Run).where(Run.id == run_id))
-    run = result.scalar_one_or_none()
+async def _export_rendered(run_id: str, fmt: str, request: Request,
+                           session: AsyncSession) -> Response:
+    """Rendered report with ETag; 304 if the client already has this version"""
+    artifact = await get_report_artifact(session, run_id)
+    # Legacy reports (report_json column) have no artifact and never change
+    version = artifact.version if artifact else 0
+    etag = report_etag(run_id, version, fmt)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    not_modified = etag_matches(request.headers.get("if-none-match"), etag)
     
-    if not run or not run.report_json:
-        raise HTTPException(404, "Report not found")
+    # Revalidation costs one primary-key lookup; the report is not loaded
+    if artifact and not_modified:
+        return Response(status_code=304, headers=headers)
+    
+    body = report_cache.get(run_id, version, fmt)
+    if body is None:
+        result = await session.execute(
+            select(Run).options(undefer(Run.evaluation_json)).where(Run.id == run_id)
+        )
+        run = result.scalar_one_or_none()
+        report = await load_report(session, run_id, run.evaluation_json) if run else None
+        
+        if not report:
+            raise HTTPException(404, "Report not found")
+        
+        ctx = ReportContext(run.filename, run.doc_type, run.created_at, report)
+        body = render(ctx, fmt)
+        report_cache.put(run_id, version, fmt, body)
+    
+    if not_modified:
+        return Response(status_code=304, headers=headers)
     
-    # Generate markdown
-    report = run.report_json
-    md = f"""# Rhino AI - Reporte de Evaluación
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
 
-**Documento:** {run.filename}  
-**Tipo:** {run.doc_type}  
-**Fecha:** {run.created_at.strftime('%Y-%m-%d %H:%M')}  
 
----
+@router.get("/runs/{run_id}/export.md")
+async def export_markdown(run_id: str, request: Request,
+                          session: AsyncSession = Depends(get_session)):
+    """Export report as Markdown"""
+    return await _export_rendered(run_id, "md", request, session)
 
-## Resultado
 
-**Score:** {report['score']:.2f}/100  
-**Decisión:** {report['decision']}  
+@router.get("/runs/{run_id}/export.html")
+async def export_html(run_id: str, request: Request,
+                      session: AsyncSession = Depends(get_session)):
+    """Export report as HTML"""
+    return await _export_rendered(run_id, "html", request, session)
 
-### Score Potencial
-- Actual: {report['score_potencial']['actual']}
-- Si corrige P0: {report['score_potencial']['si_corrige_p0']}
-- Si corrige P0+P1: {report['score_potencial']['si_corrige_p0_p1']}
-- Si corrige todo: {report['score_potencial']['si_corrige_todo']}
 
----
+@router.get("/runs/{run_id}/export.pdf")
+async def export_pdf(run_id: str, request: Request,
+                     session: AsyncSession = Depends(get_session)):
+    """Export report as PDF"""
+    return await _export_rendered(run_id, "pdf", request, session)
+
+
+def _export_record(row) -> bytes:
+    if row.report_codec == CODEC_REF_EVALUATION:
+        report = row.evaluation_json
+    elif row.report_codec is not None:
+        report = decode_artifact(RunArtifact(codec=row.report_codec, payload=row.report_payload))
+    else:
+        report = row.report_json
+    return orjson.dumps({
+        "run_id": row.id,
+        "filename": row.filename,
+        "doc_type": row.doc_type,
+        "doc_type_confidence": row.doc_type_confidence,
+        "decision": row.decision,
+        "score": row.score,
+        "created_at": row.created_at,
+        "evaluation": row.evaluation_json,
+        "report": report,
+    })
 
-## Fail-Fast
 
-"""
+async def _stream_export(session_maker: async_sessionmaker, query, fmt: str):
+    """Encode rows as they arrive from a server-side cursor, flushing in ~256 KB chunks"""
+    separator = b"\n" if fmt == "jsonl" else b","
+    buffer = bytearray(b"" if fmt == "jsonl" else b"[")
+    count = 0
     
-    for ff in report.get('fail_fast', []):
-        if ff['active']:
-            md += f"### ⛔ {ff['name']}\n"
-            md += f"**Evidencia:** {ff['evidencia']}\n\n"
-            md += f"{ff['explicacion']}\n\n"
+    async with session_maker() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_YIELD_PER))
+        async for row in result:
+            if fmt == "json" and count:
+                buffer += separator
+            buffer += _export_record(row)
+            if fmt == "jsonl":
+                buffer += separator
+            count += 1
+            if len(buffer) >= EXPORT_FLUSH_BYTES:
+                yield bytes(buffer)
+                buffer.clear()
     
-    md += "\n---\n\n## Hallazgos\n\n"
+    if fmt == "json":
+        buffer += b"]"
+    yield bytes(buffer)
+    logger.info(f"Export streamed", extra={"runs": count, "format": fmt})
+
+
+@router.get("/exports/runs")
+async def export_runs(
+    format: Literal["jsonl", "json"] = "jsonl",
+    doc_type: Optional[DocumentType] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    run_id: Optional[List[str]] = Query(None),
+    session_maker: async_sessionmaker = Depends(get_session_maker)
+):
+    """
+    Stream runs with their evaluation and report, oldest first
+    Returns: JSON Lines (default) or one JSON array, written incrementally
+    """
+    report = RunArtifact.__table__.alias("report")
+    query = (
+        select(
+            *RUN_SUMMARY_COLUMNS, Run.evaluation_json, Run.report_json,
+            report.c.codec.label("report_codec"), report.c.payload.label("report_payload")
+        )
+        .outerjoin(report, and_(report.c.run_id == Run.id, report.c.kind == "report"))
+    )
     
-    for h in report.get('hallazgos', []):
-        icon = {"bloqueante": "🔴", "mayor": "🟠", "menor": "🟡", "sugerencia": "🔵"}[h['severidad']]
-        md += f"### {icon} [{h['prioridad']}] {h['titulo']}\n\n"
-        md += f"**Severidad:** {h['severidad']}  \n"
-        md += f"**Evidencia:** {h['evidencia_detalle']}  \n\n"
-        md += f"**Recomendación:** {h['recomendacion']}\n\n"
-        md += f"**Qué agregar:** {h['que_agregar']}\n\n"
-        md += f"**Dónde:** {h['donde_insertar']}\n\n"
-        md += f"**Ejemplo:**\n```\n{h['ejemplo_texto']}\n```\n\n"
-        md += f"**Impacto estimado:** +{h['impacto_estimado']:.1f} puntos\n\n"
-        md += "---\n\n"
+    if doc_type:
+        query = query.where(Run.doc_type == doc_type)
+    if created_from:
+        query = query.where(Run.created_at >= created_from)
+    if created_to:
+        query = query.where(Run.created_at < created_to)
+    if run_id:
+        query = query.where(Run.id.in_(run_id))
     
-    return PlainTextResponse(content=md, media_type="text/markdown")
+    query = query.order_by(Run.created_at, Run.id)
+    media_type = "application/x-ndjson" if format == "jsonl" else "application/json"
+    return StreamingResponse(
+        _stream_export(session_maker, query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="runs.{format}"'}
+    )
@@ -0,0 +1,128 @@
+"""
+Compact outline storage
+All section contents live in one text buffer, joined by "\\n", with
+array-backed offsets and levels per section (titles and locations are
+short and kept as lists). The buffer is exactly the document's full text,
+and the lowercase view is computed once for the whole document. Nothing
+per-section is stored: section text is sliced on demand and per-section
+searches run on the whole-document lowercase view within the section's
+offsets.
+"""
+from array import array
+from typing import Iterable, List, Optional
+
+SEPARATOR = "\n"
+
+
+class CompactOutline:
+    __slots__ = ("text", "starts", "ends", "levels", "titles", "locations", "_lower")
+
+    def __init__(self, text: str, starts: array, ends: array, levels: array,
+                 titles: List[str], locations: List[str]):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.levels = levels
+        self.titles = titles
+        self.locations = locations
+        self._lower: Optional[str] = None
+
+    @classmethod
+    def from_sections(cls, sections: Iterable) -> "CompactOutline":
+        """Build from DocumentSection-like objects (e.g. an outline loaded from JSON)"""
+        builder = CompactOutlineBuilder()
+        for section in sections:
+            builder.add_section(section.title, section.level, section.location, section.content)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def full_text(self) -> str:
+        return self.text
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def headings(self) -> List[str]:
+        return self.titles
+
+    def content(self, i: int) -> str:
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def excerpt(self, i: int, start: int, end: int) -> str:
+        """Characters [start, end) of section i's content, clamped to the section"""
+        section_start, section_end = self.starts[i], self.ends[i]
+        return self.text[max(section_start, section_start + start):min(section_end, section_start + end)]
+
+    @property
+    def _lower_aligned(self) -> bool:
+        # A few characters change length when lowercased (e.g. "İ"), which
+        # shifts offsets in the lowercase view
+        return len(self.lower) == len(self.text)
+
+    def content_lower(self, i: int) -> str:
+        """Lowercase text of section i (a new string; not kept)"""
+        if self._lower_aligned:
+            return self.lower[self.starts[i]:self.ends[i]]
+        return self.content(i).lower()
+
+    def find_lower(self, needle: str, i: int) -> int:
+        """Offset of lowercase `needle` in section i's lowercase text, or -1"""
+        if not self._lower_aligned:
+            return self.content(i).lower().find(needle)
+        start = self.starts[i]
+        idx = self.lower.find(needle, start, self.ends[i])
+        return idx - start if idx != -1 else -1
+
+
+class CompactOutlineBuilder:
+    """Accumulates sections as parts and joins the buffer once"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._position = 0
+        self.starts = array("l")
+        self.ends = array("l")
+        self.levels = array("b")
+        self.titles: List[str] = []
+        self.locations: List[str] = []
+
+    def _append(self, text: str) -> None:
+        self._parts.append(text)
+        self._position += len(text)
+
+    def add_heading(self, title: str, level: int, location: str) -> None:
+        """Start a section; its content begins with the heading text"""
+        self.add_section(title, level, location, title)
+
+    def add_paragraph(self, text: str) -> None:
+        """Append a paragraph to the last section (ignored before the first heading)"""
+        if not self.starts:
+            return
+        self._append(SEPARATOR)
+        self._append(text)
+        self.ends[-1] = self._position
+
+    def add_section(self, title: str, level: int, location: str, content: str) -> None:
+        if self.starts:
+            self._append(SEPARATOR)
+        self.starts.append(self._position)
+        self._append(content)
+        self.ends.append(self._position)
+        self.levels.append(level)
+        self.titles.append(title)
+        self.locations.append(location)
+
+    @property
+    def sections_count(self) -> int:
+        return len(self.starts)
+
+    def build(self) -> CompactOutline:
+        return CompactOutline("".join(self._parts), self.starts, self.ends,
+                              self.levels, self.titles, self.locations)
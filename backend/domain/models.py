@@ -1,7 +1,11 @@
 """Domain models"""
+from collections.abc import Sequence
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_serializer
+
+from domain.compact_outline import CompactOutline
+from utils.text_analysis import TextAnalysisContext
 
 
 # Enums
@@ -12,6 +16,9 @@ CriterioEstado = Literal["CUMPLE", "PARCIAL", "NO", "NA"]
 Severidad = Literal["bloqueante", "mayor", "menor", "sugerencia"]
 Evidencia = Literal["found", "missing", "inconsistent"]
 Prioridad = Literal["P0", "P1", "P2", "P3"]
+# Which path settled a criterio: the LLM, deterministic pre-adjudication rules,
+# or a verdict reused from a previous revision of the document
+DecididoPor = Literal["llm", "reglas", "reutilizado"]
 
 
 # Document Structure
@@ -22,6 +29,32 @@ class DocumentSection(BaseModel):
     location: str  # "Section 2.1"
 
 
+class SectionsView(Sequence):
+    """Read-only sections over a CompactOutline; content is sliced on access, never kept"""
+    __slots__ = ("_compact",)
+    
+    def __init__(self, compact: CompactOutline):
+        self._compact = compact
+    
+    def __len__(self) -> int:
+        return len(self._compact)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        compact = self._compact
+        if index < 0:
+            index += len(compact)
+        if not 0 <= index < len(compact):
+            raise IndexError("section index out of range")
+        return DocumentSection.model_construct(
+            title=compact.titles[index],
+            level=compact.levels[index],
+            content=compact.content(index),
+            location=compact.locations[index]
+        )
+
+
 class DocumentOutline(BaseModel):
     filename: str
     word_count: int
@@ -29,6 +62,53 @@ class DocumentOutline(BaseModel):
     tables_count: int
     has_toc: bool
     metadata: Dict[str, Any] = {}
+    
+    # Text views share one buffer; built lazily for outlines loaded from JSON
+    _compact: Optional[CompactOutline] = PrivateAttr(default=None)
+    _analysis: Optional[TextAnalysisContext] = PrivateAttr(default=None)
+    
+    @classmethod
+    def from_compact(cls, compact: CompactOutline, **fields: Any) -> "DocumentOutline":
+        """Outline whose sections are views over `compact` (the text is held once)"""
+        outline = cls.model_construct(sections=SectionsView(compact), **fields)
+        outline._compact = compact
+        return outline
+    
+    @field_serializer("sections", mode="wrap")
+    def _serialize_sections(self, sections, handler):
+        # Buffer-backed sections exist as strings only while being encoded
+        return handler(list(sections) if isinstance(sections, SectionsView) else sections)
+    
+    @property
+    def compact(self) -> CompactOutline:
+        if self._compact is None:
+            self._compact = CompactOutline.from_sections(self.sections)
+            # The buffer now holds the text; drop the per-section copies
+            self.sections = SectionsView(self._compact)
+        return self._compact
+    
+    @property
+    def full_text(self) -> str:
+        """Section contents joined by newlines"""
+        return self.compact.full_text
+    
+    @property
+    def full_text_lower(self) -> str:
+        return self.compact.lower
+    
+    @property
+    def headings(self) -> List[str]:
+        return self.compact.headings
+    
+    def section_lower(self, index: int) -> str:
+        return self.compact.content_lower(index)
+    
+    @property
+    def analysis(self) -> TextAnalysisContext:
+        """Shared text views for detector, classifier and evaluator"""
+        if self._analysis is None:
+            self._analysis = TextAnalysisContext.from_outline(self)
+        return self._analysis
 
 
 # Evaluation Models
@@ -41,6 +121,7 @@ class CriterioEvaluacion(BaseModel):
     evidencia: List[Dict[str, str]] = []  # [{"location": "...", "snippet": "..."}]
     justificacion: str
     severidad_si_falta: Severidad
+    decidido_por: DecididoPor = "llm"
 
 
 class FailFast(BaseModel):
@@ -109,6 +190,20 @@ class AnswersSubmission(BaseModel):
     answers: List[Answer]
 
 
+# Batch re-scoring
+class RescoreRequest(BaseModel):
+    rubric_version: str
+    doc_type: Optional[DocumentType] = None
+
+
+class RubricSimulationRequest(BaseModel):
+    """Proposed rubric changes, merged over the live rubrica"""
+    pesos: Dict[str, int] = {}  # criterio_id -> peso
+    umbrales_decision: Dict[str, Dict[str, Any]] = {}
+    penalizaciones_tipicas: Dict[str, Dict[str, Any]] = {}
+    doc_type: Optional[DocumentType] = None
+
+
 # Export
 class ReportExport(BaseModel):
     run_id: str
@@ -3,23 +3,23 @@ Rhino AI - Backend FastAPI
 MVP1: Pre-check de entregables con evaluación por rúbrica
 """
 import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pythonjsonlogger import jsonlogger
 
+from api.admission import AdmissionMiddleware
 from api.routes import router
-from storage.database import init_db
+from services.retention import retention_loop
+from storage.database import async_session_maker, init_db
 from utils.config import settings
+from utils.logging_setup import setup_logging
+from utils.metrics import metrics
 
-# Configurar logging JSON
-logHandler = logging.StreamHandler()
-formatter = jsonlogger.JsonFormatter('%(asctime)s %(name)s %(levelname)s %(message)s')
-logHandler.setFormatter(formatter)
+# Configurar logging JSON (formatted and written off the event loop)
+log_listener = setup_logging()
 logger = logging.getLogger()
-logger.addHandler(logHandler)
-logger.setLevel(settings.LOG_LEVEL)
 
 
 @asynccontextmanager
@@ -33,10 +33,15 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     os.makedirs("db", exist_ok=True)
     
+    # Retention, blob GC and partition upkeep in the background
+    retention_task = asyncio.create_task(retention_loop(async_session_maker))
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Rhino AI backend")
+    retention_task.cancel()
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -46,6 +51,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Admission (inside CORS so 429s still carry CORS headers)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -71,3 +79,8 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
@@ -0,0 +1,173 @@
+"""
+Vectorized batch scoring
+Re-scores many stored runs at once under a given rubrica. Mirrors
+DocumentEvaluator.calculate_score / apply_penalties / generate_findings
+impacts / calculate_potential_scores / make_decision exactly, but on
+NumPy arrays (one row per run, one column per criterio).
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from services.rubric_registry import Rubrica
+
+ESTADO_NO, ESTADO_PARCIAL, ESTADO_CUMPLE, ESTADO_NA = 0, 1, 2, 3
+ESTADO_CODES = {"NO": ESTADO_NO, "PARCIAL": ESTADO_PARCIAL, "CUMPLE": ESTADO_CUMPLE, "NA": ESTADO_NA}
+
+# Severidad index doubles as priority index (bloqueante=P0 ... sugerencia=P3)
+SEVERIDAD_CODES = {"bloqueante": 0, "mayor": 1, "menor": 2, "sugerencia": 3}
+
+DECISIONS = ("APROBADO", "REQUIERE_CORRECCION", "RECHAZADO")
+
+# Same values DocumentEvaluator uses for the filename/content conflict finding
+CONFLICT_PRIORITY = SEVERIDAD_CODES["mayor"]
+CONFLICT_IMPACT = 5.0
+
+
+@dataclass
+class RunScoringInput:
+    """Rubric-independent state of one run"""
+    run_id: str
+    doc_type: str
+    estados: Dict[str, str]
+    fail_fast_active: bool = False
+    has_conflict: bool = False
+
+    @classmethod
+    def from_evaluation(cls, run_id: str, doc_type: str, evaluation: Dict[str, Any],
+                        detection_result: Optional[Dict[str, Any]] = None) -> "RunScoringInput":
+        """Build from a stored `evaluation_json` (and optional detection result)"""
+        estados = {c["criterio_id"]: c["estado"] for c in evaluation.get("criterios", [])}
+        fail_fast_active = any(ff.get("active") for ff in evaluation.get("fail_fast", []))
+        has_conflict = any(
+            h.get("criterio_id") == "CONTROL_DOCUMENTAL" for h in evaluation.get("hallazgos", [])
+        ) or bool(detection_result and detection_result.get("conflict_name_vs_content"))
+        return cls(run_id, doc_type, estados, fail_fast_active, has_conflict)
+
+
+@dataclass
+class BatchScoringResult:
+    run_ids: List[str]
+    doc_types: List[str]
+    score: np.ndarray
+    peso_aplicable: np.ndarray
+    si_corrige_p0: np.ndarray
+    si_corrige_p0_p1: np.ndarray
+    si_corrige_todo: np.ndarray
+    decision_codes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.run_ids)
+
+    @property
+    def decisions(self) -> List[str]:
+        return [DECISIONS[code] for code in self.decision_codes.tolist()]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Per-run dicts, rounded the same way as ScorePotencial"""
+        return [
+            {
+                "run_id": run_id,
+                "doc_type": doc_type,
+                "score": score,
+                "decision": DECISIONS[decision],
+                "peso_total_aplicable": peso,
+                "score_potencial": {
+                    "actual": round(score, 2),
+                    "si_corrige_p0": round(p0, 2),
+                    "si_corrige_p0_p1": round(p0_p1, 2),
+                    "si_corrige_todo": round(todo, 2),
+                },
+            }
+            for run_id, doc_type, score, peso, p0, p0_p1, todo, decision in zip(
+                self.run_ids, self.doc_types, self.score.tolist(), self.peso_aplicable.tolist(),
+                self.si_corrige_p0.tolist(), self.si_corrige_p0_p1.tolist(),
+                self.si_corrige_todo.tolist(), self.decision_codes.tolist()
+            )
+        ]
+
+
+class BatchScorer:
+    """Scores batches of runs under one rubrica"""
+
+    def __init__(self, rubrica: Rubrica):
+        self.rubrica = rubrica
+        penalizacion = rubrica.penalizaciones.get("falta_evidencia_critica", {})
+        self.penalizacion_critica = float(penalizacion.get("penalizacion", 0))
+
+    def score(self, runs: Iterable[RunScoringInput]) -> BatchScoringResult:
+        runs = [r for r in runs if r.doc_type in self.rubrica.tipos]
+        n = len(runs)
+        width = max((len(self.rubrica.tipos[r.doc_type].criterios) for r in runs), default=0)
+
+        # Padding columns are NA with peso 0, so they drop out of every sum
+        estado = np.full((n, width), ESTADO_NA, dtype=np.int8)
+        peso = np.zeros((n, width), dtype=np.float64)
+        severidad = np.zeros((n, width), dtype=np.int8)
+        fail_fast = np.zeros(n, dtype=bool)
+        conflict = np.zeros(n, dtype=bool)
+
+        for i, run in enumerate(runs):
+            for j, criterio in enumerate(self.rubrica.tipos[run.doc_type].criterios):
+                # Criterios missing from the stored run count as NO (as on LLM error)
+                estado[i, j] = ESTADO_CODES.get(run.estados.get(criterio.id, "NO"), ESTADO_NO)
+                peso[i, j] = criterio.peso
+                severidad[i, j] = SEVERIDAD_CODES[criterio.severidad_si_falta]
+            fail_fast[i] = run.fail_fast_active
+            conflict[i] = run.has_conflict
+
+        return self._score_arrays(runs, estado, peso, severidad, fail_fast, conflict)
+
+    def _score_arrays(self, runs: List[RunScoringInput], estado: np.ndarray, peso: np.ndarray,
+                      severidad: np.ndarray, fail_fast: np.ndarray,
+                      conflict: np.ndarray) -> BatchScoringResult:
+        is_no = estado == ESTADO_NO
+        is_parcial = estado == ESTADO_PARCIAL
+        applicable = estado != ESTADO_NA
+
+        # calculate_score
+        puntos = np.where(estado == ESTADO_CUMPLE, peso, np.where(is_parcial, peso * 0.5, 0.0))
+        peso_aplicable = np.where(applicable, peso, 0.0).sum(axis=1)
+        puntos_total = np.where(applicable, puntos, 0.0).sum(axis=1)
+        score = np.zeros(len(runs), dtype=np.float64)
+        np.divide(puntos_total, peso_aplicable, out=score, where=peso_aplicable > 0)
+        score *= 100
+
+        # apply_penalties: added one criterio at a time, like the per-run loop
+        penalized = (peso >= 15) & is_no & (puntos > 0)
+        for j in range(penalized.shape[1]):
+            score = np.where(penalized[:, j], score + self.penalizacion_critica, score)
+        score = np.maximum(score, 0.0)
+
+        # generate_findings impacts, summed per priority
+        has_finding = is_no | is_parcial
+        impacto = np.where(has_finding, np.where(is_no, peso, peso * 0.5), 0.0)
+        p0_impact = np.where(severidad == 0, impacto, 0.0).sum(axis=1)
+        p1_impact = np.where(severidad == 1, impacto, 0.0).sum(axis=1)
+        all_impact = impacto.sum(axis=1)
+        p1_impact = p1_impact + np.where(conflict, CONFLICT_IMPACT, 0.0)
+        all_impact = all_impact + np.where(conflict, CONFLICT_IMPACT, 0.0)
+
+        # calculate_potential_scores (rounding happens in to_records)
+        si_corrige_p0 = np.minimum(score + p0_impact, 100.0)
+        si_corrige_p0_p1 = np.minimum(score + p0_impact + p1_impact, 100.0)
+        si_corrige_todo = np.minimum(score + all_impact, 100.0)
+
+        # make_decision
+        bloqueantes = (has_finding & (severidad == SEVERIDAD_CODES["bloqueante"])).any(axis=1)
+        decision = np.full(len(runs), 2, dtype=np.int8)
+        decision[score >= self.rubrica.umbral_correccion] = 1
+        decision[(score >= self.rubrica.umbral_aprobado) & ~bloqueantes] = 0
+        decision[fail_fast] = 2
+
+        return BatchScoringResult(
+            run_ids=[r.run_id for r in runs],
+            doc_types=[r.doc_type for r in runs],
+            score=score,
+            peso_aplicable=peso_aplicable,
+            si_corrige_p0=si_corrige_p0,
+            si_corrige_p0_p1=si_corrige_p0_p1,
+            si_corrige_todo=si_corrige_todo,
+            decision_codes=decision,
+        )
@@ -1,17 +1,25 @@
 """Document type classifier - MVP1.1 with deterministic detector"""
-import json
+import asyncio
 import logging
-from typing import Tuple
-from domain.models import DocumentOutline, DocumentType
+from typing import Any, Dict, Optional, Tuple
+from domain.models import DocumentOutline, DocumentType, EvaluationResult
 from adapters.llm_factory import get_llm
 from services.doc_type_detector import detect_document_type
+from services.evaluator import DocumentEvaluator
+from services.rubric_registry import get_rubrica
+from utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Top-2 detection scores this close are a tie for the LLM to break
+TIE_MARGIN = 5
 
-# Load rubrica
-with open("config/rubrica_government.json", "r", encoding="utf-8") as f:
-    RUBRICA = json.load(f)
+
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible raw view of the current rubrica
+    if name == "RUBRICA":
+        return get_rubrica().raw
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def heuristic_classification(outline: DocumentOutline) -> Tuple[DocumentType, float]:
@@ -19,21 +27,21 @@ def heuristic_classification(outline: DocumentOutline) -> Tuple[DocumentType, fl
     Deterministic heuristic classification based on keywords
     Returns: (doc_type, confidence)
     """
-    content_lower = " ".join([s.content.lower() for s in outline.sections])
+    analysis = outline.analysis
     title_lower = outline.metadata.get("title", "").lower()
-    combined = f"{title_lower} {content_lower}"
     
     scores = {}
+    tipos = get_rubrica().tipos
     
-    for doc_type, config in RUBRICA["tipos_documentos_entregables"].items():
+    for doc_type, tipo in tipos.items():
         if doc_type == "UNKNOWN":
             continue
         
-        keywords = config.get("keywords", [])
-        score = sum(1 for kw in keywords if kw.lower() in combined)
+        keywords = tipo.keywords_lower
+        score = sum(1 for kw in keywords if kw in title_lower or analysis.contains(kw))
         
         # Bonus for title match
-        if any(kw.lower() in title_lower for kw in keywords):
+        if any(kw in title_lower for kw in keywords):
             score += 2
         
         scores[doc_type] = score
@@ -43,7 +51,7 @@ def heuristic_classification(outline: DocumentOutline) -> Tuple[DocumentType, fl
     
     best_type = max(scores, key=scores.get)
     max_score = scores[best_type]
-    total_keywords = len(RUBRICA["tipos_documentos_entregables"][best_type]["keywords"])
+    total_keywords = len(tipos[best_type].keywords)
     
     confidence = min(max_score / max(total_keywords, 1), 1.0)
     
@@ -54,6 +62,67 @@ def heuristic_classification(outline: DocumentOutline) -> Tuple[DocumentType, fl
     return best_type, confidence
 
 
+def tie_candidates(detection_result: Dict) -> Optional[Tuple[str, str]]:
+    """(top1, top2) types when detection ended in a close tie (within 5 points)"""
+    top3 = detection_result.get("top3", [])
+    if len(top3) >= 2 and detection_result["tipo_detectado"] != "UNKNOWN":
+        if abs(top3[0]["score"] - top3[1]["score"]) <= TIE_MARGIN:
+            return top3[0]["type"], top3[1]["type"]
+    return None
+
+
+async def llm_tiebreak(outline: DocumentOutline, detection_result: Dict, run_id: str) -> Optional[str]:
+    """
+    Ask the LLM to pick between the two tied candidates
+    Updates detection_result with the winner; returns None if the LLM fails or
+    answers with neither candidate
+    """
+    top3 = detection_result["top3"]
+    top1_score = top3[0]["score"]
+    top2_score = top3[1]["score"]
+    logger.info(f"Close tie detected ({top1_score} vs {top2_score}), using LLM tiebreaker", 
+               extra={"run_id": run_id})
+    
+    try:
+        llm = get_llm()
+        
+        # Prepare context for LLM
+        sections_summary = "\n".join([f"- {s.title}" for s in outline.sections[:15]])
+        
+        prompt = f"""Desempate entre dos tipos de documento muy cercanos:
+
+Candidato 1: {top3[0]['type']} (score: {top1_score})
+Candidato 2: {top3[1]['type']} (score: {top2_score})
+
+Documento:
+Título: {outline.metadata.get('title', 'Sin título')}
+Secciones: {sections_summary}
+
+Señales detectadas:
+- {top3[0]['type']}: {top3[0]['why']}
+- {top3[1]['type']}: {top3[1]['why']}
+
+Responde SOLO con el ganador en JSON:
+{{
+  "winner": "{top3[0]['type']}" o "{top3[1]['type']}",
+  "reasoning": "..."
+}}"""
+        
+        response = await llm.generate_json(prompt)
+        llm_winner = response.get("winner", detection_result["tipo_detectado"])
+        
+        if llm_winner in [top3[0]['type'], top3[1]['type']]:
+            detection_result["tipo_detectado"] = llm_winner
+            detection_result["razon"] += f" | LLM tiebreaker: {response.get('reasoning', '')}"
+            logger.info(f"LLM tiebreaker selected: {llm_winner}", extra={"run_id": run_id})
+            return llm_winner
+        
+    except Exception as e:
+        logger.error(f"LLM tiebreaker failed: {e}", extra={"run_id": run_id})
+    
+    return None
+
+
 async def classify_document(outline: DocumentOutline, run_id: str) -> Tuple[DocumentType, float, dict]:
     """
     Classify document type with deterministic detector + LLM tiebreaker
@@ -63,16 +132,15 @@ async def classify_document(outline: DocumentOutline, run_id: str) -> Tuple[Docu
     logger.info(f"Classifying document with deterministic detector", extra={"run_id": run_id})
     
     # Prepare data for detector
-    headings = [s.title for s in outline.sections]
     tables = [{"context": "table_data"}] * outline.tables_count  # Simplified
-    full_text = "\n".join([s.content for s in outline.sections])
     
     # Run deterministic detector
     detection_result = detect_document_type(
         filename=outline.filename,
-        headings=headings,
+        headings=outline.headings,
         tables=tables,
-        full_text=full_text
+        full_text=outline.full_text,
+        context=outline.analysis
     )
     
     doc_type = detection_result["tipo_detectado"]
@@ -81,52 +149,45 @@ async def classify_document(outline: DocumentOutline, run_id: str) -> Tuple[Docu
     logger.info(f"Deterministic detection: {doc_type} ({confidence:.2f})", 
                extra={"run_id": run_id, "doc_type": doc_type, "confidence": confidence})
     
-    # Check if LLM tiebreaker is needed
-    top3 = detection_result.get("top3", [])
-    if len(top3) >= 2 and doc_type != "UNKNOWN":
-        top1_score = top3[0]["score"]
-        top2_score = top3[1]["score"]
-        
-        # Tie within 5 points => use LLM
-        if abs(top1_score - top2_score) <= 5:
-            logger.info(f"Close tie detected ({top1_score} vs {top2_score}), using LLM tiebreaker", 
-                       extra={"run_id": run_id})
-            
-            try:
-                llm = get_llm()
-                
-                # Prepare context for LLM
-                sections_summary = "\n".join([f"- {s.title}" for s in outline.sections[:15]])
-                
-                prompt = f"""Desempate entre dos tipos de documento muy cercanos:
-
-Candidato 1: {top3[0]['type']} (score: {top1_score})
-Candidato 2: {top3[1]['type']} (score: {top2_score})
-
-Documento:
-Título: {outline.metadata.get('title', 'Sin título')}
-Secciones: {sections_summary}
+    # Tie within 5 points => use LLM
+    if tie_candidates(detection_result):
+        doc_type = await llm_tiebreak(outline, detection_result, run_id) or doc_type
+    
+    return doc_type, confidence, detection_result
 
-Señales detectadas:
-- {top3[0]['type']}: {top3[0]['why']}
-- {top3[1]['type']}: {top3[1]['why']}
 
-Responde SOLO con el ganador en JSON:
-{{
-  "winner": "{top3[0]['type']}" o "{top3[1]['type']}",
-  "reasoning": "..."
-}}"""
-                
-                response = await llm.generate_json(prompt)
-                llm_winner = response.get("winner", doc_type)
-                
-                if llm_winner in [top3[0]['type'], top3[1]['type']]:
-                    doc_type = llm_winner
-                    detection_result["tipo_detectado"] = llm_winner
-                    detection_result["razon"] += f" | LLM tiebreaker: {response.get('reasoning', '')}"
-                    logger.info(f"LLM tiebreaker selected: {llm_winner}", extra={"run_id": run_id})
-                
-            except Exception as e:
-                logger.error(f"LLM tiebreaker failed: {e}", extra={"run_id": run_id})
+async def evaluate_with_speculative_tiebreak(
+    outline: DocumentOutline, run_id: str, detection_result: Dict,
+    evaluators: Dict[str, DocumentEvaluator]
+) -> Tuple[DocumentType, EvaluationResult]:
+    """
+    Resolve a close tie while both candidate evaluations already run
+    The tiebreaker and one evaluation per candidate (keys of `evaluators`,
+    which must include the deterministic winner) start together; losers are
+    cancelled as soon as the tiebreaker answers. Without an LLM verdict the
+    deterministic winner is kept.
+    """
+    tasks = {doc_type: asyncio.create_task(evaluator.evaluate())
+             for doc_type, evaluator in evaluators.items()}
+    deterministic = detection_result["tipo_detectado"]
     
-    return doc_type, confidence, detection_result
+    try:
+        winner = await llm_tiebreak(outline, detection_result, run_id)
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    
+    if winner not in tasks:
+        winner = deterministic
+    
+    losers = [task for doc_type, task in tasks.items() if doc_type != winner]
+    for task in losers:
+        if not task.done():
+            task.cancel()
+            metrics.counter("classifier.speculative_cancelled").inc()
+    await asyncio.gather(*losers, return_exceptions=True)
+    
+    logger.info(f"Speculative tiebreak kept {winner}", extra={"run_id": run_id})
+    return winner, await tasks[winner]
@@ -2,34 +2,57 @@
 Detector determinístico de tipo de documento
 Basado en document_type_detection_rhino.json (Gobierno)
 """
-import json
 import logging
 import re
-from typing import Dict, List, Tuple, Any
-from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Any
+
+from services.rubric_registry import (
+    DetectionConfig, get_detection_config, parse_detection_config
+)
+from utils.text_analysis import TextAnalysisContext
 
 logger = logging.getLogger(__name__)
 
-# Load detection config
-CONFIG_PATH = Path(__file__).parent.parent / "config" / "document_type_detection_rhino.json"
-with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-    DETECTION_CONFIG = json.load(f)
+
+def __getattr__(name: str) -> Any:
+    # DETECTION_CONFIG always resolves to the registry's current raw config
+    if name == "DETECTION_CONFIG":
+        return get_detection_config().raw
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _compiled(config: Dict) -> DetectionConfig:
+    """Indexed view of `config` (the registry's own unless a custom dict is passed)"""
+    detection = get_detection_config()
+    if config is detection.raw:
+        return detection
+    return parse_detection_config(config)
 
 
 def extract_features(filename: str, headings: List[str], tables: List[Dict], 
-                    full_text: str) -> Dict[str, Any]:
+                    full_text: str, full_text_lower: Optional[str] = None,
+                    context: Optional[TextAnalysisContext] = None) -> Dict[str, Any]:
     """
     Extract features from document for type detection
+    `context` shares lowercase views and lookups with other pipeline stages;
+    `full_text_lower` may carry an already lowercased full_text
     Returns: features dict with signals and evidence
     """
+    if context is None:
+        context = TextAnalysisContext(full_text, headings, full_text_lower=full_text_lower)
+    
     features = {
         "filename": filename.lower(),
         "filename_tokens": set(re.findall(r'\w+', filename.lower())),
-        "headings": [h.lower() for h in headings],
-        "headings_text": " ".join(headings).lower(),
+        "headings": context.headings_lower,
+        "headings_text": context.headings_text,
         "tables_count": len(tables),
-        "full_text_lower": full_text.lower(),
-        "word_count": len(full_text.split()),
+        "full_text_lower": context.lower,
+        "word_count": context.word_count,
+        "context": context,
+        # Per-detection caches: indicator and pattern checks are asked for repeatedly
+        "strong_indicators": {},
+        "pattern_results": {},
         "signals_found": {},
         "evidence": {}
     }
@@ -37,36 +60,51 @@ def extract_features(filename: str, headings: List[str], tables: List[Dict],
     return features
 
 
+def _text_context(features: Dict) -> TextAnalysisContext:
+    context = features.get("context")
+    if context is None:
+        # Features assembled by hand (without extract_features)
+        context = features["context"] = TextAnalysisContext(
+            "", features.get("headings", []), full_text_lower=features["full_text_lower"]
+        )
+    return context
+
+
 def has_at_least_one_strong_indicator(doc_type: str, features: Dict, 
                                       config: Dict) -> Tuple[bool, List[str]]:
     """
     Check if document has at least one strong indicator for the type
     Returns: (has_indicator, list_of_found_indicators)
     """
-    type_config = config["document_types"][doc_type]
-    strong_indicators = type_config["strong_indicators"]
+    cache = features.setdefault("strong_indicators", {})
+    if doc_type not in cache:
+        cache[doc_type] = _strong_indicators(doc_type, features, config)
+    has_indicator, found = cache[doc_type]
+    return has_indicator, list(found)
+
+
+def _strong_indicators(doc_type: str, features: Dict, config: Dict) -> Tuple[bool, List[str]]:
+    type_config = _compiled(config).types[doc_type]
+    context = _text_context(features)
     found = []
     
     # Check headings
-    for indicator in strong_indicators["headings"]:
-        indicator_lower = indicator.lower()
+    for indicator, indicator_lower in type_config.strong_headings:
         for heading in features["headings"]:
             if indicator_lower in heading:
                 found.append(f"heading:{indicator}")
                 break
     
     # Check tables (by keywords in table context)
-    for indicator in strong_indicators["tables"]:
-        indicator_lower = indicator.lower()
-        if indicator_lower in features["full_text_lower"]:
+    for indicator, indicator_lower in type_config.strong_tables:
+        if context.contains(indicator_lower):
             # Simple heuristic: if keyword appears near table context
             found.append(f"table:{indicator}")
     
     # Check keywords with density
     keyword_matches = 0
-    for keyword in strong_indicators["keywords"]:
-        keyword_lower = keyword.lower()
-        count = features["full_text_lower"].count(keyword_lower)
+    for keyword, keyword_lower in type_config.strong_keywords:
+        count = context.count(keyword_lower)
         if count > 0:
             keyword_matches += count
             if count >= 2:  # Strong signal if appears multiple times
@@ -80,43 +118,47 @@ def check_structural_patterns(doc_type: str, features: Dict, config: Dict) -> Li
     Check structural patterns for document type
     Returns: list of matched patterns
     """
-    type_config = config["document_types"][doc_type]
-    patterns = type_config.get("structural_patterns", [])
+    patterns = _compiled(config).types[doc_type].structural_patterns
     matched = []
     
-    text = features["full_text_lower"]
+    has = _text_context(features).contains
     headings_text = features["headings_text"]
+    results = features.setdefault("pattern_results", {})
     
     # Pattern detection heuristics
     pattern_checks = {
         "tiene_seccion_rollback": lambda: "rollback" in headings_text,
-        "tiene_inventario_datos": lambda: "inventario" in text and "datos" in text,
-        "tiene_cronograma_migracion": lambda: "cronograma" in text or "timeline" in text,
-        "tiene_matriz_trazabilidad_RF_TC": lambda: ("rf" in text or "requisito" in text) and ("tc" in text or "caso" in text) and "trazabilidad" in text,
-        "tiene_arquitectura": lambda: "arquitectura" in headings_text or "diagrama" in text,
-        "tiene_requisitos_funcionales": lambda: "requisitos funcionales" in text or "rf-" in text,
-        "tiene_modelo_datos": lambda: "modelo de datos" in text or "entidades" in text,
-        "tiene_escenarios_negocio": lambda: "escenario" in text and ("negocio" in text or "uso" in text),
-        "tiene_tabla_parametros": lambda: "parámetros" in text or "configuración" in text,
-        "tiene_comandos_scripts": lambda: "comando" in text or "script" in text,
-        "tiene_endpoints_apis": lambda: ("endpoint" in text or "api" in text) and features["tables_count"] > 0,
-        "tiene_codigos_error": lambda: "código" in text and "error" in text,
-        "tiene_checklist": lambda: "checklist" in text or "☐" in text or "[ ]" in text,
-        "tiene_criterios_aceptacion": lambda: "criterios" in text and "aceptación" in text,
-        "tiene_casos_prueba_con_pasos": lambda: "casos de prueba" in text and "pasos" in text,
-        "tiene_datos_prueba": lambda: "datos de prueba" in text or "test data" in text,
-        "tiene_resultados_evidencia": lambda: "resultado" in text and ("esperado" in text or "evidencia" in text),
-        "tiene_procedimientos_inicio_parada": lambda: ("inicio" in text or "start" in text) and ("parada" in text or "stop" in text),
-        "tiene_monitoreo_alertas": lambda: "monitoreo" in text or "alertas" in text,
-        "tiene_ventanas_mantenimiento": lambda: "ventana" in text and "mantenimiento" in text,
-        "tiene_troubleshooting": lambda: "troubleshooting" in text or "solución de problemas" in text,
-        "tiene_timeline_cronologia": lambda: "timeline" in text or "cronología" in text,
-        "tiene_causa_raiz": lambda: "causa raíz" in text or "root cause" in text or "5 whys" in text,
-        "tiene_acciones_preventivas": lambda: "acciones preventivas" in text or "prevención" in text,
+        "tiene_inventario_datos": lambda: has("inventario") and has("datos"),
+        "tiene_cronograma_migracion": lambda: has("cronograma") or has("timeline"),
+        "tiene_matriz_trazabilidad_RF_TC": lambda: (has("rf") or has("requisito")) and (has("tc") or has("caso")) and has("trazabilidad"),
+        "tiene_arquitectura": lambda: "arquitectura" in headings_text or has("diagrama"),
+        "tiene_requisitos_funcionales": lambda: has("requisitos funcionales") or has("rf-"),
+        "tiene_modelo_datos": lambda: has("modelo de datos") or has("entidades"),
+        "tiene_escenarios_negocio": lambda: has("escenario") and (has("negocio") or has("uso")),
+        "tiene_tabla_parametros": lambda: has("parámetros") or has("configuración"),
+        "tiene_comandos_scripts": lambda: has("comando") or has("script"),
+        "tiene_endpoints_apis": lambda: (has("endpoint") or has("api")) and features["tables_count"] > 0,
+        "tiene_codigos_error": lambda: has("código") and has("error"),
+        "tiene_checklist": lambda: has("checklist") or has("☐") or has("[ ]"),
+        "tiene_criterios_aceptacion": lambda: has("criterios") and has("aceptación"),
+        "tiene_casos_prueba_con_pasos": lambda: has("casos de prueba") and has("pasos"),
+        "tiene_datos_prueba": lambda: has("datos de prueba") or has("test data"),
+        "tiene_resultados_evidencia": lambda: has("resultado") and (has("esperado") or has("evidencia")),
+        "tiene_procedimientos_inicio_parada": lambda: (has("inicio") or has("start")) and (has("parada") or has("stop")),
+        "tiene_monitoreo_alertas": lambda: has("monitoreo") or has("alertas"),
+        "tiene_ventanas_mantenimiento": lambda: has("ventana") and has("mantenimiento"),
+        "tiene_troubleshooting": lambda: has("troubleshooting") or has("solución de problemas"),
+        "tiene_timeline_cronologia": lambda: has("timeline") or has("cronología"),
+        "tiene_causa_raiz": lambda: has("causa raíz") or has("root cause") or has("5 whys"),
+        "tiene_acciones_preventivas": lambda: has("acciones preventivas") or has("prevención"),
     }
     
     for pattern in patterns:
-        if pattern in pattern_checks and pattern_checks[pattern]():
+        if pattern not in pattern_checks:
+            continue
+        if pattern not in results:
+            results[pattern] = pattern_checks[pattern]()
+        if results[pattern]:
             matched.append(pattern)
     
     return matched
@@ -129,19 +171,18 @@ def score_each_type(features: Dict, config: Dict) -> Tuple[Dict[str, float], Dic
     """
     scores = {}
     evidence_per_type = {}
-    weights = config["pseudocode_scoring_0_100"]["signal_weights"]
+    detection = _compiled(config)
+    weights = detection.signal_weights
     
-    for doc_type in config["document_types"].keys():
+    for doc_type, type_config in detection.types.items():
         if doc_type == "UNKNOWN":
             continue
         
         score = 0
         evidence = []
-        type_config = config["document_types"][doc_type]
         
         # 1. Filename exact match
-        filename_tokens = type_config["filename_tokens"]
-        for token in filename_tokens:
+        for token in type_config.filename_tokens:
             if token in features["filename_tokens"]:
                 score += weights["filename_exact_match"]
                 evidence.append(f"filename_match:{token}")
@@ -251,12 +292,12 @@ def select_type(scores: Dict[str, float], evidence: Dict[str, List[str]],
     Select document type based on scores, evidence, and rules
     Returns: result dict with tipo_detectado, confianza, razon, top3, etc.
     """
-    thresholds = config["type_thresholds"]
+    detection = _compiled(config)
     
     # Filter candidates: score >= threshold AND has strong indicator
     candidates = []
     for doc_type, score in scores.items():
-        if score >= thresholds[doc_type]:
+        if score >= detection.types[doc_type].threshold:
             has_strong, _ = has_at_least_one_strong_indicator(doc_type, features, config)
             if has_strong:
                 candidates.append((doc_type, score))
@@ -320,11 +361,10 @@ def select_type(scores: Dict[str, float], evidence: Dict[str, List[str]],
     conflict_name_vs_content = False
     filename_suggested_type = None
     
-    for doc_type in config["document_types"].keys():
+    for doc_type, type_config in detection.types.items():
         if doc_type == "UNKNOWN":
             continue
-        tokens = config["document_types"][doc_type]["filename_tokens"]
-        if any(token in filename_tokens for token in tokens):
+        if any(token in filename_tokens for token in type_config.filename_tokens):
             filename_suggested_type = doc_type
             break
     
@@ -357,21 +397,24 @@ def select_type(scores: Dict[str, float], evidence: Dict[str, List[str]],
 
 
 def detect_document_type(filename: str, headings: List[str], tables: List[Dict], 
-                        full_text: str) -> Dict[str, Any]:
+                        full_text: str, full_text_lower: Optional[str] = None,
+                        context: Optional[TextAnalysisContext] = None) -> Dict[str, Any]:
     """
     Main entry point for document type detection
     Returns: detection result with tipo_detectado, confianza, etc.
     """
-    logger.info(f"Detecting document type for: {filename}")
+    logger.debug(f"Detecting document type for: {filename}")
+    
+    config = get_detection_config().raw
     
     # Extract features
-    features = extract_features(filename, headings, tables, full_text)
+    features = extract_features(filename, headings, tables, full_text, full_text_lower, context)
     
     # Score each type
-    scores, evidence = score_each_type(features, DETECTION_CONFIG)
+    scores, evidence = score_each_type(features, config)
     
     # Select type
-    result = select_type(scores, evidence, DETECTION_CONFIG, features["filename_tokens"], features)
+    result = select_type(scores, evidence, config, features["filename_tokens"], features)
     
     logger.info(f"Detection result: {result['tipo_detectado']} (confidence: {result['confianza']})")
     
@@ -1,8 +1,8 @@
 """Document evaluator with rubrica"""
-import json
+import asyncio
 import logging
 import uuid
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 
 from domain.models import (
@@ -11,68 +11,113 @@ from domain.models import (
 )
 from utils.docx_parser import search_in_document
 from adapters.llm_factory import get_llm
+from services import map_reduce
+from services.preadjudication import preadjudicate
+from services.revision_reuse import PriorRevision
+from services.rubric_registry import Criterio, get_rubrica
+from utils.config import settings
+from utils.metrics import metrics
+from utils.tracing import set_attribute, span
 
 logger = logging.getLogger(__name__)
 
-# Load rubrica
-with open("config/rubrica_government.json", "r", encoding="utf-8") as f:
-    RUBRICA = json.load(f)
+
+def __getattr__(name: str) -> Any:
+    # Backwards-compatible raw view of the current rubrica
+    if name == "RUBRICA":
+        return get_rubrica().raw
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Stable instructions shared by every criterio call. Together with the
+# document prefix they form the cacheable part of the prompt; only the
+# per-criterio suffix changes between calls.
+SYSTEM_PROMPT = """Eres un revisor de entregables técnicos que evalúa documentos contra una rúbrica gubernamental.
+
+REGLAS ANTI-ALUCINACIÓN:
+- Solo afirmar que existe si hay evidencia con location + snippet
+- Si no hay evidencia, estado = NO
+- NA solo si el criterio genuinamente no aplica (con justificación)
+- No inferir ni inventar contenido
+
+Responde en JSON:
+{
+  "estado": "CUMPLE|PARCIAL|NO|NA",
+  "justificacion": "Explicación detallada con referencias a evidencia o 'No se encontró'"
+}"""
+
+
+# Sections shown in the single-call document prefix
+PREFIX_SECTIONS = 10
 
 
 class DocumentEvaluator:
-    def __init__(self, outline: DocumentOutline, doc_type: DocumentType, run_id: str, detection_result: Dict = None):
+    def __init__(self, outline: DocumentOutline, doc_type: DocumentType, run_id: str, detection_result: Dict = None,
+                 prior_revision: Optional[PriorRevision] = None):
         self.outline = outline
         self.doc_type = doc_type
         self.run_id = run_id
         self.detection_result = detection_result  # MVP1.1
+        self.prior_revision = prior_revision
+        self.failed_criterios: Set[str] = set()  # LLM errors; their verdicts are not reusable
+        # Locations of the sections each LLM verdict was given (its reuse depends on them)
+        self.prompt_locations: Dict[str, List[str]] = {}
         self.llm = get_llm()
-        self.criterios_config = RUBRICA["tipos_documentos_entregables"][doc_type]["criterios"]
+        self._document_prefix = None
+        self._windows = None
+        self._map_semaphore = None
+        self._warm_prefixes: Dict[Tuple[str, str], asyncio.Event] = {}
+        self.rubrica = get_rubrica()
+        self.criterios_config = self.rubrica.tipos[doc_type].criterios
     
     async def evaluate(self, user_answers: Dict[str, str] = None) -> EvaluationResult:
         """Main evaluation flow"""
-        logger.info(f"Starting evaluation", extra={"run_id": self.run_id, "doc_type": self.doc_type})
-        
-        # 1. Check fail-fast conditions
-        fail_fast_results = self.check_fail_fast()
-        
-        # 2. Evaluate each criterio
-        criterios_eval = await self.evaluate_criterios(user_answers or {})
-        
-        # 3. Calculate score
-        score, peso_aplicable = self.calculate_score(criterios_eval)
-        
-        # 4. Apply penalties
-        score, penalties = self.apply_penalties(score, criterios_eval)
-        
-        # 5. Generate findings
-        hallazgos = self.generate_findings(criterios_eval)
-        
-        # 6. Generate questions (only for gaps P0/P1/P2)
-        preguntas = self.generate_questions(criterios_eval, hallazgos)
-        
-        # 7. Calculate potential scores
-        score_potencial = self.calculate_potential_scores(score, hallazgos)
-        
-        # 8. Make decision
-        decision = self.make_decision(score, fail_fast_results, hallazgos)
-        
-        return EvaluationResult(
-            run_id=self.run_id,
-            doc_type=self.doc_type,
-            doc_type_confidence=1.0,  # Set by caller
-            score=score,
-            decision=decision,
-            fail_fast=fail_fast_results,
-            criterios=criterios_eval,
-            hallazgos=sorted(hallazgos, key=lambda h: (
-                {"bloqueante": 0, "mayor": 1, "menor": 2, "sugerencia": 3}[h.severidad],
-                h.prioridad
-            )),
-            preguntas=preguntas,
-            score_potencial=score_potencial,
-            penalizaciones_aplicadas=penalties,
-            peso_total_aplicable=peso_aplicable
-        )
+        with span("evaluate", doc_type=self.doc_type):
+            logger.info(f"Starting evaluation", extra={"run_id": self.run_id, "doc_type": self.doc_type})
+        
+            # 1. Check fail-fast conditions
+            fail_fast_results = self.check_fail_fast()
+        
+            # 2. Evaluate each criterio
+            criterios_eval = await self.evaluate_criterios(user_answers or {})
+        
+            with span("scoring"):
+                # 3. Calculate score
+                score, peso_aplicable = self.calculate_score(criterios_eval)
+        
+                # 4. Apply penalties
+                score, penalties = self.apply_penalties(score, criterios_eval)
+        
+                # 5. Generate findings
+                hallazgos = self.generate_findings(criterios_eval)
+        
+                # 6. Generate questions (only for gaps P0/P1/P2)
+                preguntas = self.generate_questions(criterios_eval, hallazgos)
+        
+                # 7. Calculate potential scores
+                score_potencial = self.calculate_potential_scores(score, hallazgos)
+        
+                # 8. Make decision
+                decision = self.make_decision(score, fail_fast_results, hallazgos)
+        
+            logger.info(f"LLM token usage", extra={"run_id": self.run_id, **self.llm.usage})
+        
+            return EvaluationResult(
+                run_id=self.run_id,
+                doc_type=self.doc_type,
+                doc_type_confidence=1.0,  # Set by caller
+                score=score,
+                decision=decision,
+                fail_fast=fail_fast_results,
+                criterios=criterios_eval,
+                hallazgos=sorted(hallazgos, key=lambda h: (
+                    {"bloqueante": 0, "mayor": 1, "menor": 2, "sugerencia": 3}[h.severidad],
+                    h.prioridad
+                )),
+                preguntas=preguntas,
+                score_potencial=score_potencial,
+                penalizaciones_aplicadas=penalties,
+                peso_total_aplicable=peso_aplicable
+            )
     
     def check_fail_fast(self) -> List[FailFast]:
         """Check fail-fast conditions"""
@@ -95,82 +140,230 @@ class DocumentEvaluator:
         return results
     
     async def evaluate_criterios(self, user_answers: Dict[str, str]) -> List[CriterioEvaluacion]:
-        """Evaluate all criterios"""
-        results = []
-        
-        for criterio_config in self.criterios_config:
-            eval_result = await self.evaluate_single_criterio(criterio_config, user_answers)
-            results.append(eval_result)
-        
-        return results
+        """
+        Evaluate all criterios concurrently; LLM calls still queue on the shared
+        LLM limiter and wait for their prompt prefix to be cached (_generate_cached)
+        """
+        return list(await asyncio.gather(*(
+            self.evaluate_single_criterio(criterio_config, user_answers)
+            for criterio_config in self.criterios_config
+        )))
     
-    async def evaluate_single_criterio(self, criterio_config: Dict, 
+    async def evaluate_single_criterio(self, criterio_config: Criterio, 
                                       user_answers: Dict[str, str]) -> CriterioEvaluacion:
-        """Evaluate single criterio with LLM"""
-        criterio_id = criterio_config["id"]
+        """Evaluate single criterio with pre-adjudication rules, falling back to the LLM"""
+        with span("criterio", criterio_id=criterio_config.id):
+            result = await self._evaluate_criterio(criterio_config, user_answers)
+            set_attribute("estado", result.estado)
+            set_attribute("decidido_por", result.decidido_por)
+            return result
+    
+    async def _evaluate_criterio(self, criterio_config: Criterio,
+                                 user_answers: Dict[str, str]) -> CriterioEvaluacion:
+        criterio_id = criterio_config.id
         
         # Search for evidence in document
-        evidencia_requerida = criterio_config.get("evidencia_requerida", [])
-        evidencia_found = search_in_document(self.outline, evidencia_requerida)
+        with span("evidence.search"):
+            evidencia_found = search_in_document(
+                self.outline,
+                criterio_config.evidencia_requerida,
+                criterio_config.evidencia_requerida_lower
+            )
         
         # Check user answers
         answer_key = f"answer_{criterio_id}"
         user_evidence = user_answers.get(answer_key, "")
         
+        # Clear-cut verdicts are settled locally
+        if settings.PREADJUDICATION_ENABLED:
+            veredicto = preadjudicate(criterio_config, self.outline, evidencia_found, user_evidence)
+            if veredicto is not None:
+                estado, justificacion = veredicto
+                metrics.counter("evaluator.criterios_reglas").inc()
+                return CriterioEvaluacion(
+                    criterio_id=criterio_id,
+                    nombre=criterio_config.nombre,
+                    peso=criterio_config.peso,
+                    estado=estado,
+                    puntos_obtenidos=self._puntos(estado, criterio_config.peso),
+                    evidencia=evidencia_found,
+                    justificacion=justificacion,
+                    severidad_si_falta=criterio_config.severidad_si_falta,
+                    decidido_por="reglas"
+                )
+        
+        # Unchanged evidence keeps the previous revision's verdict
+        if self.prior_revision is not None:
+            prior = self.prior_revision.lookup(criterio_id, evidencia_found)
+            if prior is not None:
+                metrics.counter("evaluator.criterios_reutilizados").inc()
+                self.prompt_locations[criterio_id] = prior["contexto"]
+                return CriterioEvaluacion(
+                    criterio_id=criterio_id,
+                    nombre=criterio_config.nombre,
+                    peso=criterio_config.peso,
+                    estado=prior["estado"],
+                    puntos_obtenidos=self._puntos(prior["estado"], criterio_config.peso),
+                    evidencia=prior["evidencia"],
+                    justificacion=prior["justificacion"],
+                    severidad_si_falta=criterio_config.severidad_si_falta,
+                    decidido_por="reutilizado"
+                )
+        
+        metrics.counter("evaluator.criterios_llm").inc()
+        
         # Prepare LLM prompt
         prompt = self._build_criterio_prompt(criterio_config, evidencia_found, user_evidence)
         
         try:
-            response = await self.llm.generate_json(prompt)
-            
-            estado = response.get("estado", "NO")
-            justificacion = response.get("justificacion", "")
-            
-            # Calculate points
-            peso = criterio_config["peso"]
-            if estado == "CUMPLE":
-                puntos = peso
-            elif estado == "PARCIAL":
-                puntos = peso * 0.5
-            elif estado == "NA":
-                puntos = 0  # NA excludes from denominator
-            else:  # NO
-                puntos = 0
+            if self._uses_map_reduce():
+                estado, justificacion, citada = await self._map_reduce_criterio(
+                    criterio_config, prompt, evidencia_found
+                )
+            else:
+                self.prompt_locations[criterio_id] = [
+                    s.location for s in self.outline.sections[:PREFIX_SECTIONS]
+                ]
+                with span("llm.call"):
+                    response = await self._generate_cached(
+                        prompt, SYSTEM_PROMPT, self._build_document_prefix()
+                    )
+                
+                estado = response.get("estado", "NO")
+                justificacion = response.get("justificacion", "")
+                citada = []
             
+            peso = criterio_config.peso
             return CriterioEvaluacion(
                 criterio_id=criterio_id,
-                nombre=criterio_config["nombre"],
+                nombre=criterio_config.nombre,
                 peso=peso,
                 estado=estado,
-                puntos_obtenidos=puntos,
-                evidencia=evidencia_found if evidencia_found else [],
+                puntos_obtenidos=self._puntos(estado, peso),
+                evidencia=(evidencia_found or []) + citada,
                 justificacion=justificacion,
-                severidad_si_falta=criterio_config.get("severidad_si_falta", "menor")
+                severidad_si_falta=criterio_config.severidad_si_falta
             )
             
         except Exception as e:
             logger.error(f"Error evaluating criterio {criterio_id}: {e}", 
                         extra={"run_id": self.run_id})
+            self.failed_criterios.add(criterio_id)
             # Default to NO on error
             return CriterioEvaluacion(
                 criterio_id=criterio_id,
-                nombre=criterio_config["nombre"],
-                peso=criterio_config["peso"],
+                nombre=criterio_config.nombre,
+                peso=criterio_config.peso,
                 estado="NO",
                 puntos_obtenidos=0,
                 evidencia=[],
                 justificacion=f"Error en evaluación: {str(e)}",
-                severidad_si_falta=criterio_config.get("severidad_si_falta", "menor")
+                severidad_si_falta=criterio_config.severidad_si_falta
             )
     
-    def _build_criterio_prompt(self, criterio_config: Dict, 
+    async def _generate_cached(self, prompt: str, system_prompt: str, prefix: str) -> Dict[str, Any]:
+        """
+        The first call with a given system prompt and prefix goes alone and writes
+        the provider's prompt cache; concurrent calls sharing them wait for it,
+        then read the cache instead of each paying for a cache write
+        """
+        key = (system_prompt, prefix)
+        warm = self._warm_prefixes.get(key)
+        if warm is None:
+            warm = self._warm_prefixes[key] = asyncio.Event()
+            try:
+                return await self.llm.generate_json(prompt, system_prompt=system_prompt, prefix=prefix)
+            finally:
+                warm.set()
+        await warm.wait()
+        return await self.llm.generate_json(prompt, system_prompt=system_prompt, prefix=prefix)
+    
+    def _uses_map_reduce(self) -> bool:
+        """Large documents are evaluated window by window instead of by their first sections"""
+        if not settings.MAP_REDUCE_ENABLED:
+            return False
+        if self._windows is None:
+            if map_reduce.document_tokens(self.outline) <= settings.MAP_REDUCE_MIN_TOKENS:
+                self._windows = []
+            else:
+                self._windows = map_reduce.build_windows(self.outline, settings.MAP_REDUCE_WINDOW_TOKENS)
+                self._map_semaphore = asyncio.Semaphore(settings.MAP_REDUCE_CONCURRENCY)
+                logger.info(f"Map-reduce evaluation over {len(self._windows)} windows",
+                            extra={"run_id": self.run_id})
+        return bool(self._windows)
+    
+    async def _map_reduce_criterio(self, criterio_config: Criterio, prompt: str,
+                                   evidencia_found: List[Dict]) -> Tuple[str, str, List[Dict]]:
+        """Map the criterio over relevant windows in rounds, then reduce to one verdict"""
+        windows = map_reduce.rank_windows(self.outline, self._windows, criterio_config)
+        total = len(self._windows)
+        per_round = max(1, settings.MAP_REDUCE_WINDOWS_PER_ROUND)
+        
+        async def map_window(window):
+            async with self._map_semaphore:
+                with span("llm.map", window=window.index):
+                    response = await self._generate_cached(
+                        prompt, map_reduce.MAP_SYSTEM_PROMPT, map_reduce.window_prefix(window, total)
+                    )
+            return map_reduce.parse_local_verdict(window, response)
+        
+        locales, errors, mapped = [], [], 0
+        while mapped < len(windows) and not map_reduce.settled(locales):
+            batch = windows[mapped:mapped + per_round]
+            mapped += len(batch)
+            results = await asyncio.gather(*(map_window(w) for w in batch), return_exceptions=True)
+            locales.extend(r for r in results if isinstance(r, map_reduce.LocalVerdict))
+            errors.extend(r for r in results if not isinstance(r, map_reduce.LocalVerdict))
+        sections = self.outline.sections
+        self.prompt_locations[criterio_config.id] = list(dict.fromkeys(
+            sections[i].location for window in windows[:mapped] for i in window.section_indices
+        ))
+        if not locales:
+            raise errors[0]
+        if mapped < len(windows):
+            logger.info(f"Criterio {criterio_config.id}: settled after {mapped} of {len(windows)} relevant windows",
+                        extra={"run_id": self.run_id})
+        locales.sort(key=lambda v: v.window)
+        
+        estado, justificacion = map_reduce.reduce_verdicts(locales)
+        if settings.MAP_REDUCE_REDUCER == "llm" and len(locales) > 1:
+            try:
+                with span("llm.reduce"):
+                    response = await self.llm.generate_json(
+                        map_reduce.build_reduce_prompt(criterio_config, locales, total),
+                        system_prompt=SYSTEM_PROMPT
+                    )
+                estado, justificacion = map_reduce.reduced_response(response, (estado, justificacion))
+            except Exception as e:
+                logger.warning(f"LLM reduce failed for {criterio_config.id}, using deterministic: {e}",
+                               extra={"run_id": self.run_id})
+        
+        return estado, justificacion, map_reduce.merge_evidence(locales, evidencia_found)
+    
+    @staticmethod
+    def _puntos(estado: str, peso: int) -> float:
+        """Points for a criterio verdict"""
+        if estado == "CUMPLE":
+            return peso
+        if estado == "PARCIAL":
+            return peso * 0.5
+        # NO scores 0; NA scores 0 and is excluded from the denominator
+        return 0
+    
+    def _build_document_prefix(self) -> str:
+        """Build the document block shared by every criterio prompt (cacheable)"""
+        if self._document_prefix is None:
+            sections_text = "\n\n".join([
+                f"[{s.location}] {s.title}\n{s.content[:500]}"
+                for s in self.outline.sections[:PREFIX_SECTIONS]
+            ])
+            self._document_prefix = f"""DOCUMENTO (primeras secciones):
+{sections_text}"""
+        return self._document_prefix
+    
+    def _build_criterio_prompt(self, criterio_config: Criterio, 
                               evidencia_found: List[Dict], user_evidence: str) -> str:
-        """Build prompt for criterio evaluation"""
-        sections_text = "\n\n".join([
-            f"[{s.location}] {s.title}\n{s.content[:500]}"
-            for s in self.outline.sections[:10]
-        ])
-        
+        """Build per-criterio suffix (goes after the document prefix)"""
         evidencia_text = "\n".join([
             f"- {e['location']}: {e['snippet']}"
             for e in evidencia_found
@@ -180,27 +373,12 @@ class DocumentEvaluator:
         
         return f"""Evalúa el siguiente criterio del documento:
 
-CRITERIO: {criterio_config['nombre']}
-DESCRIPCIÓN: {criterio_config['descripcion']}
-EVIDENCIA REQUERIDA: {', '.join(criterio_config.get('evidencia_requerida', []))}
-
-DOCUMENTO (primeras secciones):
-{sections_text}
+CRITERIO: {criterio_config.nombre}
+DESCRIPCIÓN: {criterio_config.descripcion}
+EVIDENCIA REQUERIDA: {', '.join(criterio_config.evidencia_requerida)}
 
 EVIDENCIA ENCONTRADA:
-{evidencia_text}{user_text}
-
-REGLAS ANTI-ALUCINACIÓN:
-- Solo afirmar que existe si hay evidencia con location + snippet
-- Si no hay evidencia, estado = NO
-- NA solo si el criterio genuinamente no aplica (con justificación)
-- No inferir ni inventar contenido
-
-Responde en JSON:
-{{
-  "estado": "CUMPLE|PARCIAL|NO|NA",
-  "justificacion": "Explicación detallada con referencias a evidencia o 'No se encontró'"
-}}"""
+{evidencia_text}{user_text}"""
     
     def calculate_score(self, criterios: List[CriterioEvaluacion]) -> Tuple[float, float]:
         """Calculate base score (NA excludes denominator)"""
@@ -224,7 +402,7 @@ Responde en JSON:
         penalties = []
         score = base_score
         
-        penalizaciones_config = RUBRICA.get("penalizaciones_tipicas", {})
+        penalizaciones_config = self.rubrica.penalizaciones
         
         # Penalty: critical evidence missing
         for c in criterios:
@@ -372,9 +550,9 @@ Responde en JSON:
         bloqueantes = [h for h in hallazgos if h.severidad == "bloqueante"]
         
         # Decision logic
-        if score >= 85 and len(bloqueantes) == 0:
+        if score >= self.rubrica.umbral_aprobado and len(bloqueantes) == 0:
             return "APROBADO"
-        elif score >= 70:
+        elif score >= self.rubrica.umbral_correccion:
             return "REQUIERE_CORRECCION"
         else:
             return "RECHAZADO"
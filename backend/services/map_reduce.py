@@ -0,0 +1,205 @@
+"""
+Map-reduce evaluation for large documents
+The outline is split into token-bounded windows. Each criterio is assessed
+per relevant window in parallel (map), yielding a local verdict and cited
+evidence; the local verdicts are then merged into one verdict (reduce),
+either deterministically or by one more LLM call. Relevant windows are
+mapped in rounds, best keyword matches first, until the criterio is settled
+or every relevant window has been seen.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from domain.models import DocumentOutline
+from services.rubric_registry import Criterio
+
+# Rough token estimate; no tokenizer is shared across providers
+CHARS_PER_TOKEN = 4
+
+ESTADOS = ("CUMPLE", "PARCIAL", "NO", "NA")
+# Reduce order: one window meeting the criterio is enough for the document,
+# since every other window only sees part of it
+_RANK = {"CUMPLE": 3, "PARCIAL": 2, "NO": 1}
+
+MAP_SYSTEM_PROMPT = """Eres un revisor de entregables técnicos que evalúa UNA VENTANA de un documento extenso contra un criterio de una rúbrica gubernamental. Otras ventanas se evalúan por separado.
+
+REGLAS ANTI-ALUCINACIÓN:
+- Solo afirmar que existe si hay evidencia en esta ventana con location + snippet textual
+- Si la ventana no contiene evidencia, estado = NO
+- NA solo si el criterio genuinamente no aplica al documento (con justificación)
+- No inferir ni inventar contenido
+
+Responde en JSON:
+{
+  "estado": "CUMPLE|PARCIAL|NO|NA",
+  "justificacion": "Explicación breve basada en esta ventana",
+  "evidencia": [{"location": "[Section X] tal como aparece", "snippet": "texto copiado de la ventana"}]
+}"""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+@dataclass
+class Window:
+    index: int
+    text: str
+    section_indices: Tuple[int, ...]
+    locations: Tuple[str, ...]
+    text_lower: str = field(default="", repr=False)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+
+@dataclass
+class LocalVerdict:
+    window: int
+    estado: str
+    justificacion: str
+    evidencia: List[Dict[str, str]]
+
+
+def document_tokens(outline: DocumentOutline) -> int:
+    return estimate_tokens(outline.full_text)
+
+
+def _blocks(outline: DocumentOutline, max_chars: int):
+    """(section index, location, rendered text) per section; oversized sections are split"""
+    for i, section in enumerate(outline.sections):
+        content = section.content
+        if len(content) <= max_chars:
+            yield i, section.location, f"[{section.location}] {section.title}\n{content}"
+            continue
+        parts = [content[start:start + max_chars] for start in range(0, len(content), max_chars)]
+        for n, part in enumerate(parts, 1):
+            location = f"{section.location} (parte {n}/{len(parts)})"
+            yield i, location, f"[{location}] {section.title}\n{part}"
+
+
+def build_windows(outline: DocumentOutline, window_tokens: int) -> List[Window]:
+    """Pack consecutive sections into windows of at most `window_tokens` (estimated)"""
+    max_chars = max(window_tokens * CHARS_PER_TOKEN, 1)
+    windows: List[Window] = []
+    texts: List[str] = []
+    indices: List[int] = []
+    locations: List[str] = []
+    size = 0
+
+    def flush():
+        if texts:
+            text = "\n\n".join(texts)
+            windows.append(Window(len(windows), text, tuple(dict.fromkeys(indices)),
+                                  tuple(locations), text.lower()))
+
+    for index, location, text in _blocks(outline, max_chars):
+        if texts and size + len(text) + 2 > max_chars:
+            flush()
+            texts, indices, locations, size = [], [], [], 0
+        texts.append(text)
+        indices.append(index)
+        locations.append(location)
+        size += len(text) + 2
+    flush()
+    return windows
+
+
+def rank_windows(outline: DocumentOutline, windows: Sequence[Window], criterio: Criterio) -> List[Window]:
+    """
+    Windows worth mapping for a criterio: those containing its required keywords,
+    most keywords first (all windows, in order, if none match)
+    """
+    analysis = outline.analysis
+    hit_sections = [
+        {section for section, _ in analysis.section_hits(k)}
+        for k in criterio.evidencia_requerida_lower
+    ]
+    ranked = []
+    for window in windows:
+        sections = set(window.section_indices)
+        hits = sum(1 for keyword_sections in hit_sections if keyword_sections & sections)
+        if hits:
+            ranked.append((-hits, window.index, window))
+    return [w for _, _, w in sorted(ranked)] or list(windows)
+
+
+def settled(locales: Sequence[LocalVerdict]) -> bool:
+    """A window meeting the criterio settles it: no other window can raise the verdict"""
+    return any(v.estado == "CUMPLE" for v in locales)
+
+
+def window_prefix(window: Window, total: int) -> str:
+    return f"DOCUMENTO (ventana {window.index + 1} de {total}):\n{window.text}"
+
+
+def parse_local_verdict(window: Window, response: Dict) -> LocalVerdict:
+    """Normalize a map response; cited evidence not found in the window is dropped"""
+    estado = response.get("estado", "NO")
+    if estado not in ESTADOS:
+        estado = "NO"
+
+    evidencia = []
+    for item in response.get("evidencia") or []:
+        if not isinstance(item, dict):
+            continue
+        location = str(item.get("location", "")).strip("[] ")
+        snippet = str(item.get("snippet", "")).strip(". ")
+        if snippet and snippet.lower() in window.text_lower:
+            evidencia.append({"location": location, "snippet": f"...{snippet}..."})
+    return LocalVerdict(window.index, estado, str(response.get("justificacion", "")), evidencia)
+
+
+def merge_evidence(locales: Sequence[LocalVerdict], existing: Sequence[Dict[str, str]],
+                   limit: int = 10) -> List[Dict[str, str]]:
+    """Cited evidence from supporting windows, without repeating `existing` snippets"""
+    seen = {(e["location"], e["snippet"]) for e in existing}
+    merged = []
+    for local in locales:
+        if local.estado not in ("CUMPLE", "PARCIAL"):
+            continue
+        for item in local.evidencia:
+            key = (item["location"], item["snippet"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(item)
+    return merged[:limit]
+
+
+def reduce_verdicts(locales: Sequence[LocalVerdict]) -> Tuple[str, str]:
+    """Deterministic reduce: the strongest local verdict wins; NA only if every window says NA"""
+    aplicables = [v for v in locales if v.estado != "NA"]
+    if not aplicables:
+        estado = "NA"
+    else:
+        estado = max(aplicables, key=lambda v: _RANK[v.estado]).estado
+    justificacion = " | ".join(
+        f"[ventana {v.window + 1}] {v.justificacion}" for v in locales if v.estado == estado
+    )
+    return estado, justificacion
+
+
+def build_reduce_prompt(criterio: Criterio, locales: Sequence[LocalVerdict], total_windows: int) -> str:
+    """Prompt asking the LLM to merge local verdicts into one"""
+    lines = "\n".join(
+        f"- Ventana {v.window + 1}: {v.estado} — {v.justificacion}"
+        + "".join(f"\n    · {e['location']}: {e['snippet']}" for e in v.evidencia)
+        for v in locales
+    )
+    return f"""Consolida las evaluaciones parciales de un documento extenso ({total_windows} ventanas, {len(locales)} evaluadas) en un único veredicto.
+
+CRITERIO: {criterio.nombre}
+DESCRIPCIÓN: {criterio.descripcion}
+EVIDENCIA REQUERIDA: {', '.join(criterio.evidencia_requerida)}
+
+EVALUACIONES POR VENTANA:
+{lines}"""
+
+
+def reduced_response(response: Dict, fallback: Tuple[str, str]) -> Tuple[str, str]:
+    """(estado, justificacion) from an LLM reduce, or `fallback` if malformed"""
+    estado = response.get("estado")
+    if estado not in ESTADOS:
+        return fallback
+    return estado, str(response.get("justificacion", ""))
@@ -0,0 +1,61 @@
+"""
+Deterministic pre-adjudication
+Settles clear-cut criterios locally so only ambiguous ones reach the LLM:
+- NO when no required keyword appears in the document (the prompt's
+  anti-hallucination rules would force NO anyway)
+- CUMPLE when the required keywords head dedicated sections with content
+Criterios with user-provided evidence always go to the LLM.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from domain.models import CriterioEstado, DocumentOutline
+from services.rubric_registry import Criterio
+
+Veredicto = Tuple[CriterioEstado, str]
+
+
+def _dedicated_section(outline: DocumentOutline, keyword_lower: str,
+                       min_palabras: int) -> Optional[int]:
+    """Index of the first section whose heading contains the keyword and has enough body"""
+    analysis = outline.analysis
+    compact = outline.compact
+
+    def find() -> Optional[int]:
+        for i, heading in enumerate(analysis.headings_lower):
+            if keyword_lower in heading:
+                body_words = len(compact.content(i).split()) - len(compact.titles[i].split())
+                if body_words >= min_palabras:
+                    return i
+        return None
+
+    return analysis.memo(f"dedicated:{keyword_lower}:{min_palabras}", find)
+
+
+def preadjudicate(criterio: Criterio, outline: DocumentOutline,
+                  evidencia: List[Dict[str, str]], user_evidence: str = "") -> Optional[Veredicto]:
+    """(estado, justificacion) when the rules settle the criterio, else None"""
+    reglas = criterio.preadjudicacion
+    if user_evidence or not criterio.evidencia_requerida:
+        return None
+
+    if reglas.no_sin_evidencia and not evidencia:
+        return "NO", ("No se encontró evidencia en el documento para: "
+                      f"{', '.join(criterio.evidencia_requerida)}")
+
+    if reglas.cumple_con_titulos:
+        encontrados = []
+        for keyword, keyword_lower in zip(criterio.evidencia_requerida,
+                                          criterio.evidencia_requerida_lower):
+            index = _dedicated_section(outline, keyword_lower, reglas.min_palabras_seccion)
+            if index is not None:
+                encontrados.append((keyword, index))
+
+        cobertura = len(encontrados) / len(criterio.evidencia_requerida)
+        if cobertura >= reglas.cobertura_minima_titulos:
+            detalle = "; ".join(
+                f"'{keyword}' en {outline.sections[i].location} ({outline.sections[i].title})"
+                for keyword, i in encontrados
+            )
+            return "CUMPLE", f"Secciones dedicadas con evidencia: {detalle}"
+
+    return None
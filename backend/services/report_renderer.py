@@ -0,0 +1,357 @@
+"""
+Report rendering (Markdown, HTML, PDF)
+Output is assembled from lists of parts and joined once. Rendered bytes are
+cached per (run_id, report version, format); the report version is bumped
+by mark_report, so a new submission never hits a stale entry.
+"""
+import html
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bump when any template changes, so clients drop their cached ETags
+RENDERER_VERSION = 1
+
+SEVERIDAD_ICONS = {"bloqueante": "🔴", "mayor": "🟠", "menor": "🟡", "sugerencia": "🔵"}
+
+MEDIA_TYPES = {
+    "md": "text/markdown",
+    "html": "text/html; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+
+@dataclass(frozen=True)
+class ReportContext:
+    filename: str
+    doc_type: str
+    created_at: datetime
+    report: Dict[str, Any]
+
+    @property
+    def fecha(self) -> str:
+        return self.created_at.strftime('%Y-%m-%d %H:%M')
+
+    @property
+    def active_fail_fast(self) -> List[Dict[str, Any]]:
+        return [ff for ff in self.report.get('fail_fast', []) if ff['active']]
+
+    @property
+    def hallazgos(self) -> List[Dict[str, Any]]:
+        return self.report.get('hallazgos', [])
+
+
+# ---------------------------------------------------------------- Markdown
+
+def render_markdown(ctx: ReportContext) -> str:
+    report = ctx.report
+    potencial = report['score_potencial']
+    parts = [
+        "# Rhino AI - Reporte de Evaluación\n\n",
+        f"**Documento:** {ctx.filename}  \n",
+        f"**Tipo:** {ctx.doc_type}  \n",
+        f"**Fecha:** {ctx.fecha}  \n\n",
+        "---\n\n## Resultado\n\n",
+        f"**Score:** {report['score']:.2f}/100  \n",
+        f"**Decisión:** {report['decision']}  \n\n",
+        "### Score Potencial\n",
+        f"- Actual: {potencial['actual']}\n",
+        f"- Si corrige P0: {potencial['si_corrige_p0']}\n",
+        f"- Si corrige P0+P1: {potencial['si_corrige_p0_p1']}\n",
+        f"- Si corrige todo: {potencial['si_corrige_todo']}\n\n",
+        "---\n\n## Fail-Fast\n\n",
+    ]
+
+    for ff in ctx.active_fail_fast:
+        parts += [
+            f"### ⛔ {ff['name']}\n",
+            f"**Evidencia:** {ff['evidencia']}\n\n",
+            f"{ff['explicacion']}\n\n",
+        ]
+
+    parts.append("\n---\n\n## Hallazgos\n\n")
+
+    for h in ctx.hallazgos:
+        parts += [
+            f"### {SEVERIDAD_ICONS[h['severidad']]} [{h['prioridad']}] {h['titulo']}\n\n",
+            f"**Severidad:** {h['severidad']}  \n",
+            f"**Evidencia:** {h['evidencia_detalle']}  \n\n",
+            f"**Recomendación:** {h['recomendacion']}\n\n",
+            f"**Qué agregar:** {h['que_agregar']}\n\n",
+            f"**Dónde:** {h['donde_insertar']}\n\n",
+            f"**Ejemplo:**\n```\n{h['ejemplo_texto']}\n```\n\n",
+            f"**Impacto estimado:** +{h['impacto_estimado']:.1f} puntos\n\n",
+            "---\n\n",
+        ]
+
+    return "".join(parts)
+
+
+# ---------------------------------------------------------------- HTML
+
+HTML_STYLE = (
+    "body{font-family:system-ui,sans-serif;max-width:860px;margin:2rem auto;color:#222}"
+    "h3{margin-bottom:.3rem}pre{background:#f5f5f5;padding:.6rem;white-space:pre-wrap}"
+    ".meta td{padding:0 1rem 0 0}.bloqueante{color:#b00}.mayor{color:#c60}"
+    ".menor{color:#a80}.sugerencia{color:#06b}"
+)
+
+
+def render_html(ctx: ReportContext) -> str:
+    e = html.escape
+    report = ctx.report
+    potencial = report['score_potencial']
+    parts = [
+        "<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">",
+        f"<title>Reporte - {e(ctx.filename)}</title><style>{HTML_STYLE}</style></head><body>",
+        "<h1>Rhino AI - Reporte de Evaluación</h1><table class=\"meta\">",
+        f"<tr><td><b>Documento</b></td><td>{e(ctx.filename)}</td></tr>",
+        f"<tr><td><b>Tipo</b></td><td>{e(str(ctx.doc_type))}</td></tr>",
+        f"<tr><td><b>Fecha</b></td><td>{ctx.fecha}</td></tr></table><hr>",
+        "<h2>Resultado</h2>",
+        f"<p><b>Score:</b> {report['score']:.2f}/100<br>",
+        f"<b>Decisión:</b> {e(report['decision'])}</p>",
+        "<h3>Score Potencial</h3><ul>",
+        f"<li>Actual: {potencial['actual']}</li>",
+        f"<li>Si corrige P0: {potencial['si_corrige_p0']}</li>",
+        f"<li>Si corrige P0+P1: {potencial['si_corrige_p0_p1']}</li>",
+        f"<li>Si corrige todo: {potencial['si_corrige_todo']}</li></ul><hr>",
+        "<h2>Fail-Fast</h2>",
+    ]
+
+    for ff in ctx.active_fail_fast:
+        parts += [
+            f"<h3>⛔ {e(ff['name'])}</h3>",
+            f"<p><b>Evidencia:</b> {e(ff['evidencia'])}</p>",
+            f"<p>{e(ff['explicacion'])}</p>",
+        ]
+
+    parts.append("<hr><h2>Hallazgos</h2>")
+
+    for h in ctx.hallazgos:
+        severidad = h['severidad']
+        parts += [
+            f"<section class=\"{e(severidad)}\">",
+            f"<h3>{SEVERIDAD_ICONS[severidad]} [{e(h['prioridad'])}] {e(h['titulo'])}</h3>",
+            f"<p><b>Severidad:</b> {e(severidad)}<br>",
+            f"<b>Evidencia:</b> {e(h['evidencia_detalle'])}</p>",
+            f"<p><b>Recomendación:</b> {e(h['recomendacion'])}</p>",
+            f"<p><b>Qué agregar:</b> {e(h['que_agregar'])}</p>",
+            f"<p><b>Dónde:</b> {e(h['donde_insertar'])}</p>",
+            f"<p><b>Ejemplo:</b></p><pre>{e(h['ejemplo_texto'])}</pre>",
+            f"<p><b>Impacto estimado:</b> +{h['impacto_estimado']:.1f} puntos</p>",
+            "</section><hr>",
+        ]
+
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+# ---------------------------------------------------------------- PDF
+# Minimal PDF 1.4 writer: base-14 Helvetica with WinAnsiEncoding, so no
+# font files or third-party packages are needed.
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+BODY_SIZE = 10
+WRAP_CHARS = 95
+
+# (font size, bold) per line style
+PDF_STYLES = {"title": (16, True), "h2": (13, True), "h3": (11, True), "body": (BODY_SIZE, False)}
+
+
+def _wrap(text: str, width: int = WRAP_CHARS) -> List[str]:
+    lines = []
+    for paragraph in str(text).split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            while len(word) > width:
+                if line:
+                    lines.append(line)
+                    line = ""
+                lines.append(word[:width])
+                word = word[width:]
+            candidate = f"{line} {word}" if line else word
+            if len(candidate) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _pdf_lines(ctx: ReportContext) -> List[Tuple[str, str]]:
+    """(style, text) lines of the report"""
+    report = ctx.report
+    potencial = report['score_potencial']
+    lines = [
+        ("title", "Rhino AI - Reporte de Evaluación"),
+        ("body", f"Documento: {ctx.filename}"),
+        ("body", f"Tipo: {ctx.doc_type}"),
+        ("body", f"Fecha: {ctx.fecha}"),
+        ("body", ""),
+        ("h2", "Resultado"),
+        ("body", f"Score: {report['score']:.2f}/100"),
+        ("body", f"Decisión: {report['decision']}"),
+        ("h3", "Score Potencial"),
+        ("body", f"- Actual: {potencial['actual']}"),
+        ("body", f"- Si corrige P0: {potencial['si_corrige_p0']}"),
+        ("body", f"- Si corrige P0+P1: {potencial['si_corrige_p0_p1']}"),
+        ("body", f"- Si corrige todo: {potencial['si_corrige_todo']}"),
+        ("body", ""),
+        ("h2", "Fail-Fast"),
+    ]
+
+    for ff in ctx.active_fail_fast:
+        lines.append(("h3", f"FAIL-FAST: {ff['name']}"))
+        lines += [("body", t) for t in _wrap(f"Evidencia: {ff['evidencia']}")]
+        lines += [("body", t) for t in _wrap(ff['explicacion'])]
+
+    lines += [("body", ""), ("h2", "Hallazgos")]
+
+    for h in ctx.hallazgos:
+        lines.append(("h3", f"[{h['prioridad']}] {h['titulo']}"))
+        for label, value in (
+            ("Severidad", h['severidad']),
+            ("Evidencia", h['evidencia_detalle']),
+            ("Recomendación", h['recomendacion']),
+            ("Qué agregar", h['que_agregar']),
+            ("Dónde", h['donde_insertar']),
+            ("Ejemplo", h['ejemplo_texto']),
+            ("Impacto estimado", f"+{h['impacto_estimado']:.1f} puntos"),
+        ):
+            lines += [("body", t) for t in _wrap(f"{label}: {value}")]
+        lines.append(("body", ""))
+
+    return lines
+
+
+def _pdf_text(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _pdf_pages(lines: List[Tuple[str, str]]) -> List[bytes]:
+    pages, ops = [], []
+    y = PAGE_HEIGHT - MARGIN
+    for style, text in lines:
+        size, bold = PDF_STYLES[style]
+        leading = size * 1.4 + (6 if style != "body" else 0)
+        if y - leading < MARGIN:
+            pages.append(b"".join(ops))
+            ops, y = [], PAGE_HEIGHT - MARGIN
+        y -= leading
+        if text:
+            font = b"/F2" if bold else b"/F1"
+            ops.append(b"BT %s %d Tf %d %.1f Td (%s) Tj ET\n" % (
+                font, size, MARGIN, y, _pdf_text(text)
+            ))
+    pages.append(b"".join(ops))
+    return pages
+
+
+def render_pdf(ctx: ReportContext) -> bytes:
+    pages = _pdf_pages(_pdf_lines(ctx))
+    # Object ids: 1 catalog, 2 pages, 3-4 fonts, then (page, content) pairs
+    first_page = 5
+    page_ids = [first_page + 2 * i for i in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % pid for pid in page_ids), len(pages)
+        ),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    for page_id, content in zip(page_ids, pages):
+        stream = zlib.compress(content)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>" % (
+                PAGE_WIDTH, PAGE_HEIGHT, page_id + 1
+            )
+        )
+        objects.append(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+
+    out = [b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"]
+    offsets = []
+    position = len(out[0])
+    for number, body in enumerate(objects, start=1):
+        chunk = b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        offsets.append(position)
+        out.append(chunk)
+        position += len(chunk)
+
+    xref = [b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)]
+    xref += [b"%010d 00000 n \n" % offset for offset in offsets]
+    out += xref
+    out.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, position
+    ))
+    return b"".join(out)
+
+
+RENDERERS = {
+    "md": lambda ctx: render_markdown(ctx).encode("utf-8"),
+    "html": lambda ctx: render_html(ctx).encode("utf-8"),
+    "pdf": render_pdf,
+}
+
+
+def render(ctx: ReportContext, fmt: str) -> bytes:
+    return RENDERERS[fmt](ctx)
+
+
+# ---------------------------------------------------------------- Cache
+
+def report_etag(run_id: str, version: int, fmt: str) -> str:
+    return f'"{run_id}-v{version}-{fmt}-r{RENDERER_VERSION}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in [c[2:] if c.startswith("W/") else c for c in candidates]
+
+
+class ReportCache:
+    """Small LRU of rendered reports keyed by (run_id, version, format)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int, str], bytes]" = OrderedDict()
+
+    def get(self, run_id: str, version: int, fmt: str) -> Optional[bytes]:
+        key = (run_id, version, fmt)
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, run_id: str, version: int, fmt: str, body: bytes) -> None:
+        with self._lock:
+            self._entries[(run_id, version, fmt)] = body
+            self._entries.move_to_end((run_id, version, fmt))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, run_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == run_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+report_cache = ReportCache()
@@ -0,0 +1,209 @@
+"""
+Run retention
+Runs older than RETENTION_DAYS are archived to gzip-compressed JSON Lines
+and then pruned, with their questions, findings, artifacts and uploaded
+file, in bounded batches so the background pass never holds long locks.
+Each pass also garbage-collects upload blobs no run references any more.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from storage import partitions
+from storage.artifacts import decode_artifact
+from storage.blob_store import BlobStore, blob_store
+from storage.database import Finding, Question, Run, RunArtifact, RunFingerprint, RunLshBucket
+from utils.config import settings
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionStats:
+    runs_archived: int = 0
+    files_removed: int = 0
+    blobs_removed: int = 0
+    partitions_dropped: int = 0
+    archive_path: Optional[str] = None
+
+
+def _archive_record(run: Dict[str, Any], questions: List[Dict[str, Any]],
+                    artifacts: List[RunArtifact]) -> Dict[str, Any]:
+    record = {"run": run, "questions": questions}
+    for artifact in artifacts:
+        if artifact.kind == "outline":
+            record["outline"] = decode_artifact(artifact)
+        elif artifact.kind == "report":
+            record["report_version"] = artifact.version
+    return record
+
+
+def _append_archive(path: str, records: List[Dict[str, Any]]) -> None:
+    # Each batch is its own gzip member; gzip readers concatenate them
+    lines = b"".join(
+        json.dumps(r, ensure_ascii=False, default=str).encode("utf-8") + b"\n" for r in records
+    )
+    with open(path, "ab") as f:
+        f.write(gzip.compress(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _remove_upload(run_id: str, filename: str) -> bool:
+    # Uploads stored before the blob store were named {run_id}_{filename}
+    try:
+        os.remove(os.path.join(settings.UPLOAD_DIR, f"{run_id}_{filename}"))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+async def _prune_batch(session: AsyncSession, cutoff: datetime, archive_path: str,
+                       batch_size: int) -> List[Dict[str, Any]]:
+    result = await session.execute(
+        select(Run.__table__)
+        .where(Run.created_at < cutoff)
+        .order_by(Run.created_at, Run.id)
+        .limit(batch_size)
+    )
+    runs = [dict(row._mapping) for row in result]
+    if not runs:
+        return []
+    run_ids = [r["id"] for r in runs]
+
+    question_rows = await session.execute(
+        select(Question.__table__).where(Question.run_id.in_(run_ids)).order_by(Question.id)
+    )
+    questions: Dict[str, List[Dict[str, Any]]] = {}
+    for row in question_rows:
+        questions.setdefault(row.run_id, []).append(dict(row._mapping))
+
+    artifact_rows = await session.scalars(
+        select(RunArtifact).where(RunArtifact.run_id.in_(run_ids))
+    )
+    artifacts: Dict[str, List[RunArtifact]] = {}
+    for artifact in artifact_rows:
+        artifacts.setdefault(artifact.run_id, []).append(artifact)
+
+    records = [
+        _archive_record(run, questions.get(run["id"], []), artifacts.get(run["id"], []))
+        for run in runs
+    ]
+    # Archive is durable on disk before anything is deleted
+    await asyncio.to_thread(_append_archive, archive_path, records)
+
+    await session.execute(delete(Question).where(Question.run_id.in_(run_ids)))
+    await session.execute(delete(Finding).where(Finding.run_id.in_(run_ids)))
+    await session.execute(delete(RunArtifact).where(RunArtifact.run_id.in_(run_ids)))
+    await session.execute(delete(RunFingerprint).where(RunFingerprint.run_id.in_(run_ids)))
+    await session.execute(delete(RunLshBucket).where(RunLshBucket.run_id.in_(run_ids)))
+    await session.execute(delete(Run).where(Run.id.in_(run_ids)))
+    await session.commit()
+    return runs
+
+
+async def _maintain_partitions(session: AsyncSession, now: datetime,
+                               cutoff: Optional[datetime]) -> List[str]:
+    """Create upcoming monthly partitions and drop fully expired ones"""
+    def maintain(sync_session):
+        conn = sync_session.connection()
+        if not partitions.is_partitioned(conn):
+            return []
+        partitions.ensure_upcoming_partitions(conn, now)
+        return partitions.drop_partitions_before(conn, cutoff) if cutoff else []
+
+    dropped = await session.run_sync(maintain)
+    await session.commit()
+    return dropped
+
+
+async def collect_unreferenced_blobs(session: AsyncSession, store: BlobStore,
+                                     grace_seconds: float, chunk_size: int = 500) -> List[str]:
+    """Delete blobs that no run references (after the grace period)"""
+    async def referenced(chunk):
+        result = await session.execute(
+            select(Run.upload_sha256).where(Run.upload_sha256.in_([c[0] for c in chunk])).distinct()
+        )
+        return set(result.scalars())
+
+    candidates = await asyncio.to_thread(lambda: list(store.iter_blobs()))
+    deleted = []
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start + chunk_size]
+        refs = await referenced(chunk)
+        removed = await asyncio.to_thread(store.collect_garbage, refs, grace_seconds, chunk)
+        deleted += removed
+        # Re-uploaded during the pass: check their references again, with their new mtime
+        settled = refs.union(removed)
+        skipped = [c for c in chunk if c[0] not in settled]
+        touched = await asyncio.to_thread(store.touched_since, skipped)
+        if touched:
+            refs = await referenced(touched)
+            deleted += await asyncio.to_thread(store.collect_garbage, refs, grace_seconds, touched)
+    return deleted
+
+
+async def prune_expired_runs(session_maker: async_sessionmaker,
+                             now: Optional[datetime] = None) -> RetentionStats:
+    """One retention pass; returns what was archived and removed"""
+    stats = RetentionStats()
+    now = now or datetime.utcnow()
+    cutoff = None
+
+    async with session_maker() as session:
+        if settings.RETENTION_DAYS > 0:
+            cutoff = now - timedelta(days=settings.RETENTION_DAYS)
+            os.makedirs(settings.RETENTION_ARCHIVE_DIR, exist_ok=True)
+            archive_path = os.path.join(
+                settings.RETENTION_ARCHIVE_DIR,
+                f"runs-before-{cutoff:%Y%m%d}-{now:%Y%m%dT%H%M%S}.jsonl.gz"
+            )
+            while True:
+                runs = await _prune_batch(session, cutoff, archive_path,
+                                          settings.RETENTION_BATCH_SIZE)
+                if not runs:
+                    break
+                stats.runs_archived += len(runs)
+                stats.archive_path = archive_path
+                for run in runs:
+                    if not run["upload_sha256"] and await asyncio.to_thread(
+                        _remove_upload, run["id"], run["filename"]
+                    ):
+                        stats.files_removed += 1
+                # Let request handlers in between batches
+                await asyncio.sleep(0)
+
+        stats.blobs_removed = len(await collect_unreferenced_blobs(
+            session, blob_store, settings.BLOB_GC_GRACE_SECONDS
+        ))
+
+        if session.bind.dialect.name == "postgresql":
+            stats.partitions_dropped = len(await _maintain_partitions(session, now, cutoff))
+
+    metrics.counter("retention.runs_archived").inc(stats.runs_archived)
+    metrics.counter("retention.files_removed").inc(stats.files_removed)
+    metrics.counter("retention.blobs_removed").inc(stats.blobs_removed)
+    if stats.runs_archived:
+        logger.info(f"Retention archived {stats.runs_archived} runs to {stats.archive_path}")
+    return stats
+
+
+async def retention_loop(session_maker: async_sessionmaker) -> None:
+    """Background task: one pass every RETENTION_INTERVAL_SECONDS"""
+    while True:
+        try:
+            await prune_expired_runs(session_maker)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Retention pass failed: {e}")
+        await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
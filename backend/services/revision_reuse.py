@@ -0,0 +1,181 @@
+"""
+Verdict reuse across document revisions
+Every run stores a MinHash fingerprint of its outline, per-section content
+hashes and its preliminary criterio verdicts. A new upload is matched
+against prior runs of the same filename lineage or sharing an LSH bucket;
+for the closest one, criterios whose evidence is identical and whose
+evidence and prompt sections are all unchanged keep their previous verdict
+instead of being re-evaluated.
+"""
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain.models import CriterioEvaluacion, DocumentOutline
+from storage.database import Run, RunFingerprint, RunLshBucket
+from utils import minhash
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Trailing version markers: "_v2", " v1.3", "-rev4", " final", " (1)"...
+_VERSION_SUFFIX = re.compile(
+    r"([\s_\-.]*(v|ver|version|rev|r)[\s_\-.]?\d+([._]\d+)*"
+    r"|[\s_\-.]*(final|draft|borrador|definitivo|copia)"
+    r"|\s*\(\d+\))$"
+)
+_SEPARATORS = re.compile(r"[\s_\-.]+")
+
+
+def lineage_key(filename: str) -> str:
+    """Filename stem without version markers ("Plan_Migracion v2.docx" -> "plan_migracion")"""
+    stem = os.path.splitext(os.path.basename(filename))[0].lower()
+    previous = None
+    while stem != previous:
+        previous = stem
+        stem = _VERSION_SUFFIX.sub("", stem)
+    return _SEPARATORS.sub("_", stem).strip("_")
+
+
+@dataclass
+class DocumentFingerprint:
+    lineage: str
+    signature: np.ndarray
+    bands: List[str]
+    section_hashes: Dict[str, str]
+    empty: bool = False
+
+    @classmethod
+    def from_outline(cls, outline: DocumentOutline, filename: str) -> "DocumentFingerprint":
+        shingles = minhash.shingles(outline.full_text)
+        signature = minhash.signature(shingles)
+
+        contents: Dict[str, List[str]] = {}
+        for section in outline.sections:
+            contents.setdefault(section.location, []).append(section.content)
+        section_hashes = {
+            location: hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+            for location, parts in contents.items()
+        }
+        return cls(
+            lineage=lineage_key(filename),
+            signature=signature,
+            bands=minhash.band_hashes(signature),
+            section_hashes=section_hashes,
+            empty=not shingles,
+        )
+
+
+@dataclass
+class PriorRevision:
+    run_id: str
+    similarity: float
+    verdicts: Dict[str, Dict]
+    unchanged_locations: FrozenSet[str]
+
+    def lookup(self, criterio_id: str, evidencia: List[Dict[str, str]]) -> Optional[Dict]:
+        """
+        Prior verdict if this criterio's keyword evidence is the same and every
+        section it rested on (keyword hits, LLM citations, sections shown in the
+        prompt) is unchanged
+        """
+        prior = self.verdicts.get(criterio_id)
+        # No "contexto": decided by rules, or stored before prompt sections were tracked
+        if prior is None or "contexto" not in prior:
+            return None
+        # LLM-cited items carry no "keyword"; they are checked by location only
+        if [e for e in prior["evidencia"] if "keyword" in e] != evidencia:
+            return None
+        locations = {e["location"] for e in prior["evidencia"]}.union(prior["contexto"])
+        if not locations <= self.unchanged_locations:
+            return None
+        return prior
+
+
+async def find_prior_revision(session: AsyncSession, fingerprint: DocumentFingerprint,
+                              doc_type: str, rubrica_version: str) -> Optional[PriorRevision]:
+    """Closest earlier run with the same type and rubric whose verdicts can be reused"""
+    if fingerprint.empty:
+        return None
+
+    same_bucket = select(RunLshBucket.run_id).where(or_(*[
+        and_(RunLshBucket.band == band, RunLshBucket.bucket == bucket)
+        for band, bucket in enumerate(fingerprint.bands)
+    ]))
+    result = await session.execute(
+        select(RunFingerprint.run_id, RunFingerprint.lineage, RunFingerprint.signature)
+        .join(Run, Run.id == RunFingerprint.run_id)
+        .where(
+            RunFingerprint.doc_type == doc_type,
+            RunFingerprint.rubrica_version == rubrica_version,
+            or_(RunFingerprint.lineage == fingerprint.lineage,
+                RunFingerprint.run_id.in_(same_bucket)),
+        )
+        .order_by(RunFingerprint.created_at.desc())
+        .limit(settings.REVISION_CANDIDATES_MAX)
+    )
+
+    best = None
+    for row in result:
+        score = minhash.similarity(fingerprint.signature, minhash.from_bytes(row.signature))
+        threshold = (settings.REVISION_LINEAGE_MIN_SIMILARITY
+                     if row.lineage == fingerprint.lineage else settings.REVISION_MIN_SIMILARITY)
+        # Newest first, so ties keep the latest revision
+        if score >= threshold and (best is None or score > best[1]):
+            best = (row.run_id, score)
+    if best is None:
+        return None
+
+    run_id, score = best
+    prior = (await session.execute(
+        select(RunFingerprint.section_hashes, RunFingerprint.verdicts_json)
+        .where(RunFingerprint.run_id == run_id)
+    )).one()
+    unchanged = frozenset(
+        location for location, digest in fingerprint.section_hashes.items()
+        if prior.section_hashes.get(location) == digest
+    )
+    return PriorRevision(
+        run_id=run_id,
+        similarity=score,
+        verdicts={v["criterio_id"]: v for v in prior.verdicts_json or []},
+        unchanged_locations=unchanged,
+    )
+
+
+def save_fingerprint(session: AsyncSession, run_id: str, fingerprint: DocumentFingerprint,
+                     doc_type: str, rubrica_version: str, verdicts: List[CriterioEvaluacion],
+                     prompt_locations: Dict[str, List[str]],
+                     parent_run_id: Optional[str] = None) -> None:
+    """Stage the run's fingerprint, LSH buckets and reusable verdicts"""
+    session.add(RunFingerprint(
+        run_id=run_id,
+        lineage=fingerprint.lineage,
+        doc_type=doc_type,
+        rubrica_version=rubrica_version,
+        signature=minhash.to_bytes(fingerprint.signature),
+        section_hashes=fingerprint.section_hashes,
+        verdicts_json=[
+            _verdict_json(v, prompt_locations.get(v.criterio_id)) for v in verdicts
+        ],
+        parent_run_id=parent_run_id,
+    ))
+    if not fingerprint.empty:
+        session.add_all(
+            RunLshBucket(band=band, bucket=bucket, run_id=run_id)
+            for band, bucket in enumerate(fingerprint.bands)
+        )
+
+
+def _verdict_json(verdict: CriterioEvaluacion, contexto: Optional[List[str]]) -> Dict:
+    data = verdict.model_dump(include={"criterio_id", "estado", "justificacion", "evidencia"})
+    if contexto is not None:
+        data["contexto"] = contexto
+    return data
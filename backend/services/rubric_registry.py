@@ -0,0 +1,421 @@
+"""
+Rubric registry
+Parses and validates rubrica_government.json and document_type_detection_rhino.json
+once into indexed, immutable structures. Reloads atomically when the files change.
+"""
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = Path(__file__).parent.parent / "config"
+RUBRICA_PATH = CONFIG_DIR / "rubrica_government.json"
+DETECTION_CONFIG_PATH = CONFIG_DIR / "document_type_detection_rhino.json"
+# Archived rubric versions: rubricas/rubrica_government_<version>.json
+RUBRICA_ARCHIVE_DIR = CONFIG_DIR / "rubricas"
+
+SEVERIDADES = ("bloqueante", "mayor", "menor", "sugerencia")
+
+
+class RubricValidationError(ValueError):
+    """Raised when a rubric or detection config is malformed"""
+
+
+# ---------------------------------------------------------------------------
+# Rubrica
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class ReglasPreadjudicacion:
+    """Rules that settle a criterio without the LLM (see services.preadjudication)"""
+    # NO when no required keyword appears anywhere in the document
+    no_sin_evidencia: bool = True
+    # CUMPLE when enough required keywords head a dedicated section
+    cumple_con_titulos: bool = True
+    cobertura_minima_titulos: float = 1.0
+    min_palabras_seccion: int = 20
+
+
+@dataclass(frozen=True, slots=True)
+class Criterio:
+    id: str
+    nombre: str
+    descripcion: str
+    peso: int
+    severidad_si_falta: str
+    evidencia_requerida: Tuple[str, ...]
+    evidencia_requerida_lower: Tuple[str, ...]
+    preadjudicacion: ReglasPreadjudicacion = ReglasPreadjudicacion()
+
+
+@dataclass(frozen=True, slots=True)
+class TipoDocumento:
+    code: str
+    nombre: str
+    keywords: Tuple[str, ...]
+    keywords_lower: Tuple[str, ...]
+    criterios: Tuple[Criterio, ...]
+    criterios_by_id: Dict[str, Criterio]
+    peso_total: int
+
+
+@dataclass(frozen=True, slots=True)
+class Rubrica:
+    version: str
+    tipos: Dict[str, TipoDocumento]
+    criterios_by_id: Dict[str, Criterio]
+    penalizaciones: Dict[str, Dict[str, Any]]
+    umbral_aprobado: float
+    umbral_correccion: float
+    raw: Dict[str, Any]
+    preadjudicacion: ReglasPreadjudicacion = ReglasPreadjudicacion()
+
+
+def _require(condition: bool, message: str) -> None:
+    if not condition:
+        raise RubricValidationError(message)
+
+
+def _parse_preadjudicacion(data: Any, base: ReglasPreadjudicacion,
+                           where: str) -> ReglasPreadjudicacion:
+    """Merge a 'preadjudicacion' block over `base`"""
+    if data is None:
+        return base
+    _require(isinstance(data, dict), f"{where}: 'preadjudicacion' debe ser objeto")
+
+    values = {}
+    for key in ("no_sin_evidencia", "cumple_con_titulos"):
+        value = data.get(key, getattr(base, key))
+        _require(isinstance(value, bool), f"{where}: preadjudicacion.{key} debe ser booleano")
+        values[key] = value
+
+    cobertura = data.get("cobertura_minima_titulos", base.cobertura_minima_titulos)
+    _require(isinstance(cobertura, (int, float)) and not isinstance(cobertura, bool)
+             and 0 < cobertura <= 1,
+             f"{where}: preadjudicacion.cobertura_minima_titulos debe estar en (0, 1]")
+
+    min_palabras = data.get("min_palabras_seccion", base.min_palabras_seccion)
+    _require(isinstance(min_palabras, int) and not isinstance(min_palabras, bool)
+             and min_palabras >= 0,
+             f"{where}: preadjudicacion.min_palabras_seccion debe ser entero >= 0")
+
+    return ReglasPreadjudicacion(cobertura_minima_titulos=float(cobertura),
+                                 min_palabras_seccion=min_palabras, **values)
+
+
+def _parse_criterio(data: Dict[str, Any], where: str,
+                    preadjudicacion: ReglasPreadjudicacion = ReglasPreadjudicacion()) -> Criterio:
+    for key in ("id", "nombre", "descripcion", "peso"):
+        _require(key in data, f"{where}: falta '{key}'")
+    where = f"{where} ({data['id']})"
+
+    peso = data["peso"]
+    _require(isinstance(peso, int) and not isinstance(peso, bool) and peso >= 0,
+             f"{where}: 'peso' debe ser entero >= 0")
+
+    severidad = data.get("severidad_si_falta", "menor")
+    _require(severidad in SEVERIDADES, f"{where}: severidad desconocida '{severidad}'")
+
+    evidencia = data.get("evidencia_requerida", [])
+    _require(isinstance(evidencia, list) and all(isinstance(e, str) for e in evidencia),
+             f"{where}: 'evidencia_requerida' debe ser lista de strings")
+
+    return Criterio(
+        id=data["id"],
+        nombre=data["nombre"],
+        descripcion=data["descripcion"],
+        peso=peso,
+        severidad_si_falta=severidad,
+        evidencia_requerida=tuple(evidencia),
+        evidencia_requerida_lower=tuple(e.lower() for e in evidencia),
+        preadjudicacion=_parse_preadjudicacion(data.get("preadjudicacion"), preadjudicacion, where),
+    )
+
+
+def _umbral(umbrales: Dict[str, Any], decision: str) -> float:
+    value = umbrales.get(decision, {}).get("score_minimo")
+    _require(isinstance(value, (int, float)),
+             f"umbrales_decision.{decision}.score_minimo debe ser numérico")
+    return float(value)
+
+
+def parse_rubrica(raw: Dict[str, Any]) -> Rubrica:
+    """Validate and index a rubrica dict"""
+    _require(isinstance(raw.get("tipos_documentos_entregables"), dict),
+             "Falta 'tipos_documentos_entregables'")
+
+    preadjudicacion = _parse_preadjudicacion(raw.get("preadjudicacion"),
+                                             ReglasPreadjudicacion(), "preadjudicacion")
+    tipos = {}
+    criterios_by_id = {}
+    for code, tipo_raw in raw["tipos_documentos_entregables"].items():
+        criterios_raw = tipo_raw.get("criterios")
+        _require(isinstance(criterios_raw, list) and criterios_raw,
+                 f"Tipo {code}: 'criterios' vacío o ausente")
+
+        criterios = tuple(
+            _parse_criterio(c, f"Tipo {code} criterio #{i}", preadjudicacion)
+            for i, c in enumerate(criterios_raw)
+        )
+        by_id = {}
+        for c in criterios:
+            _require(c.id not in criterios_by_id, f"Criterio duplicado: {c.id}")
+            by_id[c.id] = c
+            criterios_by_id[c.id] = c
+
+        keywords = tuple(tipo_raw.get("keywords", []))
+        tipos[code] = TipoDocumento(
+            code=code,
+            nombre=tipo_raw.get("nombre", code),
+            keywords=keywords,
+            keywords_lower=tuple(k.lower() for k in keywords),
+            criterios=criterios,
+            criterios_by_id=by_id,
+            peso_total=sum(c.peso for c in criterios),
+        )
+
+    penalizaciones = raw.get("penalizaciones_tipicas", {})
+    for name, pen in penalizaciones.items():
+        _require(isinstance(pen.get("penalizacion"), (int, float)),
+                 f"penalizaciones_tipicas.{name}.penalizacion debe ser numérico")
+
+    umbrales = raw.get("umbrales_decision", {})
+    umbral_aprobado = _umbral(umbrales, "APROBADO")
+    umbral_correccion = _umbral(umbrales, "REQUIERE_CORRECCION")
+    _require(umbral_correccion <= umbral_aprobado,
+             "umbrales_decision: REQUIERE_CORRECCION debe ser <= APROBADO")
+
+    return Rubrica(
+        version=str(raw.get("version", "")),
+        tipos=tipos,
+        criterios_by_id=criterios_by_id,
+        penalizaciones=penalizaciones,
+        umbral_aprobado=umbral_aprobado,
+        umbral_correccion=umbral_correccion,
+        raw=raw,
+        preadjudicacion=preadjudicacion,
+    )
+
+
+def apply_overrides(rubrica: Rubrica, pesos: Optional[Dict[str, int]] = None,
+                    umbrales_decision: Optional[Dict[str, Dict[str, Any]]] = None,
+                    penalizaciones: Optional[Dict[str, Dict[str, Any]]] = None) -> Rubrica:
+    """
+    New validated Rubrica with proposed weights / thresholds / penalties
+    merged over `rubrica`. Unknown criterio ids raise RubricValidationError.
+    """
+    raw = copy.deepcopy(rubrica.raw)
+
+    unknown = set(pesos or {}) - set(rubrica.criterios_by_id)
+    _require(not unknown, f"Criterios desconocidos: {', '.join(sorted(unknown))}")
+    for tipo in raw["tipos_documentos_entregables"].values():
+        for criterio in tipo["criterios"]:
+            if criterio["id"] in (pesos or {}):
+                criterio["peso"] = pesos[criterio["id"]]
+
+    for key, overrides in (("umbrales_decision", umbrales_decision),
+                           ("penalizaciones_tipicas", penalizaciones)):
+        for name, values in (overrides or {}).items():
+            raw.setdefault(key, {}).setdefault(name, {}).update(values)
+
+    return parse_rubrica(raw)
+
+
+# ---------------------------------------------------------------------------
+# Detection config
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class DetectionType:
+    code: str
+    name: str
+    threshold: float
+    filename_tokens: Tuple[str, ...]
+    # (original, lowercase) pairs: original is kept for evidence strings
+    strong_headings: Tuple[Tuple[str, str], ...]
+    strong_tables: Tuple[Tuple[str, str], ...]
+    strong_keywords: Tuple[Tuple[str, str], ...]
+    structural_patterns: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class DetectionConfig:
+    version: str
+    types: Dict[str, DetectionType]
+    signal_weights: Dict[str, float]
+    filename_token_set: FrozenSet[str]
+    raw: Dict[str, Any]
+
+
+def _pairs(values: Any, where: str) -> Tuple[Tuple[str, str], ...]:
+    _require(isinstance(values, list), f"{where} debe ser lista")
+    return tuple((v, v.lower()) for v in values)
+
+
+def parse_detection_config(raw: Dict[str, Any]) -> DetectionConfig:
+    """Validate and index a detection config dict"""
+    for key in ("type_thresholds", "pseudocode_scoring_0_100", "document_types",
+                "dominancia_estructural", "conflict_resolution",
+                "filename_vs_content_policy", "unknown_handling"):
+        _require(key in raw, f"Detection config: falta '{key}'")
+
+    weights = raw["pseudocode_scoring_0_100"].get("signal_weights", {})
+    for key in ("filename_exact_match", "strong_indicator_heading", "strong_indicator_table",
+                "keyword_density_high", "keyword_density_medium", "structural_pattern"):
+        _require(isinstance(weights.get(key), (int, float)),
+                 f"signal_weights.{key} debe ser numérico")
+
+    thresholds = raw["type_thresholds"]
+    types = {}
+    for code, type_raw in raw["document_types"].items():
+        where = f"document_types.{code}"
+        _require(code in thresholds, f"type_thresholds: falta '{code}'")
+        strong = type_raw.get("strong_indicators", {})
+        types[code] = DetectionType(
+            code=code,
+            name=type_raw.get("name", code),
+            threshold=float(thresholds[code]),
+            filename_tokens=tuple(type_raw.get("filename_tokens", [])),
+            strong_headings=_pairs(strong.get("headings"), f"{where}.strong_indicators.headings"),
+            strong_tables=_pairs(strong.get("tables"), f"{where}.strong_indicators.tables"),
+            strong_keywords=_pairs(strong.get("keywords"), f"{where}.strong_indicators.keywords"),
+            structural_patterns=tuple(type_raw.get("structural_patterns", [])),
+        )
+
+    return DetectionConfig(
+        version=str(raw.get("version", "")),
+        types=types,
+        signal_weights=weights,
+        filename_token_set=frozenset(t for dt in types.values() for t in dt.filename_tokens),
+        raw=raw,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class RegistrySnapshot:
+    rubrica: Rubrica
+    detection: DetectionConfig
+    signature: Tuple[Tuple[int, int], ...]
+
+
+def _file_signature(*paths: Path) -> Tuple[Tuple[int, int], ...]:
+    result = []
+    for path in paths:
+        stat = os.stat(path)
+        result.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(result)
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RubricRegistry:
+    """
+    Holds the current (rubrica, detection) snapshot.
+    Readers grab `current()` once per operation; a reload builds a new
+    snapshot and swaps the reference, so readers never see a mix.
+    """
+
+    def __init__(self, rubrica_path: Path = RUBRICA_PATH,
+                 detection_path: Path = DETECTION_CONFIG_PATH,
+                 reload_interval: Optional[float] = None):
+        self.rubrica_path = Path(rubrica_path)
+        self.detection_path = Path(detection_path)
+        self.reload_interval = (settings.RUBRIC_RELOAD_INTERVAL_SECONDS
+                                if reload_interval is None else reload_interval)
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._failed_signature = None
+        self._snapshot = self._load()
+
+    def _load(self) -> RegistrySnapshot:
+        signature = _file_signature(self.rubrica_path, self.detection_path)
+        return RegistrySnapshot(
+            rubrica=parse_rubrica(_read_json(self.rubrica_path)),
+            detection=parse_detection_config(_read_json(self.detection_path)),
+            signature=signature,
+        )
+
+    def current(self) -> RegistrySnapshot:
+        """Return the current snapshot, reloading first if files changed"""
+        if self.reload_interval > 0 and time.monotonic() - self._last_check >= self.reload_interval:
+            self.reload()
+        return self._snapshot
+
+    def reload(self, force: bool = False) -> bool:
+        """Reload from disk if changed. Invalid files keep the previous snapshot."""
+        with self._lock:
+            self._last_check = time.monotonic()
+            try:
+                signature = _file_signature(self.rubrica_path, self.detection_path)
+            except OSError as e:
+                logger.error(f"Rubric files not readable: {e}")
+                return False
+
+            if not force and signature in (self._snapshot.signature, self._failed_signature):
+                return False
+
+            try:
+                snapshot = self._load()
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                self._failed_signature = signature
+                logger.error(f"Rubric reload rejected, keeping previous version: {e}")
+                return False
+
+            self._snapshot = snapshot
+            self._failed_signature = None
+            logger.info(f"Rubric reloaded", extra={
+                "rubrica_version": snapshot.rubrica.version,
+                "detection_version": snapshot.detection.version
+            })
+            return True
+
+
+registry = RubricRegistry()
+
+
+def get_rubrica() -> Rubrica:
+    return registry.current().rubrica
+
+
+def get_detection_config() -> DetectionConfig:
+    return registry.current().detection
+
+
+@lru_cache(maxsize=16)
+def _load_archived_rubrica(version: str) -> Rubrica:
+    path = RUBRICA_ARCHIVE_DIR / f"rubrica_government_{version}.json"
+    return parse_rubrica(_read_json(path))
+
+
+def get_rubrica_version(version: str) -> Rubrica:
+    """
+    Rubrica for a given version: the live one if it matches, otherwise the
+    archived copy under config/rubricas/. Raises KeyError if unknown.
+    """
+    current = get_rubrica()
+    if current.version == version:
+        return current
+    if not re.fullmatch(r"[A-Za-z0-9._-]+", version):
+        raise KeyError(version)
+    try:
+        return _load_archived_rubrica(version)
+    except FileNotFoundError:
+        raise KeyError(version)
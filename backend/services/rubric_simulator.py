@@ -0,0 +1,104 @@
+"""
+Rubric what-if simulator
+Replays stored verdicts under the live and a proposed rubrica (no LLM)
+and aggregates decision flips and score deltas per doc_type. Only the
+aggregates are kept, so memory does not grow with the history size.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+from services.batch_scoring import BatchScorer, DECISIONS, RunScoringInput
+from services.rubric_registry import Rubrica
+
+
+@dataclass
+class DocTypeImpact:
+    runs: int = 0
+    score_delta_sum: float = 0.0
+    score_delta_min: float = 0.0
+    score_delta_max: float = 0.0
+    transitions: np.ndarray = field(
+        default_factory=lambda: np.zeros((len(DECISIONS), len(DECISIONS)), dtype=np.int64)
+    )
+
+    def add(self, delta: np.ndarray, before: np.ndarray, after: np.ndarray) -> None:
+        if not len(delta):
+            return
+        if self.runs == 0:
+            self.score_delta_min = float(delta.min())
+            self.score_delta_max = float(delta.max())
+        else:
+            self.score_delta_min = min(self.score_delta_min, float(delta.min()))
+            self.score_delta_max = max(self.score_delta_max, float(delta.max()))
+        self.runs += len(delta)
+        self.score_delta_sum += float(delta.sum())
+        np.add.at(self.transitions, (before, after), 1)
+
+    def merge(self, other: "DocTypeImpact") -> None:
+        if not other.runs:
+            return
+        if self.runs == 0:
+            self.score_delta_min = other.score_delta_min
+            self.score_delta_max = other.score_delta_max
+        else:
+            self.score_delta_min = min(self.score_delta_min, other.score_delta_min)
+            self.score_delta_max = max(self.score_delta_max, other.score_delta_max)
+        self.runs += other.runs
+        self.score_delta_sum += other.score_delta_sum
+        self.transitions += other.transitions
+
+    def to_dict(self) -> Dict[str, Any]:
+        flips = {
+            f"{DECISIONS[i]}->{DECISIONS[j]}": int(self.transitions[i, j])
+            for i in range(len(DECISIONS)) for j in range(len(DECISIONS))
+            if i != j and self.transitions[i, j]
+        }
+        return {
+            "runs": self.runs,
+            "decision_flips": sum(flips.values()),
+            "flips": flips,
+            "decisions_before": dict(zip(DECISIONS, self.transitions.sum(axis=1).tolist())),
+            "decisions_after": dict(zip(DECISIONS, self.transitions.sum(axis=0).tolist())),
+            "score_delta": {
+                "mean": round(self.score_delta_sum / self.runs, 2) if self.runs else 0.0,
+                "min": round(self.score_delta_min, 2),
+                "max": round(self.score_delta_max, 2),
+            },
+        }
+
+
+class RubricSimulation:
+    """Accumulates the impact of `proposed` vs `baseline`, one chunk at a time"""
+
+    def __init__(self, baseline: Rubrica, proposed: Rubrica):
+        self.baseline = BatchScorer(baseline)
+        self.proposed = BatchScorer(proposed)
+        self.per_doc_type: Dict[str, DocTypeImpact] = {}
+
+    def add_chunk(self, runs: Iterable[RunScoringInput]) -> None:
+        runs = list(runs)
+        before = self.baseline.score(runs)
+        after = self.proposed.score(runs)
+        delta = after.score - before.score
+        doc_types = np.array(before.doc_types, dtype=object)
+
+        for doc_type in set(before.doc_types):
+            mask = doc_types == doc_type
+            impact = self.per_doc_type.setdefault(doc_type, DocTypeImpact())
+            impact.add(delta[mask], before.decision_codes[mask], after.decision_codes[mask])
+
+    def summary(self) -> Dict[str, Any]:
+        total = DocTypeImpact()
+        for impact in self.per_doc_type.values():
+            total.merge(impact)
+
+        return {
+            "baseline_version": self.baseline.rubrica.version,
+            "total": total.to_dict(),
+            "por_doc_type": {
+                doc_type: impact.to_dict()
+                for doc_type, impact in sorted(self.per_doc_type.items())
+            },
+        }
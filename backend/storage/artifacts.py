@@ -0,0 +1,125 @@
+"""Run artifact storage: compressed outlines and deduplicated reports"""
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from storage.database import Run, RunArtifact
+from utils.json_codec import dumps, json_deserializer
+
+CODEC_ZLIB_JSON = "zlib-json"
+CODEC_ZLIB = "zlib"  # opaque bytes, e.g. pstats dumps
+# The report is the run's evaluation_json; nothing is copied
+CODEC_REF_EVALUATION = "ref:evaluation"
+
+ZLIB_LEVEL = 6
+
+
+def encode_json(value: Any) -> bytes:
+    return dumps(value)
+
+
+def compress_json(value: Union[Any, bytes]) -> RunArtifact:
+    """Build an (unbound) compressed artifact for `value` (or its JSON bytes)"""
+    raw = value if isinstance(value, bytes) else encode_json(value)
+    return RunArtifact(codec=CODEC_ZLIB_JSON, size=len(raw), payload=zlib.compress(raw, ZLIB_LEVEL))
+
+
+def decode_artifact(artifact: RunArtifact) -> Any:
+    if artifact.codec == CODEC_ZLIB_JSON:
+        return json_deserializer(zlib.decompress(artifact.payload))
+    if artifact.codec == CODEC_ZLIB:
+        return zlib.decompress(artifact.payload)
+    raise ValueError(f"Unsupported artifact codec: {artifact.codec}")
+
+
+def save_outline(session: AsyncSession, run_id: str,
+                 outline: Union[Dict[str, Any], bytes]) -> RunArtifact:
+    artifact = compress_json(outline)
+    artifact.run_id = run_id
+    artifact.kind = "outline"
+    session.add(artifact)
+    return artifact
+
+
+async def load_outline(session: AsyncSession, run_id: str) -> Optional[Dict[str, Any]]:
+    """Outline dict from run_artifacts, falling back to the legacy column"""
+    artifact = await session.get(RunArtifact, (run_id, "outline"))
+    if artifact is not None:
+        return decode_artifact(artifact)
+    result = await session.execute(select(Run.outline_json).where(Run.id == run_id))
+    return result.scalar_one_or_none()
+
+
+async def append_trace(session: AsyncSession, run_id: str, trace: Dict[str, Any]) -> RunArtifact:
+    """Add a trace to the run's trace list (one per create / answers operation)"""
+    artifact = await session.get(RunArtifact, (run_id, "trace"))
+    traces = decode_artifact(artifact) if artifact is not None else []
+    updated = compress_json(traces + [trace])
+    if artifact is None:
+        updated.run_id = run_id
+        updated.kind = "trace"
+        session.add(updated)
+        return updated
+    artifact.size = updated.size
+    artifact.payload = updated.payload
+    artifact.version += 1
+    return artifact
+
+
+async def load_traces(session: AsyncSession, run_id: str) -> Optional[List[Dict[str, Any]]]:
+    artifact = await session.get(RunArtifact, (run_id, "trace"))
+    return decode_artifact(artifact) if artifact is not None else None
+
+
+def save_profile(session: AsyncSession, run_id: str, stats: bytes,
+                 summary: Dict[str, Any]) -> None:
+    """Stage the pstats dump ("profile") and its JSON digest ("profile_summary")"""
+    session.add(RunArtifact(run_id=run_id, kind="profile", codec=CODEC_ZLIB, size=len(stats),
+                            payload=zlib.compress(stats, ZLIB_LEVEL)))
+    artifact = compress_json(summary)
+    artifact.run_id = run_id
+    artifact.kind = "profile_summary"
+    session.add(artifact)
+
+
+async def load_artifact(session: AsyncSession, run_id: str, kind: str) -> Optional[Any]:
+    artifact = await session.get(RunArtifact, (run_id, kind))
+    return decode_artifact(artifact) if artifact is not None else None
+
+
+async def get_report_artifact(session: AsyncSession, run_id: str) -> Optional[RunArtifact]:
+    return await session.get(RunArtifact, (run_id, "report"))
+
+
+def mark_report(session: AsyncSession, run_id: str,
+                artifact: Optional[RunArtifact]) -> RunArtifact:
+    """Point the run's report at its evaluation_json, bumping the report version"""
+    if artifact is None:
+        artifact = RunArtifact(run_id=run_id, kind="report", codec=CODEC_REF_EVALUATION,
+                               size=0, version=1)
+        session.add(artifact)
+    else:
+        artifact.codec = CODEC_REF_EVALUATION
+        artifact.payload = None
+        artifact.version += 1
+    return artifact
+
+
+async def load_report(session: AsyncSession, run_id: str,
+                      evaluation: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Report dict for a run, or None if answers were never submitted.
+    Pass `evaluation` when the caller already loaded evaluation_json.
+    """
+    artifact = await get_report_artifact(session, run_id)
+    if artifact is None:
+        result = await session.execute(select(Run.report_json).where(Run.id == run_id))
+        return result.scalar_one_or_none()
+    if artifact.codec == CODEC_REF_EVALUATION:
+        if evaluation is None:
+            result = await session.execute(select(Run.evaluation_json).where(Run.id == run_id))
+            evaluation = result.scalar_one_or_none()
+        return evaluation
+    return decode_artifact(artifact)
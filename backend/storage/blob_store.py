@@ -0,0 +1,106 @@
+"""
+Content-addressed upload store
+Files live at <root>/<sha[:2]>/<sha[2:4]>/<sha>, so identical uploads share
+one file. Runs reference blobs through Run.upload_sha256; blobs no run
+references are garbage-collected after a grace period.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils.config import settings
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def put(self, data: bytes) -> Tuple[str, bool]:
+        """Store `data`; returns (sha256, written). Existing blobs are not rewritten."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path_for(sha256)
+        if os.path.exists(path):
+            # Refresh mtime so a concurrent GC pass treats the blob as new
+            os.utime(path)
+            return sha256, False
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # Atomic: readers see either no blob or the complete one
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return sha256, True
+
+    def iter_blobs(self) -> Iterator[Tuple[str, str, float]]:
+        """(sha256, path, mtime) of every stored blob"""
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith(".tmp-"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    yield name, path, os.stat(path).st_mtime
+                except FileNotFoundError:
+                    continue
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def touched_since(self, candidates: Iterable[Tuple[str, str, float]]) -> List[Tuple[str, str, float]]:
+        """Candidates whose blob was re-uploaded (mtime refreshed) since they were listed"""
+        touched = []
+        for sha256, path, listed in candidates:
+            mtime = self._mtime(path)
+            if mtime is not None and mtime != listed:
+                touched.append((sha256, path, mtime))
+        return touched
+
+    def delete(self, sha256: str) -> bool:
+        try:
+            os.remove(self.path_for(sha256))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def collect_garbage(self, referenced: Set[str], grace_seconds: float,
+                        candidates: Iterable[Tuple[str, str, float]] = None) -> List[str]:
+        """
+        Delete blobs not in `referenced` and older than the grace period. A blob
+        whose mtime changed since it was listed (re-uploaded) is skipped; see
+        touched_since
+        """
+        cutoff = time.time() - grace_seconds
+        deleted = []
+        for sha256, path, mtime in candidates if candidates is not None else self.iter_blobs():
+            if sha256 in referenced or mtime >= cutoff:
+                continue
+            # Re-stat right before deleting: put() may have refreshed it meanwhile
+            if self._mtime(path) == mtime and self.delete(sha256):
+                deleted.append(sha256)
+        return deleted
+
+
+blob_store = BlobStore(settings.BLOB_STORE_DIR or os.path.join(settings.UPLOAD_DIR, "blobs"))
@@ -1,9 +1,18 @@
 """Database setup and models"""
+import time
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, JSON, create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from typing import Any, Dict
+from sqlalchemy import (
+    Column, String, Integer, Float, DateTime, Text, JSON, LargeBinary, Index, create_engine, event
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import declarative_base, deferred
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from utils.config import settings
+from utils.json_codec import json_deserializer, json_serializer
+from utils.metrics import metrics
 
 Base = declarative_base()
 
@@ -14,14 +23,27 @@ class Run(Base):
     id = Column(String, primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     filename = Column(String, nullable=False)
+    upload_sha256 = Column(String)  # blob_store key; NULL for legacy uploads
     doc_type = Column(String)
     doc_type_confidence = Column(Float)
     decision = Column(String)
     score = Column(Float)
-    outline_json = Column(JSON)
-    evaluation_json = Column(JSON)
-    report_json = Column(JSON)
-    detection_result_json = Column(JSON)  # MVP1.1
+    # Blobs are deferred: loading a Run never reads them unless asked.
+    # New runs keep the outline in run_artifacts and leave outline_json /
+    # report_json empty; both columns remain readable for older rows.
+    outline_json = deferred(Column(JSON))
+    evaluation_json = deferred(Column(JSON))
+    report_json = deferred(Column(JSON))
+    detection_result_json = deferred(Column(JSON))  # MVP1.1
+    
+    # Listing/search: keyset on (created_at, id), optionally filtered
+    __table_args__ = (
+        Index("ix_runs_created_at_id", "created_at", "id"),
+        Index("ix_runs_doc_type_created_at", "doc_type", "created_at", "id"),
+        Index("ix_runs_decision_created_at", "decision", "created_at", "id"),
+        Index("ix_runs_score", "score"),
+        Index("ix_runs_upload_sha256", "upload_sha256"),
+    )
 
 
 class Question(Base):
@@ -34,6 +56,51 @@ class Question(Base):
     answer = Column(Text)
     priority = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("uq_questions_run_question", "run_id", "question_id", unique=True),
+    )
+
+
+class RunArtifact(Base):
+    """Large per-run payloads, stored compressed or as a reference"""
+    __tablename__ = "run_artifacts"
+    
+    run_id = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)  # outline, report, trace, profile, profile_summary
+    codec = Column(String, nullable=False)  # "zlib-json" | "ref:evaluation"
+    size = Column(Integer, nullable=False, default=0)  # uncompressed bytes
+    version = Column(Integer, nullable=False, default=1)
+    payload = Column(LargeBinary)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class RunFingerprint(Base):
+    """MinHash signature, section hashes and preliminary verdicts of a run"""
+    __tablename__ = "run_fingerprints"
+
+    run_id = Column(String, primary_key=True)
+    lineage = Column(String, nullable=False)  # filename without version markers
+    doc_type = Column(String)
+    rubrica_version = Column(String)
+    signature = Column(LargeBinary, nullable=False)
+    section_hashes = Column(JSON, nullable=False)  # {location: sha1 of content}
+    verdicts_json = deferred(Column(JSON))
+    parent_run_id = Column(String)  # run whose verdicts were reused, if any
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_run_fingerprints_lineage", "lineage", "created_at"),
+    )
+
+
+class RunLshBucket(Base):
+    """LSH band buckets: runs sharing a bucket are near-duplicate candidates"""
+    __tablename__ = "run_lsh_buckets"
+
+    band = Column(Integer, primary_key=True)
+    bucket = Column(String, primary_key=True)
+    run_id = Column(String, primary_key=True, index=True)
 
 
 class Finding(Base):
@@ -56,17 +123,103 @@ def get_database_url():
     return url
 
 
-engine = create_async_engine(get_database_url(), echo=False)
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection"""
+    
+    checkout_wait = metrics.histogram("db.pool.checkout_wait_seconds")
+    timeouts = metrics.counter("db.pool.timeouts")
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts.inc()
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - start)
+
+
+def _is_sqlite_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:"
+
+
+def engine_options(url: str, database_type: str) -> Dict[str, Any]:
+    """Per-backend engine/pool settings"""
+    if database_type == "postgres":
+        return {
+            "poolclass": TimedAsyncQueuePool,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pool_pre_ping": True,
+            # asyncpg's own prepared statement cache per connection
+            "connect_args": {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+        }
+    if database_type == "sqlite" and not _is_sqlite_memory(url):
+        return {
+            "poolclass": TimedAsyncQueuePool,
+            "pool_size": settings.SQLITE_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "connect_args": {"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        }
+    return {}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer commits; NORMAL is durable under WAL
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def build_engine(url: str, database_type: str) -> AsyncEngine:
+    """Create the async engine with the profile for `database_type`"""
+    if database_type == "postgres":
+        # SQLAlchemy-side LRU of prepared statements for the asyncpg dialect
+        url = make_url(url).update_query_dict(
+            {"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)}
+        )
+    
+    new_engine = create_async_engine(
+        url, echo=False, json_serializer=json_serializer, json_deserializer=json_deserializer,
+        **engine_options(str(url), database_type)
+    )
+    
+    if database_type == "sqlite" and not _is_sqlite_memory(str(url)):
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    
+    pool = new_engine.pool
+    if isinstance(pool, TimedAsyncQueuePool):
+        metrics.gauge("db.pool.size", pool.size)
+        metrics.gauge("db.pool.checked_out", pool.checkedout)
+        metrics.gauge("db.pool.overflow", pool.overflow)
+    
+    return new_engine
+
+
+engine = build_engine(get_database_url(), settings.DATABASE_TYPE)
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def init_db():
-    """Initialize database tables"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Initialize database tables (applies pending migrations)"""
+    from storage.migrations import run_migrations
+    await run_migrations(engine)
 
 
 async def get_session() -> AsyncSession:
     """Get database session"""
     async with async_session_maker() as session:
         yield session
+
+
+def get_session_maker() -> async_sessionmaker:
+    """Session factory for streaming responses, which outlive request-scoped sessions"""
+    return async_session_maker
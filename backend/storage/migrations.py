@@ -0,0 +1,204 @@
+"""
+Versioned schema migrations
+Each migration runs once, in its own transaction, and is recorded in
+schema_migrations. Databases created before migrations existed are
+brought forward by the baseline (create_all only adds what is missing).
+
+Migrations never read the live models in storage.database: those keep
+changing, while a migration must do the same thing on every database it
+meets. Each one carries the table and index definitions of its version.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Set
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, JSON, LargeBinary, MetaData, String, Table, Text,
+    inspect, select, text
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from storage import partitions
+
+logger = logging.getLogger(__name__)
+
+migrations_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", migrations_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+# Schema of migrations 1-4: tables of the original release plus run_artifacts,
+# with the listing indexes and the unique (run_id, question_id) index
+v1_metadata = MetaData()
+
+v1_runs = Table(
+    "runs", v1_metadata,
+    Column("id", String, primary_key=True),
+    Column("created_at", DateTime),
+    Column("filename", String, nullable=False),
+    Column("doc_type", String),
+    Column("doc_type_confidence", Float),
+    Column("decision", String),
+    Column("score", Float),
+    Column("outline_json", JSON),
+    Column("evaluation_json", JSON),
+    Column("report_json", JSON),
+    Column("detection_result_json", JSON),
+    Index("ix_runs_created_at_id", "created_at", "id"),
+    Index("ix_runs_doc_type_created_at", "doc_type", "created_at", "id"),
+    Index("ix_runs_decision_created_at", "decision", "created_at", "id"),
+    Index("ix_runs_score", "score"),
+)
+
+Table(
+    "questions", v1_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("run_id", String, nullable=False),
+    Column("question_id", String, nullable=False),
+    Column("question", Text, nullable=False),
+    Column("answer", Text),
+    Column("priority", String),
+    Column("created_at", DateTime),
+    Index("ix_questions_run_id", "run_id"),
+    Index("uq_questions_run_question", "run_id", "question_id", unique=True),
+)
+
+Table(
+    "run_artifacts", v1_metadata,
+    Column("run_id", String, primary_key=True),
+    Column("kind", String, primary_key=True),
+    Column("codec", String, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("payload", LargeBinary),
+    Column("updated_at", DateTime),
+)
+
+Table(
+    "findings", v1_metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("run_id", String, nullable=False),
+    Column("finding_json", JSON, nullable=False),
+    Column("created_at", DateTime),
+    Index("ix_findings_run_id", "run_id"),
+)
+
+# Migration 6: revision fingerprints and their LSH buckets
+v6_metadata = MetaData()
+
+Table(
+    "run_fingerprints", v6_metadata,
+    Column("run_id", String, primary_key=True),
+    Column("lineage", String, nullable=False),
+    Column("doc_type", String),
+    Column("rubrica_version", String),
+    Column("signature", LargeBinary, nullable=False),
+    Column("section_hashes", JSON, nullable=False),
+    Column("verdicts_json", JSON),
+    Column("parent_run_id", String),
+    Column("created_at", DateTime),
+    Index("ix_run_fingerprints_lineage", "lineage", "created_at"),
+)
+
+Table(
+    "run_lsh_buckets", v6_metadata,
+    Column("band", Integer, primary_key=True),
+    Column("bucket", String, primary_key=True),
+    Column("run_id", String, primary_key=True),
+    Index("ix_run_lsh_buckets_run_id", "run_id"),
+)
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent workers migrate one at a time
+MIGRATION_LOCK_KEY = 7_340_211
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _baseline(conn: Connection) -> None:
+    v1_metadata.create_all(conn)
+
+
+def _dedupe_questions(conn: Connection) -> None:
+    # Older rows may repeat (run_id, question_id); keep the latest before the unique index
+    conn.execute(text(
+        "DELETE FROM questions WHERE id NOT IN ("
+        "SELECT MAX(id) FROM questions GROUP BY run_id, question_id)"
+    ))
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    # create_all skips existing tables, so their version-1 indexes are created here
+    for table in v1_metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def _add_upload_sha256(conn: Connection) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns("runs")}
+    if "upload_sha256" not in existing:
+        conn.execute(text("ALTER TABLE runs ADD COLUMN upload_sha256 VARCHAR"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_runs_upload_sha256 ON runs (upload_sha256)"))
+
+
+def _partition_runs(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        partitions.convert_runs_to_partitioned(conn, v1_runs)
+
+
+def _create_fingerprint_tables(conn: Connection) -> None:
+    v6_metadata.create_all(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", _baseline),
+    Migration(2, "dedupe_questions", _dedupe_questions),
+    Migration(3, "indexes", _create_missing_indexes),
+    Migration(4, "partition_runs_by_month", _partition_runs),
+    Migration(5, "runs_upload_sha256", _add_upload_sha256),
+    Migration(6, "run_fingerprints", _create_fingerprint_tables),
+]
+
+
+def _applied_versions(conn: Connection) -> Set[int]:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _apply(conn: Connection, migration: Migration) -> bool:
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    # Re-check under the lock: another worker may have applied it meanwhile
+    if migration.version in _applied_versions(conn):
+        return False
+    migration.apply(conn)
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+    ))
+    return True
+
+
+async def run_migrations(engine: AsyncEngine) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied"""
+    async with engine.begin() as conn:
+        await conn.run_sync(migrations_metadata.create_all)
+        applied = await conn.run_sync(_applied_versions)
+
+    newly_applied = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        async with engine.begin() as conn:
+            if await conn.run_sync(_apply, migration):
+                logger.info(f"Applied migration {migration.version:04d}_{migration.name}")
+                newly_applied.append(migration.version)
+    return newly_applied
@@ -0,0 +1,110 @@
+"""
+Monthly range partitions for `runs` (Postgres only)
+Partitions are named runs_pYYYYMM and cover [first of month, first of next
+month) on created_at. Retention drops whole expired partitions, which
+frees their space at once instead of leaving dead tuples to vacuum.
+"""
+import re
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.engine import Connection
+
+PARTITION_PREFIX = "runs_p"
+DEFAULT_PARTITION = "runs_default"
+MONTHS_AHEAD = 3
+
+_PARTITION_NAME = re.compile(rf"^{PARTITION_PREFIX}(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    relkind = conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass('runs')"
+    )).scalar()
+    return relkind == "p"
+
+
+def ensure_partitions(conn: Connection, start: datetime, end: datetime) -> None:
+    """Create monthly partitions covering [start, end]"""
+    month = month_start(start)
+    while month <= end:
+        upper = add_months(month, 1)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF runs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        ))
+        month = upper
+
+
+def ensure_upcoming_partitions(conn: Connection, now: datetime) -> None:
+    ensure_partitions(conn, now, add_months(month_start(now), MONTHS_AHEAD))
+
+
+def list_partitions(conn: Connection) -> List[Tuple[str, datetime]]:
+    """(name, month) of the monthly partitions, oldest first"""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('runs')"
+    )).scalars()
+    found = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            found.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(found, key=lambda p: p[1])
+
+
+def drop_partitions_before(conn: Connection, cutoff: datetime) -> List[str]:
+    """Drop partitions whose whole month lies before `cutoff`"""
+    dropped = []
+    for name, month in list_partitions(conn):
+        if add_months(month, 1) <= cutoff:
+            conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def convert_runs_to_partitioned(conn: Connection, runs_table: Table) -> None:
+    """
+    Rebuild `runs` as a table partitioned by month on created_at.
+    A partitioned table's primary key must include the partition key, so
+    the key becomes (id, created_at); ids are still generated as UUIDs.
+    """
+    if is_partitioned(conn):
+        return
+
+    conn.execute(text("UPDATE runs SET created_at = now() WHERE created_at IS NULL"))
+    conn.execute(text("ALTER TABLE runs RENAME TO runs_unpartitioned"))
+    conn.execute(text("ALTER INDEX IF EXISTS runs_pkey RENAME TO runs_unpartitioned_pkey"))
+    for index in runs_table.indexes:
+        conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    conn.execute(text(
+        "CREATE TABLE runs (LIKE runs_unpartitioned INCLUDING DEFAULTS, "
+        "PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    # Safety net only: upcoming months are created ahead of time
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF runs DEFAULT"))
+
+    now = datetime.utcnow()
+    oldest = conn.execute(text("SELECT MIN(created_at) FROM runs_unpartitioned")).scalar()
+    ensure_partitions(conn, oldest or now, add_months(month_start(now), MONTHS_AHEAD))
+
+    conn.execute(text("INSERT INTO runs SELECT * FROM runs_unpartitioned"))
+    conn.execute(text("DROP TABLE runs_unpartitioned"))
+    for index in runs_table.indexes:
+        index.create(conn, checkfirst=True)
@@ -0,0 +1,93 @@
+"""Shared fixtures: isolated SQLite database, API client and document builders"""
+import pytest
+import pytest_asyncio
+from docx import Document
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from adapters.llm_interface import LLMInterface
+from domain.models import DocumentOutline, DocumentSection
+from storage.blob_store import blob_store
+from storage.database import build_engine, get_session, get_session_maker
+from storage.migrations import run_migrations
+
+
+@pytest_asyncio.fixture
+async def session_maker(tmp_path):
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", "sqlite")
+    await run_migrations(engine)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def client(session_maker, tmp_path, monkeypatch):
+    from main import app
+
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+
+    async def override_get_session():
+        async with session_maker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_session_maker] = lambda: session_maker
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+class FakeLLM(LLMInterface):
+    """Deterministic adapter: every criterio CUMPLE, no network"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        raise NotImplementedError
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        self.calls += 1
+        return {"estado": "CUMPLE", "justificacion": "Evidencia encontrada"}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    # Every criterio reaches the adapter; pre-adjudication has its own tests
+    llm = FakeLLM()
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    monkeypatch.setattr("services.evaluator.get_llm", lambda: llm)
+    return llm
+
+
+ROLLBACK_PLAN = (("Plan de rollback", "rollback pasos detallados para revertir la migración " * 10),)
+
+
+@pytest.fixture
+def make_outline():
+    """Build an outline from DocumentSections or (title, body) pairs; pairs become level-1 sections"""
+    def build(*sections, filename="dtm.docx", word_count=None):
+        built = [
+            s if isinstance(s, DocumentSection) else
+            DocumentSection(title=s[0], level=1, content=f"{s[0]}\n{s[1]}", location=f"Section {i + 1}")
+            for i, s in enumerate(sections)
+        ]
+        if word_count is None:
+            word_count = sum(len(s.content.split()) for s in built)
+        return DocumentOutline(filename=filename, word_count=word_count, sections=built,
+                               tables_count=0, has_toc=False)
+    return build
+
+
+@pytest.fixture
+def make_docx(tmp_path):
+    """Write a DOCX with a level-1 heading and paragraph per (title, body) pair; returns its path"""
+    def build(*sections, filename="plan.docx"):
+        doc = Document()
+        for title, body in sections or ROLLBACK_PLAN:
+            doc.add_heading(title, 1)
+            doc.add_paragraph(body)
+        doc.save(tmp_path / filename)
+        return tmp_path / filename
+    return build
@@ -0,0 +1,141 @@
+"""Test admission control and priority lanes"""
+import asyncio
+import pytest
+from adapters.limited_adapter import ConcurrencyLimitedLLM
+from utils.admission import AdmissionRejected, PriorityLimiter, current_lane
+
+
+async def hold(limiter, lane, order, release):
+    async with limiter.acquire(lane):
+        order.append(lane)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_is_admitted_first():
+    limiter = PriorityLimiter("test.priority", capacity=1)
+    release = asyncio.Event()
+    order = []
+
+    first = asyncio.create_task(hold(limiter, "batch", order, release))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(hold(limiter, lane, order, release))
+               for lane in ("batch", "upload", "interactive")]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, *waiters)
+
+    assert order == ["batch", "interactive", "upload", "batch"]
+    assert limiter.in_flight == 0
+    assert limiter.wait["interactive"].count == 1
+
+
+@pytest.mark.asyncio
+async def test_reserved_slots_stay_free_for_interactive_work():
+    limiter = PriorityLimiter("test.reserved", capacity=2, reserved_interactive=1)
+    release = asyncio.Event()
+    order = []
+
+    tasks = [asyncio.create_task(hold(limiter, "upload", order, release)) for _ in range(2)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(hold(limiter, "interactive", order, release)))
+    await asyncio.sleep(0)
+
+    assert order == ["upload", "interactive"]
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == ["upload", "interactive", "upload"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_and_cancelled_waiters_leave():
+    limiter = PriorityLimiter("test.depth", capacity=1, max_queue={"upload": 1})
+    release = asyncio.Event()
+    order = []
+
+    holder = asyncio.create_task(hold(limiter, "upload", order, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold(limiter, "upload", order, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with limiter.acquire("upload"):
+            pass
+    assert rejected.value.retry_after >= 1
+    assert limiter.rejected["upload"].value == 1
+
+    waiter.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    await holder
+    assert order == ["upload"] and limiter.in_flight == 0
+    async with limiter.acquire("upload"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_limited_llm_shares_usage_and_bounds_calls(fake_llm):
+    limiter = PriorityLimiter("test.llm", capacity=1)
+    llm = ConcurrencyLimitedLLM(fake_llm, limiter)
+
+    await asyncio.gather(*(llm.generate_json("p") for _ in range(3)))
+    llm.record_usage(input_tokens=5)
+
+    assert fake_llm.calls == 3
+    assert fake_llm.usage["input_tokens"] == 5
+    assert limiter.wait["upload"].count == 3
+
+
+@pytest.mark.asyncio
+async def test_upload_runs_in_its_lane(client, fake_llm, make_docx, monkeypatch):
+    lanes = []
+    generate_json = fake_llm.generate_json
+
+    async def record_lane(*args, **kwargs):
+        lanes.append(current_lane())
+        return await generate_json(*args, **kwargs)
+
+    monkeypatch.setattr(fake_llm, "generate_json", record_lane)
+    with open(make_docx(), "rb") as f:
+        response = await client.post("/api/runs", files={"file": ("plan.docx", f)})
+
+    assert response.status_code == 200
+    assert lanes and set(lanes) == {"upload"}
+
+
+@pytest.mark.asyncio
+async def test_rejected_upload_gets_429_with_retry_after(client, fake_llm, make_docx, monkeypatch):
+    limiter = PriorityLimiter("test.route", capacity=1, max_queue={"upload": 0})
+    monkeypatch.setattr("utils.admission.run_admission", limiter)
+
+    async with limiter.acquire("interactive"):
+        with open(make_docx(), "rb") as f:
+            response = await client.post("/api/runs", files={"file": ("plan.docx", f)})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_upload_body_is_never_read(monkeypatch):
+    from main import app
+    limiter = PriorityLimiter("test.body", capacity=1, max_queue={"upload": 0})
+    monkeypatch.setattr("utils.admission.run_admission", limiter)
+    sent = []
+
+    async def receive():
+        raise AssertionError("request body was read")
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/runs", "raw_path": b"/api/runs", "root_path": "", "query_string": b"",
+        "headers": [(b"content-type", b"multipart/form-data; boundary=x")],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    async with limiter.acquire("interactive"):
+        await app(scope, receive, send)
+
+    assert sent[0]["status"] == 429
@@ -0,0 +1,49 @@
+"""Test compressed outline and deduplicated report storage"""
+import pytest
+from sqlalchemy import select
+from storage.database import Run, RunArtifact
+from storage.artifacts import save_outline, load_outline, load_report, mark_report
+
+
+@pytest.mark.asyncio
+async def test_outline_roundtrip_compressed(session_maker):
+    """Outlines are stored compressed and read back intact"""
+    outline = {"filename": "a.docx", "sections": [{"content": "texto " * 2000}]}
+    async with session_maker() as session:
+        session.add(Run(id="r1", filename="a.docx"))
+        save_outline(session, "r1", outline)
+        await session.commit()
+
+    async with session_maker() as session:
+        artifact = await session.get(RunArtifact, ("r1", "outline"))
+        assert len(artifact.payload) < artifact.size / 10
+        assert await load_outline(session, "r1") == outline
+
+
+@pytest.mark.asyncio
+async def test_legacy_outline_column_still_readable(session_maker):
+    """Runs stored before run_artifacts keep working"""
+    async with session_maker() as session:
+        session.add(Run(id="r1", filename="a.docx", outline_json={"sections": []},
+                        report_json={"score": 10}))
+        await session.commit()
+
+    async with session_maker() as session:
+        assert await load_outline(session, "r1") == {"sections": []}
+        assert await load_report(session, "r1") == {"score": 10}
+
+
+@pytest.mark.asyncio
+async def test_report_references_evaluation(session_maker):
+    """The report is not a second copy of evaluation_json"""
+    async with session_maker() as session:
+        session.add(Run(id="r1", filename="a.docx", evaluation_json={"score": 80}))
+        assert await load_report(session, "r1") is None
+        artifact = mark_report(session, "r1", None)
+        await session.commit()
+        assert artifact.version == 1
+
+    async with session_maker() as session:
+        report_json = (await session.execute(select(Run.report_json))).scalar_one()
+        assert report_json is None
+        assert await load_report(session, "r1") == {"score": 80}
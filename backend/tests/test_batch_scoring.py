@@ -0,0 +1,106 @@
+"""Test vectorized batch scoring against the per-run evaluator methods"""
+import copy
+import random
+import pytest
+from domain.models import CriterioEvaluacion, DocumentOutline, FailFast
+from services.batch_scoring import BatchScorer, RunScoringInput
+from services.evaluator import DocumentEvaluator
+from services.rubric_registry import get_rubrica, parse_rubrica
+
+ESTADOS = ["CUMPLE", "PARCIAL", "NO", "NA"]
+PUNTOS_FACTOR = {"CUMPLE": 1.0, "PARCIAL": 0.5, "NO": 0.0, "NA": 0.0}
+
+
+def per_run_reference(evaluator, rubrica, run: RunScoringInput):
+    """Score one run with DocumentEvaluator's own methods"""
+    evaluator.doc_type = run.doc_type
+    evaluator.rubrica = rubrica
+    evaluator.detection_result = {"conflict_name_vs_content": run.has_conflict,
+                                  "filename_suggested_type": "DSP"}
+
+    criterios = []
+    for c in rubrica.tipos[run.doc_type].criterios:
+        estado = run.estados.get(c.id, "NO")
+        criterios.append(CriterioEvaluacion(
+            criterio_id=c.id, nombre=c.nombre, peso=c.peso, estado=estado,
+            puntos_obtenidos=c.peso * PUNTOS_FACTOR[estado], evidencia=[],
+            justificacion="", severidad_si_falta=c.severidad_si_falta
+        ))
+    fail_fast = [FailFast(code="FF-01", name="x", active=run.fail_fast_active,
+                          evidencia="", explicacion="")]
+
+    score, peso = evaluator.calculate_score(criterios)
+    score, _ = evaluator.apply_penalties(score, criterios)
+    hallazgos = evaluator.generate_findings(criterios)
+    potencial = evaluator.calculate_potential_scores(score, hallazgos)
+    decision = evaluator.make_decision(score, fail_fast, hallazgos)
+    return score, peso, potencial.model_dump(), decision
+
+
+def random_runs(rubrica, n, seed=7):
+    rng = random.Random(seed)
+    doc_types = [t for t in rubrica.tipos]
+    runs = []
+    for i in range(n):
+        doc_type = rng.choice(doc_types)
+        estados = {c.id: rng.choice(ESTADOS) for c in rubrica.tipos[doc_type].criterios
+                   if rng.random() > 0.05}
+        runs.append(RunScoringInput(f"run-{i}", doc_type, estados,
+                                    fail_fast_active=rng.random() < 0.1,
+                                    has_conflict=rng.random() < 0.2))
+    return runs
+
+
+def assert_matches_reference(rubrica, runs):
+    outline = DocumentOutline(filename="x.docx", word_count=500, sections=[],
+                              tables_count=0, has_toc=False)
+    evaluator = DocumentEvaluator(outline, "DTM", "run-ref")
+    records = BatchScorer(rubrica).score(runs).to_records()
+    assert len(records) == len(runs)
+    for run, record in zip(runs, records):
+        score, peso, potencial, decision = per_run_reference(evaluator, rubrica, run)
+        assert record["score"] == score
+        assert record["peso_total_aplicable"] == peso
+        assert record["score_potencial"] == potencial
+        assert record["decision"] == decision
+
+
+def test_batch_matches_per_run_methods():
+    """Batch results are identical to the per-run evaluator methods"""
+    rubrica = get_rubrica()
+    assert_matches_reference(rubrica, random_runs(rubrica, 300))
+
+
+def test_batch_matches_per_run_with_modified_rubric():
+    """Changed weights and thresholds are honored identically"""
+    raw = copy.deepcopy(get_rubrica().raw)
+    for tipo in raw["tipos_documentos_entregables"].values():
+        for i, criterio in enumerate(tipo["criterios"]):
+            criterio["peso"] = 5 + 7 * i
+    raw["umbrales_decision"]["APROBADO"]["score_minimo"] = 60
+    raw["umbrales_decision"]["REQUIERE_CORRECCION"]["score_minimo"] = 40
+    rubrica = parse_rubrica(raw)
+
+    assert_matches_reference(rubrica, random_runs(rubrica, 200, seed=11))
+
+
+def test_from_evaluation_reads_stored_json():
+    """Stored evaluation_json is turned into scoring input"""
+    evaluation = {
+        "criterios": [{"criterio_id": "DTM-01", "estado": "CUMPLE"}],
+        "fail_fast": [{"code": "FF-01", "active": True}],
+        "hallazgos": [{"criterio_id": "CONTROL_DOCUMENTAL"}],
+    }
+
+    run = RunScoringInput.from_evaluation("r1", "DTM", evaluation)
+
+    assert run.estados == {"DTM-01": "CUMPLE"}
+    assert run.fail_fast_active is True
+    assert run.has_conflict is True
+
+
+def test_unknown_doc_types_are_skipped():
+    """Runs whose doc_type is not in the rubrica are left out"""
+    result = BatchScorer(get_rubrica()).score([RunScoringInput("r1", "LEGACY", {})])
+
+    assert len(result) == 0
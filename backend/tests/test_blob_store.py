@@ -0,0 +1,52 @@
+"""Test the content-addressed upload store"""
+import hashlib
+import os
+from storage.blob_store import BlobStore
+
+
+def test_put_is_content_addressed_and_deduplicated(tmp_path):
+    """Identical bytes map to one file, written once"""
+    store = BlobStore(str(tmp_path))
+
+    sha, written = store.put(b"docx bytes")
+    again, written_again = store.put(b"docx bytes")
+
+    assert sha == again == hashlib.sha256(b"docx bytes").hexdigest()
+    assert (written, written_again) == (True, False)
+    assert store.path_for(sha) == os.path.join(str(tmp_path), sha[:2], sha[2:4], sha)
+    with open(store.path_for(sha), "rb") as f:
+        assert f.read() == b"docx bytes"
+    assert [b[0] for b in store.iter_blobs()] == [sha]
+
+
+def test_no_temp_files_left_behind(tmp_path):
+    store = BlobStore(str(tmp_path))
+    sha, _ = store.put(b"a" * 100_000)
+
+    assert os.listdir(os.path.dirname(store.path_for(sha))) == [sha]
+
+
+def test_garbage_collection_respects_references_and_grace(tmp_path):
+    store = BlobStore(str(tmp_path))
+    kept, _ = store.put(b"kept")
+    orphan, _ = store.put(b"orphan")
+
+    assert store.collect_garbage({kept}, grace_seconds=3600) == []
+    assert store.collect_garbage({kept}, grace_seconds=-1) == [orphan]
+    assert store.exists(kept) and not store.exists(orphan)
+
+
+def test_blob_reuploaded_during_collection_is_kept(tmp_path):
+    store = BlobStore(str(tmp_path))
+    sha, _ = store.put(b"orphan")
+    os.utime(store.path_for(sha), (0, 0))
+    listed = list(store.iter_blobs())
+
+    store.put(b"orphan")  # duplicate upload refreshes the mtime mid-pass
+
+    assert store.collect_garbage(set(), grace_seconds=-1, candidates=listed) == []
+    assert store.exists(sha)
+    touched = store.touched_since(listed)
+    assert [t[0] for t in touched] == [sha] and touched[0][2] > 0
+    assert store.collect_garbage({sha}, grace_seconds=-1, candidates=touched) == []
+    assert store.collect_garbage(set(), grace_seconds=-1, candidates=touched) == [sha]
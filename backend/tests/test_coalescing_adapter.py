@@ -0,0 +1,130 @@
+"""Test single-flight coalescing of identical LLM requests"""
+import asyncio
+import pytest
+from adapters.coalescing_adapter import CoalescingLLM, _in_flight
+from adapters.llm_interface import LLMInterface
+from utils.admission import PriorityLimiter, current_lane
+from utils.tracing import _current_span, start_trace
+
+
+class SlowLLM(LLMInterface):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        raise NotImplementedError
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        self.calls += 1
+        self.lane = current_lane()
+        self.span = _current_span.get()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if prompt == "fail":
+            raise RuntimeError("provider down")
+        self.record_usage(input_tokens=10)
+        return {"estado": "CUMPLE", "prompt": prompt, "evidencia": []}
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_prompts_share_one_call():
+    provider = SlowLLM()
+    first, second = CoalescingLLM(provider), CoalescingLLM(provider)
+
+    tasks = [asyncio.create_task(llm.generate_json("p", "sys", "doc")) for llm in (first, second, first)]
+    other = asyncio.create_task(first.generate_json("p", "sys", "other doc"))
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*tasks)
+    await other
+
+    assert provider.calls == 2
+    # Three callers each record the shared call, one records its own
+    assert provider.usage["input_tokens"] == 40
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert not _in_flight
+
+    await first.generate_json("p", "sys", "doc")
+    assert provider.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_every_joined_caller_records_the_usage():
+    first_provider, second_provider = SlowLLM(), SlowLLM()
+    first, second = CoalescingLLM(first_provider), CoalescingLLM(second_provider)
+
+    tasks = [asyncio.create_task(llm.generate_json("p")) for llm in (first, second)]
+    await asyncio.sleep(0)
+    first_provider.release.set()
+    await asyncio.gather(*tasks)
+
+    assert first_provider.calls == 1 and second_provider.calls == 0
+    assert first.usage["input_tokens"] == second.usage["input_tokens"] == 10
+
+
+@pytest.mark.asyncio
+async def test_shared_call_keeps_the_lane_but_not_the_span():
+    provider = SlowLLM()
+    llm = CoalescingLLM(provider)
+    provider.release.set()
+
+    with start_trace("answers", "run-1") as trace:
+        async with PriorityLimiter("test.coalesce_lane", 0).acquire("interactive"):
+            await llm.generate_json("p")
+
+    assert provider.lane == "interactive"
+    assert provider.span is None
+    assert trace.to_dict()["spans"][0]["name"] == "answers"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    provider = SlowLLM()
+    llm = CoalescingLLM(provider)
+
+    leaving = asyncio.create_task(llm.generate_json("p"))
+    staying = asyncio.create_task(llm.generate_json("p"))
+    await asyncio.sleep(0)
+    leaving.cancel()
+    await asyncio.sleep(0)
+    provider.release.set()
+
+    assert (await staying)["estado"] == "CUMPLE"
+    assert leaving.cancelled()
+    assert provider.calls == 1 and provider.cancelled == 0
+
+
+@pytest.mark.asyncio
+async def test_call_is_cancelled_when_every_waiter_leaves():
+    provider = SlowLLM()
+    llm = CoalescingLLM(provider)
+
+    waiters = [asyncio.create_task(llm.generate_json("p")) for _ in range(2)]
+    await asyncio.sleep(0)
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert provider.cancelled == 1
+    assert not _in_flight
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter():
+    provider = SlowLLM()
+    llm = CoalescingLLM(provider)
+
+    waiters = [asyncio.create_task(llm.generate_json("fail")) for _ in range(2)]
+    await asyncio.sleep(0)
+    provider.release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert provider.calls == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
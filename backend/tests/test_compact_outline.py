@@ -0,0 +1,92 @@
+"""Test the compact outline buffer and the DocumentOutline views over it"""
+from docx import Document
+from domain.compact_outline import CompactOutline, CompactOutlineBuilder
+from domain.models import DocumentOutline, DocumentSection, SectionsView
+from utils.docx_parser import extract_document_structure, search_in_document
+
+SECTIONS = [
+    DocumentSection(title="Alcance", level=1, content="Alcance\nObjetivos del PLAN", location="Section 1"),
+    DocumentSection(title="Riesgos", level=2, content="Riesgos", location="Section 1.1"),
+    DocumentSection(title="Anexo", level=1, content="Contenido sin título", location="Section 2"),
+]
+
+
+def test_views_match_joined_sections(make_outline):
+    outline = make_outline(*SECTIONS)
+
+    assert outline.full_text == "\n".join(s.content for s in SECTIONS)
+    assert outline.full_text_lower == outline.full_text.lower()
+    assert outline.headings == ["Alcance", "Riesgos", "Anexo"]
+    assert [outline.section_lower(i) for i in range(3)] == [s.content.lower() for s in SECTIONS]
+
+
+def test_views_are_memoized(make_outline):
+    outline = make_outline(*SECTIONS)
+
+    assert outline.full_text_lower is outline.full_text_lower
+    assert outline.compact is outline.compact
+
+
+def test_lowercase_changing_length_keeps_sections_aligned():
+    """'İ' lowercases to two code points; section views must not shift"""
+    sections = [
+        DocumentSection(title="İSTANBUL", level=1, content="İSTANBUL\nİzmir", location="Section 1"),
+        DocumentSection(title="Plan", level=1, content="Plan\nRollback", location="Section 2"),
+    ]
+    compact = CompactOutline.from_sections(sections)
+
+    assert compact.content_lower(1) == "plan\nrollback"
+    assert compact.content_lower(0) == "İSTANBUL\nİzmir".lower()
+    assert compact.find_lower("rollback", 1) == 5
+    assert compact.find_lower("plan", 0) == -1
+
+
+def test_text_is_held_once(make_outline):
+    """Sections are views over the buffer; loaded outlines switch to them too"""
+    outline = make_outline(*SECTIONS)
+
+    outline.analysis.section_hits("plan")
+    assert isinstance(outline.sections, SectionsView)
+    assert not any(slot.startswith("_section") for slot in CompactOutline.__slots__)
+    assert outline.sections[0] == SECTIONS[0]
+    assert outline.sections[-1].content == "Contenido sin título"
+    assert outline.model_dump() == make_outline(*SECTIONS).model_dump()
+    assert DocumentOutline.model_validate_json(outline.model_dump_json()).sections == SECTIONS
+
+
+def test_builder_matches_previous_concatenation():
+    builder = CompactOutlineBuilder()
+    builder.add_paragraph("antes del primer título")
+    builder.add_heading("Uno", 1, "Section 1")
+    builder.add_paragraph("a")
+    builder.add_paragraph("b")
+    builder.add_heading("Dos", 2, "Section 1.1")
+    compact = builder.build()
+
+    assert [compact.content(i) for i in range(len(compact))] == ["Uno\na\nb", "Dos"]
+    assert compact.full_text == "Uno\na\nb\nDos"
+    assert list(compact.levels) == [1, 2]
+
+
+def test_parser_builds_compact_outline(tmp_path):
+    doc = Document()
+    doc.add_paragraph("Preámbulo ignorado")
+    doc.add_heading("Plan de Rollback", 1)
+    doc.add_paragraph("Pasos de ROLLBACK")
+    doc.add_heading("Validación", 2)
+    doc.add_paragraph("Checklist")
+    doc.save(tmp_path / "p.docx")
+
+    outline = extract_document_structure(str(tmp_path / "p.docx"), filename="p.docx")
+
+    assert isinstance(outline.sections, SectionsView)
+    assert [s.content for s in outline.sections] == [
+        "Plan de Rollback\nPasos de ROLLBACK", "Validación\nChecklist"
+    ]
+    assert [s.location for s in outline.sections] == ["Section 1", "Section 1.1"]
+    assert outline.full_text == "Plan de Rollback\nPasos de ROLLBACK\nValidación\nChecklist"
+    assert outline.model_dump()["sections"][1]["level"] == 2
+
+    evidence = search_in_document(outline, ["rollback"])
+    assert [e["location"] for e in evidence] == ["Section 1"]
+    assert evidence[0]["snippet"] == "...Plan de Rollback\nPasos de ROLLBACK..."
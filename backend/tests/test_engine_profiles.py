@@ -0,0 +1,85 @@
+"""Test per-backend engine profiles and pool metrics"""
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+from storage.database import TimedAsyncQueuePool, build_engine, engine_options
+from utils.metrics import Histogram, MetricsRegistry, metrics
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_uses_wal_and_pragmas(tmp_path):
+    """File databases get WAL, synchronous=NORMAL, busy timeout and mmap"""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'x.db'}", "sqlite")
+    try:
+        assert isinstance(engine.pool, TimedAsyncQueuePool)
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+            assert (await conn.execute(text("PRAGMA mmap_size"))).scalar() > 0
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_memory_keeps_default_pool():
+    """In-memory databases are left alone (WAL does not apply)"""
+    engine = build_engine("sqlite+aiosqlite:///:memory:", "sqlite")
+    try:
+        assert isinstance(engine.pool, StaticPool)
+    finally:
+        await engine.dispose()
+
+
+def test_postgres_profile_options():
+    """Postgres gets a sized, pre-pinged, recycled pool and statement caching"""
+    options = engine_options("postgresql+asyncpg://u:p@db/rhino", "postgres")
+
+    assert options["poolclass"] is TimedAsyncQueuePool
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == 10
+    assert options["max_overflow"] == 20
+    assert options["pool_recycle"] == 1800
+    assert options["connect_args"] == {"statement_cache_size": 500}
+
+
+@pytest.mark.asyncio
+async def test_pool_checkout_wait_is_recorded(tmp_path):
+    """Concurrent checkouts are observed in the wait histogram"""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'x.db'}", "sqlite")
+    before = metrics.histogram("db.pool.checkout_wait_seconds").count
+
+    async def query():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*[query() for _ in range(12)])
+    finally:
+        await engine.dispose()
+
+    assert metrics.histogram("db.pool.checkout_wait_seconds").count >= before + 12
+    assert "db.pool.checked_out" in metrics.snapshot()["gauges"]
+
+
+def test_histogram_percentiles():
+    """Percentiles are reported as bucket upper bounds"""
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 90 + [0.05] * 9 + [2.0]:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["count"] == 100
+    assert snapshot["p50"] == 0.01
+    assert snapshot["p95"] == 0.1
+    assert snapshot["max"] == 2.0
+
+
+def test_registry_returns_same_instruments():
+    registry = MetricsRegistry()
+    registry.counter("a").inc()
+    registry.counter("a").inc(2)
+
+    assert registry.snapshot()["counters"] == {"a": 3}
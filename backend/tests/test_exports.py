@@ -0,0 +1,77 @@
+"""Test the streaming multi-run export"""
+import json
+from datetime import datetime, timedelta
+import pytest
+from api import routes
+from storage.artifacts import mark_report
+from storage.database import Run
+
+BASE = datetime(2026, 5, 1)
+
+
+async def seed_runs(session_maker):
+    async with session_maker() as session:
+        for i in range(6):
+            run_id = f"run-{i}"
+            session.add(Run(
+                id=run_id, filename=f"doc{i}.docx", doc_type="DTM" if i % 2 else "DSP",
+                decision="APROBADO", score=80.0 + i, created_at=BASE + timedelta(days=i),
+                evaluation_json={"score": 80.0 + i, "texto": "ñandú"}
+            ))
+            if i < 3:
+                mark_report(session, run_id, None)
+        # Run stored before run_artifacts: report lives in the legacy column
+        session.add(Run(id="legacy", filename="old.docx", doc_type="DTM",
+                        created_at=BASE - timedelta(days=30), evaluation_json={"score": 1},
+                        report_json={"score": 2}))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_jsonl_export_all_runs(client, session_maker):
+    await seed_runs(session_maker)
+
+    response = await client.get("/api/exports/runs")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["run_id"] for r in records] == ["legacy"] + [f"run-{i}" for i in range(6)]
+    assert records[0]["report"] == {"score": 2}
+    assert records[1]["report"] == records[1]["evaluation"]
+    assert records[1]["evaluation"]["texto"] == "ñandú"
+    assert records[4]["report"] is None
+
+
+@pytest.mark.asyncio
+async def test_json_array_export_with_filters(client, session_maker):
+    await seed_runs(session_maker)
+
+    response = await client.get("/api/exports/runs", params={
+        "format": "json", "doc_type": "DTM",
+        "created_from": BASE.isoformat(), "created_to": (BASE + timedelta(days=5)).isoformat()
+    })
+
+    assert [r["run_id"] for r in json.loads(response.content)] == ["run-1", "run-3"]
+
+
+@pytest.mark.asyncio
+async def test_export_selected_runs_in_small_chunks(session_maker, monkeypatch):
+    """Output is flushed incrementally and stays valid across chunk boundaries"""
+    monkeypatch.setattr(routes, "EXPORT_FLUSH_BYTES", 64)
+    await seed_runs(session_maker)
+
+    response = await routes.export_runs(format="json", doc_type=None, created_from=None,
+                                        created_to=None, run_id=["run-2", "run-4"],
+                                        session_maker=session_maker)
+    chunks = [chunk async for chunk in response.body_iterator]
+
+    assert len(chunks) > 1
+    assert [r["run_id"] for r in json.loads(b"".join(chunks))] == ["run-2", "run-4"]
+
+
+@pytest.mark.asyncio
+async def test_empty_json_export_is_valid(client):
+    response = await client.get("/api/exports/runs", params={"format": "json"})
+
+    assert response.json() == []
@@ -0,0 +1,69 @@
+"""Test the queued logging pipeline"""
+import logging
+import queue
+import threading
+from utils.logging_setup import BoundedQueueHandler, DrainingQueueListener, LevelSamplingFilter
+
+
+class BlockingHandler(logging.Handler):
+    """Simulates stalled log I/O"""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.records.append(self.format(record))
+
+
+def make_logger(handler):
+    logger = logging.getLogger(f"test.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+
+def test_full_queue_drops_instead_of_blocking():
+    sink = BlockingHandler()
+    log_queue = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue)
+    listener = DrainingQueueListener(log_queue, sink)
+    logger = make_logger(handler)
+    dropped_before = BoundedQueueHandler.dropped.value
+
+    listener.start()
+    for i in range(10):
+        logger.info("event %d", i)
+    assert BoundedQueueHandler.dropped.value - dropped_before >= 7
+
+    sink.unblock.set()
+    listener.stop()
+    listener.stop()
+    assert sink.records[0] == "event 0"
+
+
+def test_args_are_merged_before_enqueue():
+    log_queue = queue.Queue()
+    logger = make_logger(BoundedQueueHandler(log_queue))
+    payload = {"n": 1}
+
+    logger.info("payload %s", payload, extra={"run_id": "run-1"})
+    payload["n"] = 2
+
+    record = log_queue.get_nowait()
+    assert record.msg == "payload {'n': 1}" and record.args is None
+    assert record.run_id == "run-1"
+
+
+def test_sampling_applies_only_below_warning():
+    sampler = LevelSamplingFilter({"debug": 0.0, "WARNING": 0.0})
+    debug = logging.LogRecord("x", logging.DEBUG, __file__, 1, "d", None, None)
+    warning = logging.LogRecord("x", logging.WARNING, __file__, 1, "w", None, None)
+    info = logging.LogRecord("x", logging.INFO, __file__, 1, "i", None, None)
+
+    assert not sampler.filter(debug)
+    assert sampler.filter(warning)
+    assert sampler.filter(info)
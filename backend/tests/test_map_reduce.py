@@ -0,0 +1,142 @@
+"""Test map-reduce evaluation of documents larger than the prompt budget"""
+import asyncio
+import pytest
+from adapters.llm_interface import LLMInterface
+from services import map_reduce
+from services.evaluator import DocumentEvaluator
+from services.rubric_registry import get_rubrica
+
+
+@pytest.fixture
+def runbook(make_outline):
+    """Filler sections with the rollback plan at section 18"""
+    def build(n_sections=30, words=60):
+        return make_outline(*(
+            ("Plan de rollback", "rollback pasos detallados " * 5) if i == 17 else
+            (f"Sección {i}", f"texto {i} " * words)
+            for i in range(n_sections)
+        ), filename="runbook.docx")
+    return build
+
+
+class WindowLLM(LLMInterface):
+    """Cites the rollback section when its window is shown, tracks concurrency"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        raise NotImplementedError
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        self.calls.append(system_prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if "Plan de rollback" in prefix:
+            return {"estado": "CUMPLE", "justificacion": "Rollback descrito",
+                    "evidencia": [{"location": "[Section 18]", "snippet": "rollback pasos detallados"},
+                                  {"location": "Section 18", "snippet": "texto inventado"}]}
+        return {"estado": "NO", "justificacion": "Sin evidencia en la ventana", "evidencia": []}
+
+
+class NoEvidenceLLM(WindowLLM):
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        return await super().generate_json(prompt, system_prompt, prefix="")
+
+
+def test_windows_are_bounded_and_cover_every_section(runbook):
+    outline = runbook()
+    windows = map_reduce.build_windows(outline, window_tokens=200)
+
+    assert len(windows) > 1
+    assert all(w.tokens <= 200 + 1 for w in windows)
+    assert [i for w in windows for i in w.section_indices] == list(range(30))
+
+
+def test_oversized_section_is_split(runbook):
+    outline = runbook(n_sections=1, words=400)
+    windows = map_reduce.build_windows(outline, window_tokens=200)
+
+    assert len(windows) > 1
+    assert windows[0].locations[0].startswith("Section 1 (parte 1/")
+
+
+def test_rank_windows_prefers_keyword_hits(runbook):
+    outline = runbook()
+    windows = map_reduce.build_windows(outline, window_tokens=200)
+    criterios = get_rubrica().criterios_by_id
+
+    chosen = map_reduce.rank_windows(outline, windows, criterios["DTM-04"])
+
+    assert len(chosen) == 1 and 17 in chosen[0].section_indices
+    assert map_reduce.rank_windows(outline, windows, criterios["DTM-01"]) == windows
+
+
+def test_reduce_and_citation_checks():
+    text = "[Section 1] Alcance\nobjetivos"
+    window = map_reduce.Window(0, text, (0,), ("Section 1",), text.lower())
+    local = map_reduce.parse_local_verdict(window, {
+        "estado": "CUMPLE", "justificacion": "ok",
+        "evidencia": [{"location": "[Section 1]", "snippet": "objetivos"},
+                      {"location": "x", "snippet": "no existe"}]
+    })
+    assert local.evidencia == [{"location": "Section 1", "snippet": "...objetivos..."}]
+
+    no = map_reduce.LocalVerdict(1, "NO", "nada", [])
+    na = map_reduce.LocalVerdict(2, "NA", "no aplica", [])
+    assert map_reduce.reduce_verdicts([no, local, na]) == ("CUMPLE", "[ventana 1] ok")
+    assert map_reduce.reduce_verdicts([na])[0] == "NA"
+
+
+@pytest.mark.asyncio
+async def test_large_document_is_evaluated_window_by_window(runbook, monkeypatch):
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_MIN_TOKENS", 500)
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_WINDOW_TOKENS", 200)
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_CONCURRENCY", 2)
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    evaluator = DocumentEvaluator(runbook(), "DTM", "run-1")
+    evaluator.llm = WindowLLM()
+
+    criterios = {c.criterio_id: c for c in await evaluator.evaluate_criterios({})}
+
+    rollback = criterios["DTM-04"]
+    assert rollback.estado == "CUMPLE"
+    assert {"location": "Section 18", "snippet": "...rollback pasos detallados..."} in rollback.evidencia
+    assert all("inventado" not in e["snippet"] for e in rollback.evidencia)
+    assert set(evaluator.llm.calls) == {map_reduce.MAP_SYSTEM_PROMPT}
+    assert evaluator.llm.max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_windows_are_mapped_in_rounds_until_settled(runbook, monkeypatch):
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_MIN_TOKENS", 500)
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_WINDOW_TOKENS", 200)
+    monkeypatch.setattr("services.evaluator.settings.MAP_REDUCE_WINDOWS_PER_ROUND", 4)
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    evaluator = DocumentEvaluator(runbook(), "DTM", "run-1")
+    evaluator.llm = WindowLLM()
+    criterios = get_rubrica().criterios_by_id
+
+    # No keyword hits: windows go in document order until the rollback window (17) settles it
+    result = await evaluator.evaluate_single_criterio(criterios["DTM-01"], {})
+    assert result.estado == "CUMPLE"
+    assert len(evaluator.llm.calls) == 20
+
+    # Nothing settles it: every window is mapped
+    evaluator.llm = NoEvidenceLLM()
+    result = await evaluator.evaluate_single_criterio(criterios["DTM-01"], {})
+    assert result.estado == "NO"
+    assert len(evaluator.llm.calls) == len(evaluator._windows)
+
+
+@pytest.mark.asyncio
+async def test_small_document_keeps_single_call(runbook):
+    evaluator = DocumentEvaluator(runbook(n_sections=2, words=10), "DTM", "run-1")
+
+    assert not evaluator._uses_map_reduce()
+
@@ -0,0 +1,112 @@
+"""Test the schema migration runner"""
+import pytest
+from sqlalchemy import inspect, text
+from storage import database
+from storage.database import Base, build_engine
+from storage.migrations import MIGRATIONS, run_migrations
+
+# Schema created by the first release (Base.metadata.create_all, no migrations)
+BASELINE_SCHEMA = [
+    "CREATE TABLE runs (id VARCHAR NOT NULL PRIMARY KEY, created_at DATETIME, "
+    "filename VARCHAR NOT NULL, doc_type VARCHAR, doc_type_confidence FLOAT, decision VARCHAR, "
+    "score FLOAT, outline_json JSON, evaluation_json JSON, report_json JSON, detection_result_json JSON)",
+    "CREATE TABLE questions (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id VARCHAR NOT NULL, "
+    "question_id VARCHAR NOT NULL, question TEXT NOT NULL, answer TEXT, "
+    "priority VARCHAR, created_at DATETIME)",
+    "CREATE INDEX ix_questions_run_id ON questions (run_id)",
+    "CREATE TABLE findings (id INTEGER PRIMARY KEY AUTOINCREMENT, run_id VARCHAR NOT NULL, "
+    "finding_json JSON NOT NULL, created_at DATETIME)",
+    "CREATE INDEX ix_findings_run_id ON findings (run_id)",
+]
+
+
+def model_schema():
+    return {
+        table.name: ({c.name for c in table.columns}, {i.name for i in table.indexes})
+        for table in Base.metadata.sorted_tables
+    }
+
+
+async def schema_of(engine):
+    def read(conn):
+        inspector = inspect(conn)
+        return {
+            name: ({c["name"] for c in inspector.get_columns(name)},
+                   {i["name"] for i in inspector.get_indexes(name)})
+            for name in inspector.get_table_names() if name != "schema_migrations"
+        }
+    async with engine.connect() as conn:
+        return await conn.run_sync(read)
+
+
+async def seed_baseline(engine):
+    async with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            await conn.execute(text(statement))
+        await conn.execute(text(
+            "INSERT INTO runs (id, created_at, filename, doc_type, score) "
+            "VALUES ('r1', '2024-01-05 10:00:00', 'dtm.docx', 'DTM', 80.0)"
+        ))
+
+
+@pytest.mark.asyncio
+async def test_fresh_database_applies_all_once(tmp_path):
+    """Every migration runs on a new database, and none on the second start"""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'm.db'}", "sqlite")
+    try:
+        assert await run_migrations(engine) == [m.version for m in MIGRATIONS]
+        assert await run_migrations(engine) == []
+
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda c: inspect(c).get_table_names())
+        assert {"runs", "questions", "run_artifacts", "schema_migrations"} <= set(tables)
+        assert await schema_of(engine) == model_schema()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_legacy_database_is_deduped_and_indexed(tmp_path):
+    """Pre-migration databases with duplicate questions get the unique index"""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}", "sqlite")
+    try:
+        await seed_baseline(engine)
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO questions (run_id, question_id, question, answer) VALUES "
+                "('r1', 'Q1', '?', 'old'), ('r1', 'Q1', '?', 'new'), ('r1', 'Q2', '?', NULL)"
+            ))
+
+        await run_migrations(engine)
+
+        async with engine.connect() as conn:
+            answers = (await conn.execute(text(
+                "SELECT question_id, answer FROM questions ORDER BY question_id"
+            ))).all()
+            indexes = await conn.run_sync(lambda c: inspect(c).get_indexes("questions"))
+        assert [tuple(a) for a in answers] == [("Q1", "new"), ("Q2", None)]
+        assert any(i["name"] == "uq_questions_run_question" and i["unique"] for i in indexes)
+        assert await schema_of(engine) == model_schema()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_init_db_upgrades_baseline_database(tmp_path, monkeypatch):
+    """Startup on a first-release database adds the later columns and indexes"""
+    engine = build_engine(f"sqlite+aiosqlite:///{tmp_path / 'baseline.db'}", "sqlite")
+    monkeypatch.setattr(database, "engine", engine)
+    try:
+        await seed_baseline(engine)
+
+        await database.init_db()
+
+        async with engine.connect() as conn:
+            columns = await conn.run_sync(lambda c: [col["name"] for col in inspect(c).get_columns("runs")])
+            indexes = await conn.run_sync(lambda c: [i["name"] for i in inspect(c).get_indexes("runs")])
+            run = (await conn.execute(text("SELECT filename, upload_sha256 FROM runs"))).one()
+        assert "upload_sha256" in columns
+        assert {"ix_runs_upload_sha256", "ix_runs_created_at_id"} <= set(indexes)
+        assert tuple(run) == ("dtm.docx", None)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,83 @@
+"""Test deterministic pre-adjudication of clear-cut criterios"""
+import copy
+import pytest
+from services.evaluator import DocumentEvaluator
+from services.preadjudication import preadjudicate
+from services.rubric_registry import RubricValidationError, get_rubrica, parse_rubrica
+from utils.docx_parser import search_in_document
+from tests.test_prompt_caching import RecordingLLM
+
+BODY = " ".join(["detalle"] * 25)
+
+
+def adjudicate(outline, criterio_id, user_evidence=""):
+    criterio = get_rubrica().criterios_by_id[criterio_id]
+    evidencia = search_in_document(outline, criterio.evidencia_requerida,
+                                   criterio.evidencia_requerida_lower)
+    return preadjudicate(criterio, outline, evidencia, user_evidence)
+
+
+def test_no_evidence_is_settled_as_no(make_outline):
+    outline = make_outline(("Introducción", BODY))
+
+    estado, justificacion = adjudicate(outline, "DTM-04")
+
+    assert estado == "NO"
+    assert "rollback" in justificacion
+
+
+def test_keywords_in_dedicated_headings_settle_cumple(make_outline):
+    outline = make_outline(("Inventario", BODY), ("Volumetría", BODY), ("Dependencias", BODY))
+
+    estado, justificacion = adjudicate(outline, "DTM-02")
+
+    assert estado == "CUMPLE"
+    assert "'volumetría' en Section 2 (Volumetría)" in justificacion
+
+
+def test_ambiguous_criterios_go_to_llm(make_outline):
+    # Partial heading coverage, and a dedicated heading without a body
+    assert adjudicate(make_outline(("Inventario", BODY), ("Otros", "volumetría")), "DTM-02") is None
+    assert adjudicate(make_outline(("Inventario", ""), ("Volumetría", ""),
+                                   ("Dependencias", "")), "DTM-02") is None
+
+
+def test_user_evidence_always_goes_to_llm(make_outline):
+    outline = make_outline(("Introducción", BODY))
+
+    assert adjudicate(outline, "DTM-04", user_evidence="Tenemos un plan de rollback") is None
+
+
+def test_per_criterio_rules_override_defaults():
+    raw = copy.deepcopy(get_rubrica().raw)
+    criterio = raw["tipos_documentos_entregables"]["DTM"]["criterios"][1]
+    criterio["preadjudicacion"] = {"cobertura_minima_titulos": 0.5}
+    raw["preadjudicacion"]["no_sin_evidencia"] = False
+    rubrica = parse_rubrica(raw)
+
+    reglas = rubrica.criterios_by_id["DTM-02"].preadjudicacion
+    assert reglas.cobertura_minima_titulos == 0.5
+    assert reglas.no_sin_evidencia is False
+    assert rubrica.criterios_by_id["DTM-01"].preadjudicacion.cobertura_minima_titulos == 1.0
+
+    criterio["preadjudicacion"] = {"cobertura_minima_titulos": 0}
+    with pytest.raises(RubricValidationError):
+        parse_rubrica(raw)
+
+
+@pytest.mark.asyncio
+async def test_evaluator_records_which_path_decided(make_outline):
+    outline = make_outline(("Inventario", BODY), ("Volumetría", BODY), ("Dependencias", BODY),
+                           ("Estrategia", "scripts y herramientas"))
+    evaluator = DocumentEvaluator(outline, "DTM", "run-1")
+    evaluator.llm = RecordingLLM()
+
+    criterios = {c.criterio_id: c for c in await evaluator.evaluate_criterios({})}
+
+    assert criterios["DTM-02"].decidido_por == "reglas"
+    assert criterios["DTM-02"].puntos_obtenidos == criterios["DTM-02"].peso
+    assert criterios["DTM-04"].decidido_por == "reglas"
+    assert criterios["DTM-04"].estado == "NO"
+    assert criterios["DTM-03"].decidido_por == "llm"
+    llm_decided = [c for c in criterios.values() if c.decidido_por == "llm"]
+    assert len(evaluator.llm.calls) == len(llm_decided) < len(criterios)
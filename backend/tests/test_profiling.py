@@ -0,0 +1,77 @@
+"""Test on-demand profiling of run creation"""
+import marshal
+import pytest
+from utils.profiling import ADMIN_TOKEN_HEADER, PROFILE_HEADER, profile_run, profiling_reason
+
+TOKEN = "s3cret"
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    monkeypatch.setattr("utils.profiling.settings.PROFILING_ENABLED", True)
+    monkeypatch.setattr("utils.profiling.settings.PROFILING_ADMIN_TOKEN", TOKEN)
+
+
+async def upload(client, make_docx, headers=None):
+    with open(make_docx(), "rb") as f:
+        response = await client.post("/api/runs", files={"file": ("plan.docx", f)}, headers=headers or {})
+    assert response.status_code == 200
+    return response.json()["run_id"]
+
+
+def test_reason_requires_admin_token(profiling, monkeypatch):
+    assert profiling_reason({PROFILE_HEADER: TOKEN}) == "header"
+    assert profiling_reason({PROFILE_HEADER: "guess"}) is None
+    assert profiling_reason({}) is None
+
+    monkeypatch.setattr("utils.profiling.settings.PROFILING_SAMPLE_RATE", 1.0)
+    assert profiling_reason({}) == "sample"
+
+    monkeypatch.setattr("utils.profiling.settings.PROFILING_ENABLED", False)
+    assert profiling_reason({PROFILE_HEADER: TOKEN}) is None
+
+
+def test_profile_captures_functions_and_allocations():
+    def build():
+        return [str(i) * 10 for i in range(20000)]
+
+    with profile_run("run-1", "header") as profile:
+        data = build()
+    assert data
+
+    assert any("build" in f["function"] for f in profile.summary["top_functions"])
+    assert profile.summary["top_allocations"]
+    assert profile.summary["memory"]["peak_kb"] > 0
+    assert marshal.loads(profile.stats)
+
+
+def test_only_one_profile_at_a_time():
+    with profile_run("run-1", "header") as outer:
+        with profile_run("run-2", "header") as inner:
+            pass
+    assert outer is not None and inner is None
+
+
+@pytest.mark.asyncio
+async def test_profiled_run_stores_downloadable_artifacts(client, fake_llm, make_docx, profiling):
+    run_id = await upload(client, make_docx, {PROFILE_HEADER: TOKEN})
+
+    forbidden = await client.get(f"/api/runs/{run_id}/profile")
+    assert forbidden.status_code == 403
+
+    admin = {ADMIN_TOKEN_HEADER: TOKEN}
+    summary = (await client.get(f"/api/runs/{run_id}/profile", headers=admin)).json()
+    assert summary["reason"] == "header"
+    assert any("extract_document_structure" in f["function"] for f in summary["top_functions"])
+
+    download = await client.get(f"/api/runs/{run_id}/profile.prof", headers=admin)
+    assert download.status_code == 200
+    assert marshal.loads(download.content)
+
+
+@pytest.mark.asyncio
+async def test_unprofiled_run_has_no_profile(client, fake_llm, make_docx, profiling):
+    run_id = await upload(client, make_docx)
+
+    response = await client.get(f"/api/runs/{run_id}/profile", headers={ADMIN_TOKEN_HEADER: TOKEN})
+    assert response.status_code == 404
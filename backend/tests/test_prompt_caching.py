@@ -0,0 +1,88 @@
+"""Test prompt prefix/suffix split for provider caching"""
+import asyncio
+import pytest
+from adapters.llm_interface import LLMInterface
+from services.evaluator import DocumentEvaluator, SYSTEM_PROMPT
+
+
+class RecordingLLM(LLMInterface):
+    """Fake adapter that records every call"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        raise NotImplementedError
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        self.calls.append({"prompt": prompt, "system_prompt": system_prompt, "prefix": prefix})
+        self.record_usage(input_tokens=10, cache_read_input_tokens=100)
+        return {"estado": "CUMPLE", "justificacion": "OK"}
+
+
+class OverlapLLM(RecordingLLM):
+    """Records when calls start and end"""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        self.events.append("start")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        self.events.append("end")
+        return await super().generate_json(prompt, system_prompt, prefix)
+
+
+SECTIONS = (("Alcance", "objetivos del proyecto"), ("Plan de rollback", "pasos detallados"))
+
+
+@pytest.mark.asyncio
+async def test_document_prefix_is_shared_across_criterios(make_outline, monkeypatch):
+    """Every criterio call reuses the same system prompt and document prefix"""
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    evaluator = DocumentEvaluator(make_outline(*SECTIONS), "DTM", "run-1")
+    evaluator.llm = RecordingLLM()
+
+    await evaluator.evaluate_criterios({})
+
+    calls = evaluator.llm.calls
+    assert len(calls) == len(evaluator.criterios_config)
+    assert all(c["system_prompt"] == SYSTEM_PROMPT for c in calls)
+    assert len({c["prefix"] for c in calls}) == 1
+    assert "[Section 2] Plan de rollback" in calls[0]["prefix"]
+
+
+@pytest.mark.asyncio
+async def test_criterio_suffix_excludes_document(make_outline):
+    """Per-criterio suffix only carries criterio data and evidence"""
+    evaluator = DocumentEvaluator(make_outline(*SECTIONS), "DTM", "run-1")
+    evaluator.llm = RecordingLLM()
+
+    await evaluator.evaluate_criterios({})
+
+    suffix = evaluator.llm.calls[0]["prompt"]
+    assert "CRITERIO:" in suffix
+    assert "DOCUMENTO" not in suffix
+    assert "REGLAS ANTI-ALUCINACIÓN" not in suffix
+    assert evaluator.llm.usage["cache_read_input_tokens"] == 100 * len(evaluator.llm.calls)
+
+
+@pytest.mark.asyncio
+async def test_first_call_writes_the_cache_before_the_rest_fan_out(make_outline, monkeypatch):
+    """Criterios run concurrently, but only after one call has cached the shared prefix"""
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    evaluator = DocumentEvaluator(make_outline(*SECTIONS), "DTM", "run-1")
+    evaluator.llm = OverlapLLM()
+
+    results = await evaluator.evaluate_criterios({})
+
+    assert [r.criterio_id for r in results] == [c.id for c in evaluator.criterios_config]
+    assert evaluator.llm.events[:3] == ["start", "end", "start"]
+    assert evaluator.llm.max_in_flight == len(evaluator.criterios_config) - 1
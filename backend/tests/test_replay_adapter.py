@@ -0,0 +1,113 @@
+"""Test the record/replay/synthetic LLM adapter"""
+import asyncio
+import json
+import pytest
+from adapters.llm_factory import get_llm
+from adapters.llm_interface import LLMInterface
+from adapters.replay_adapter import (
+    RecordedLLMError, ReplayAdapter, ReplayMissError, SyntheticLLMError
+)
+from domain.models import DocumentOutline, DocumentSection
+from services.evaluator import DocumentEvaluator
+
+
+class UpstreamLLM(LLMInterface):
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        return f"texto:{prompt}"
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        if prompt == "falla":
+            raise TimeoutError("upstream timeout")
+        self.record_usage(input_tokens=100, output_tokens=20)
+        return {"estado": "PARCIAL", "justificacion": prompt}
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr("adapters.replay_adapter.settings.REPLAY_LATENCY_SCALE", 0.0)
+    monkeypatch.setattr("adapters.replay_adapter.settings.SYNTHETIC_LATENCY_MEAN_MS", 0.0)
+    monkeypatch.setattr("adapters.replay_adapter.settings.SYNTHETIC_LATENCY_STDDEV_MS", 0.0)
+
+
+@pytest.mark.asyncio
+async def test_recorded_calls_replay_by_prompt_hash(tmp_path, fast):
+    path = str(tmp_path / "rec.jsonl")
+    recorder = ReplayAdapter("record", path, upstream=UpstreamLLM())
+
+    assert await recorder.generate_json("p1", "sys", prefix="doc") == {"estado": "PARCIAL", "justificacion": "p1"}
+    assert await recorder.generate("p2") == "texto:p2"
+    with pytest.raises(TimeoutError):
+        await recorder.generate_json("falla")
+    assert recorder.usage["input_tokens"] == 100
+
+    replayer = ReplayAdapter("replay", path)
+    assert await replayer.generate_json("p1", "sys", prefix="doc") == {"estado": "PARCIAL", "justificacion": "p1"}
+    assert await replayer.generate("p2") == "texto:p2"
+    assert replayer.usage["output_tokens"] == 20
+    with pytest.raises(RecordedLLMError, match="upstream timeout"):
+        await replayer.generate_json("falla")
+    with pytest.raises(ReplayMissError):
+        await replayer.generate_json("p1", "otro sistema", prefix="doc")
+
+
+class HangingLLM(LLMInterface):
+    async def generate(self, prompt, system_prompt="", json_mode=False, prefix=""):
+        raise NotImplementedError
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_are_not_replayed(tmp_path, fast):
+    path = tmp_path / "rec.jsonl"
+    await ReplayAdapter("record", str(path), upstream=UpstreamLLM()).generate_json("p1")
+    call = asyncio.create_task(ReplayAdapter("record", str(path), upstream=HangingLLM()).generate_json("p2"))
+    await asyncio.sleep(0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert len(path.read_text().splitlines()) == 1
+    # Files recorded before cancelled calls were skipped may still hold them
+    with open(path, "a") as f:
+        f.write(json.dumps({"key": "x", "kind": "json", "latency_ms": 0.1, "usage": {}}) + "\n")
+
+    replayer = ReplayAdapter("replay", str(path))
+    assert (await replayer.generate_json("p1"))["justificacion"] == "p1"
+    with pytest.raises(ReplayMissError):
+        await replayer.generate_json("p2")
+    assert "x" not in replayer._recordings.by_key
+    assert len(replayer._recordings.latencies_ms) == 1
+
+
+@pytest.mark.asyncio
+async def test_synthetic_mode_is_deterministic(fast, monkeypatch):
+    first = [await ReplayAdapter("synthetic").generate_json(f"criterio {i}") for i in range(20)]
+    second = [await ReplayAdapter("synthetic").generate_json(f"criterio {i}") for i in range(20)]
+
+    assert first == second
+    assert {r["estado"] for r in first} <= {"CUMPLE", "PARCIAL", "NO"}
+
+    monkeypatch.setattr("adapters.replay_adapter.settings.SYNTHETIC_ERROR_RATE", 1.0)
+    with pytest.raises(SyntheticLLMError):
+        await ReplayAdapter("synthetic").generate_json("criterio 0")
+
+
+@pytest.mark.asyncio
+async def test_evaluator_runs_on_synthetic_provider(fast, monkeypatch):
+    monkeypatch.setattr("adapters.llm_factory.settings.LLM_PROVIDER", "replay")
+    monkeypatch.setattr("adapters.llm_factory.settings.REPLAY_MODE", "synthetic")
+    monkeypatch.setattr("services.evaluator.settings.PREADJUDICATION_ENABLED", False)
+    outline = DocumentOutline(
+        filename="dtm.docx", word_count=200, tables_count=0, has_toc=False,
+        sections=[DocumentSection(title="Alcance", level=1, content="Alcance\nobjetivos", location="Section 1")],
+    )
+
+    llm = get_llm()
+    while hasattr(llm, "inner"):
+        llm = llm.inner
+    assert isinstance(llm, ReplayAdapter)
+    evaluation = await DocumentEvaluator(outline, "DTM", "run-1").evaluate()
+
+    assert evaluation.criterios and all(c.decidido_por == "llm" for c in evaluation.criterios)
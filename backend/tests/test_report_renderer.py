@@ -0,0 +1,164 @@
+"""Test report rendering, caching and conditional exports"""
+import re
+import zlib
+from datetime import datetime
+import pytest
+from services.report_renderer import (
+    ReportCache, ReportContext, etag_matches, render_html, render_markdown, render_pdf
+)
+from tests.test_submit_answers import seed_run, submit
+
+REPORT = {
+    "score": 61.5,
+    "decision": "REQUIERE_CORRECCION",
+    "score_potencial": {"actual": 61.5, "si_corrige_p0": 70.0,
+                        "si_corrige_p0_p1": 85.0, "si_corrige_todo": 100.0},
+    "fail_fast": [
+        {"code": "FF-01", "name": "Sin alcance", "active": True,
+         "evidencia": "No hay sección", "explicacion": "Falta el alcance"},
+        {"code": "FF-02", "name": "Inactivo", "active": False, "evidencia": "", "explicacion": ""},
+    ],
+    "hallazgos": [
+        {"severidad": "bloqueante", "prioridad": "P0", "titulo": "Falta <alcance> (v2)",
+         "evidencia_detalle": "No encontrado", "recomendacion": "Agregar",
+         "que_agregar": "Sección", "donde_insertar": "Inicio",
+         "ejemplo_texto": "1. Alcance\n2. Objetivos", "impacto_estimado": 12.0},
+        {"severidad": "sugerencia", "prioridad": "P3", "titulo": "Glosario",
+         "evidencia_detalle": "-", "recomendacion": "-", "que_agregar": "-",
+         "donde_insertar": "-", "ejemplo_texto": "-", "impacto_estimado": 2.5},
+    ],
+}
+CTX = ReportContext("plan.docx", "DTM", datetime(2026, 3, 4, 9, 30), REPORT)
+
+
+def legacy_markdown(filename, doc_type, created_at, report):
+    """The string-concatenation exporter this renderer replaced"""
+    md = f"""# Rhino AI - Reporte de Evaluación
+
+**Documento:** {filename}  
+**Tipo:** {doc_type}  
+**Fecha:** {created_at.strftime('%Y-%m-%d %H:%M')}  
+
+---
+
+## Resultado
+
+**Score:** {report['score']:.2f}/100  
+**Decisión:** {report['decision']}  
+
+### Score Potencial
+- Actual: {report['score_potencial']['actual']}
+- Si corrige P0: {report['score_potencial']['si_corrige_p0']}
+- Si corrige P0+P1: {report['score_potencial']['si_corrige_p0_p1']}
+- Si corrige todo: {report['score_potencial']['si_corrige_todo']}
+
+---
+
+## Fail-Fast
+
+"""
+    for ff in report.get('fail_fast', []):
+        if ff['active']:
+            md += f"### ⛔ {ff['name']}\n"
+            md += f"**Evidencia:** {ff['evidencia']}\n\n"
+            md += f"{ff['explicacion']}\n\n"
+    md += "\n---\n\n## Hallazgos\n\n"
+    for h in report.get('hallazgos', []):
+        icon = {"bloqueante": "🔴", "mayor": "🟠", "menor": "🟡", "sugerencia": "🔵"}[h['severidad']]
+        md += f"### {icon} [{h['prioridad']}] {h['titulo']}\n\n"
+        md += f"**Severidad:** {h['severidad']}  \n"
+        md += f"**Evidencia:** {h['evidencia_detalle']}  \n\n"
+        md += f"**Recomendación:** {h['recomendacion']}\n\n"
+        md += f"**Qué agregar:** {h['que_agregar']}\n\n"
+        md += f"**Dónde:** {h['donde_insertar']}\n\n"
+        md += f"**Ejemplo:**\n```\n{h['ejemplo_texto']}\n```\n\n"
+        md += f"**Impacto estimado:** +{h['impacto_estimado']:.1f} puntos\n\n"
+        md += "---\n\n"
+    return md
+
+
+def test_markdown_identical_to_previous_exporter():
+    assert render_markdown(CTX) == legacy_markdown("plan.docx", "DTM", CTX.created_at, REPORT)
+
+
+def test_html_escapes_report_text():
+    html = render_html(CTX)
+
+    assert "Falta &lt;alcance&gt; (v2)" in html
+    assert "Inactivo" not in html
+    assert html.startswith("<!DOCTYPE html>") and html.endswith("</html>")
+
+
+def test_pdf_is_well_formed():
+    """xref offsets point at their objects and page text is present"""
+    pdf = render_pdf(CTX)
+
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    startxref = int(re.search(rb"startxref\n(\d+)", pdf).group(1))
+    assert pdf[startxref:].startswith(b"xref")
+    offsets = re.findall(rb"(\d{10}) 00000 n ", pdf)
+    for number, offset in enumerate(offsets, start=1):
+        assert pdf[int(offset):].startswith(b"%d 0 obj" % number)
+
+    streams = re.findall(rb"stream\n(.*?)\nendstream", pdf, re.S)
+    text = b"".join(zlib.decompress(s) for s in streams)
+    assert b"Falta <alcance> \\(v2\\)" in text
+    assert "Decisión".encode("cp1252") in text
+
+
+def test_long_reports_span_pages():
+    many = dict(REPORT, hallazgos=REPORT["hallazgos"] * 40)
+    pdf = render_pdf(ReportContext("plan.docx", "DTM", CTX.created_at, many))
+
+    assert int(re.search(rb"/Count (\d+)", pdf).group(1)) > 1
+
+
+def test_cache_is_lru_and_invalidates_per_run():
+    cache = ReportCache(max_entries=2)
+    cache.put("a", 1, "md", b"a1")
+    cache.put("b", 1, "md", b"b1")
+    cache.get("a", 1, "md")
+    cache.put("c", 1, "md", b"c1")
+
+    assert cache.get("b", 1, "md") is None
+    assert cache.get("a", 1, "md") == b"a1"
+    cache.invalidate("a")
+    assert cache.get("a", 1, "md") is None and len(cache) == 1
+
+
+def test_etag_matching():
+    assert etag_matches('"x", W/"r1-v2-md-r1"', '"r1-v2-md-r1"')
+    assert etag_matches("*", '"r1-v2-md-r1"')
+    assert not etag_matches('"r1-v1-md-r1"', '"r1-v2-md-r1"')
+    assert not etag_matches(None, '"r1-v2-md-r1"')
+
+
+@pytest.mark.asyncio
+async def test_export_conditional_get_and_invalidation(client, session_maker, fake_llm):
+    """Same version revalidates with 304; a new submission changes the ETag"""
+    await seed_run(session_maker, 2)
+    await submit(client, 1)
+
+    first = await client.get("/api/runs/run-1/export.md")
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/markdown")
+    etag = first.headers["etag"]
+
+    cached = await client.get("/api/runs/run-1/export.md", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    await submit(client, 2)
+    fresh = await client.get("/api/runs/run-1/export.md", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+
+    pdf = await client.get("/api/runs/run-1/export.pdf")
+    html = await client.get("/api/runs/run-1/export.html")
+    assert pdf.content.startswith(b"%PDF") and pdf.headers["content-type"] == "application/pdf"
+    assert html.text.startswith("<!DOCTYPE html>")
+
+
+@pytest.mark.asyncio
+async def test_export_missing_report(client):
+    response = await client.get("/api/runs/nope/export.pdf")
+    assert response.status_code == 404
@@ -0,0 +1,97 @@
+"""Test archiving and pruning of expired runs"""
+import gzip
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select
+from services.retention import prune_expired_runs
+from storage.artifacts import save_outline
+from storage.blob_store import blob_store
+from storage.database import Question, Run, RunArtifact
+from utils.config import settings
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+def retention_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "RETENTION_ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    monkeypatch.setattr(blob_store, "root", str(tmp_path / "blobs"))
+    (tmp_path / "uploads").mkdir()
+    return tmp_path
+
+
+async def add_run(session, run_id, age_days, upload_dir):
+    session.add(Run(id=run_id, filename="doc.docx", created_at=NOW - timedelta(days=age_days),
+                    evaluation_json={"score": 50}))
+    session.add(Question(run_id=run_id, question_id="Q1", question="?", answer="si"))
+    save_outline(session, run_id, {"filename": "doc.docx", "sections": []})
+    (upload_dir / f"{run_id}_doc.docx").write_bytes(b"docx")
+
+
+@pytest.mark.asyncio
+async def test_expired_runs_are_archived_then_pruned(session_maker, retention_settings):
+    """Old runs go to the archive with their questions; recent runs stay"""
+    uploads = retention_settings / "uploads"
+    async with session_maker() as session:
+        for i in range(5):
+            await add_run(session, f"old-{i}", 40 + i, uploads)
+        await add_run(session, "recent", 5, uploads)
+        await session.commit()
+
+    stats = await prune_expired_runs(session_maker, now=NOW)
+
+    assert stats.runs_archived == 5
+    assert stats.files_removed == 5
+    assert sorted(p.name for p in uploads.iterdir()) == ["recent_doc.docx"]
+
+    with gzip.open(stats.archive_path, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(r["run"]["id"] for r in records) == [f"old-{i}" for i in range(5)]
+    assert records[0]["questions"][0]["answer"] == "si"
+    assert records[0]["outline"]["filename"] == "doc.docx"
+
+    async with session_maker() as session:
+        assert (await session.scalars(select(Run.id))).all() == ["recent"]
+        assert await session.scalar(select(func.count()).select_from(Question)) == 1
+        assert await session.scalar(select(func.count()).select_from(RunArtifact)) == 1
+
+
+@pytest.mark.asyncio
+async def test_retention_disabled_keeps_everything(session_maker, retention_settings,
+                                                   monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_DAYS", 0)
+    async with session_maker() as session:
+        await add_run(session, "old", 400, retention_settings / "uploads")
+        await session.commit()
+
+    stats = await prune_expired_runs(session_maker, now=NOW)
+
+    assert stats.runs_archived == 0
+    async with session_maker() as session:
+        assert (await session.scalars(select(Run.id))).all() == ["old"]
+
+
+@pytest.mark.asyncio
+async def test_unreferenced_blobs_are_collected(session_maker, retention_settings, monkeypatch):
+    """Blobs survive while a run references them or while still in the grace period"""
+    monkeypatch.setattr(settings, "BLOB_GC_GRACE_SECONDS", -1)
+    kept, _ = blob_store.put(b"referenced")
+    orphan, _ = blob_store.put(b"orphan")
+    async with session_maker() as session:
+        session.add(Run(id="r1", filename="doc.docx", created_at=NOW, upload_sha256=kept))
+        await session.commit()
+
+    stats = await prune_expired_runs(session_maker, now=NOW)
+
+    assert stats.blobs_removed == 1
+    assert blob_store.exists(kept)
+    assert not blob_store.exists(orphan)
+
+    monkeypatch.setattr(settings, "BLOB_GC_GRACE_SECONDS", 3600)
+    fresh, _ = blob_store.put(b"just uploaded")
+    await prune_expired_runs(session_maker, now=NOW)
+    assert blob_store.exists(fresh)
@@ -0,0 +1,116 @@
+"""Test near-duplicate revision matching and verdict reuse"""
+import pytest
+from sqlalchemy import select
+from services.revision_reuse import PriorRevision, lineage_key
+from storage.database import Run, RunFingerprint
+from utils import minhash
+
+SECTIONS = [
+    ("Alcance y objetivos", "alcance objetivos sistemas origen sistemas destino de la migración"),
+    ("Inventario", "inventario volumetría dependencias de esquemas y aplicaciones"),
+    ("Estrategia", "estrategia por fases con herramientas y scripts automatizados"),
+    ("Cronograma", "cronograma ventanas hitos de la ventana de mantenimiento"),
+    *((f"Anexo {i}", f"notas operativas del anexo {i} sobre responsables y contactos") for i in range(7)),
+    # Section 12: past the sections shown in the single-call prompt prefix
+    ("Plan de rollback", "rollback criterios de activación pasos detallados para revertir"),
+]
+
+
+async def upload(client, make_docx, filename, sections):
+    path = make_docx(*((title, (body + " ") * 12) for title, body in sections), filename=filename)
+    with open(path, "rb") as f:
+        response = await client.post("/api/runs", files={"file": (filename, f)})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_lineage_key_strips_version_markers():
+    assert lineage_key("Plan_Migracion_v2.docx") == "plan_migracion"
+    assert lineage_key("plan-migracion v1.3 final.docx") == "plan_migracion"
+    assert lineage_key("plan migracion (1).docx") == "plan_migracion"
+    assert lineage_key("runbook_rev4.docx") == "runbook"
+
+
+def test_minhash_estimates_similarity_and_buckets_near_duplicates():
+    words = [f"w{i}" for i in range(400)]
+    base = minhash.signature(minhash.shingles(" ".join(words)))
+    edited = minhash.signature(minhash.shingles(" ".join(words[:390] + ["x"] * 10)))
+    other = minhash.signature(minhash.shingles(" ".join(f"z{i}" for i in range(400))))
+
+    assert minhash.similarity(base, base) == 1.0
+    assert minhash.similarity(base, edited) > 0.85
+    assert minhash.similarity(base, other) < 0.1
+    assert set(minhash.band_hashes(base)) & set(minhash.band_hashes(edited))
+    assert (minhash.from_bytes(minhash.to_bytes(base)) == base).all()
+
+
+@pytest.mark.asyncio
+async def test_new_revision_reuses_verdicts_of_unchanged_criterios(client, session_maker,
+                                                                   fake_llm, make_docx):
+    first = await upload(client, make_docx, "plan_migracion_v1.docx", SECTIONS)
+    calls_first = fake_llm.calls
+
+    edited = list(SECTIONS)
+    edited[-1] = ("Plan de rollback", "rollback revisado con pasos detallados nuevos")
+    second = await upload(client, make_docx, "plan_migracion_v2.docx", edited)
+
+    assert first["revision_of"] is None
+    assert second["revision_of"] == first["run_id"]
+    async with session_maker() as session:
+        evaluation = (await session.execute(
+            select(Run.evaluation_json).where(Run.id == second["run_id"])
+        )).scalar_one()
+        fingerprint = await session.get(RunFingerprint, second["run_id"])
+    decided = {c["criterio_id"]: c["decidido_por"] for c in evaluation["criterios"]}
+    assert decided["DTM-02"] == "reutilizado"
+    assert decided["DTM-04"] == "llm"
+    assert fake_llm.calls - calls_first == list(decided.values()).count("llm") < calls_first
+    assert fingerprint.parent_run_id == first["run_id"]
+
+
+@pytest.mark.asyncio
+async def test_edit_inside_the_prompt_prefix_blocks_reuse(client, session_maker, fake_llm, make_docx):
+    await upload(client, make_docx, "plan_migracion_v1.docx", SECTIONS)
+
+    edited = list(SECTIONS)
+    edited[6] = ("Anexo 2", "notas revisadas del anexo con otros responsables y contactos")
+    second = await upload(client, make_docx, "plan_migracion_v2.docx", edited)
+
+    async with session_maker() as session:
+        evaluation = (await session.execute(
+            select(Run.evaluation_json).where(Run.id == second["run_id"])
+        )).scalar_one()
+    assert second["revision_of"] is not None
+    assert all(c["decidido_por"] != "reutilizado" for c in evaluation["criterios"])
+
+
+def test_reuse_requires_cited_and_prompt_sections_unchanged():
+    keyword = {"location": "Section 2", "snippet": "...inventario...", "keyword": "inventario"}
+    cited = {"location": "Section 5", "snippet": "...volumetría..."}
+    verdict = {"criterio_id": "DTM-02", "estado": "CUMPLE", "justificacion": "ok",
+               "evidencia": [keyword, cited], "contexto": ["Section 1", "Section 2"]}
+
+    def lookup(unchanged, prior=verdict, evidencia=(keyword,)):
+        revision = PriorRevision("run-1", 0.9, {"DTM-02": prior}, frozenset(unchanged))
+        return revision.lookup("DTM-02", list(evidencia))
+
+    assert lookup({"Section 1", "Section 2", "Section 5"}) is verdict
+    assert lookup({"Section 1", "Section 2"}) is None  # cited section changed
+    assert lookup({"Section 2", "Section 5"}) is None  # prompt section changed
+
+    no_evidence = {**verdict, "evidencia": [], "contexto": ["Section 1"]}
+    assert lookup({"Section 2"}, no_evidence, ()) is None
+    assert lookup({"Section 1"}, no_evidence, ()) is no_evidence
+
+    legacy = {k: v for k, v in verdict.items() if k != "contexto"}
+    assert lookup({"Section 1", "Section 2", "Section 5"}, legacy) is None
+
+
+@pytest.mark.asyncio
+async def test_unrelated_document_is_evaluated_from_scratch(client, fake_llm, make_docx):
+    await upload(client, make_docx, "plan_migracion_v1.docx", SECTIONS)
+
+    other = [(title, f"contenido distinto {i} " * 5) for i, (title, _) in enumerate(SECTIONS)]
+    response = await upload(client, make_docx, "otro_documento_migracion.docx", other)
+
+    assert response["revision_of"] is None
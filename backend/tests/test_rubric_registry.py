@@ -0,0 +1,83 @@
+"""Test rubric registry parsing, indexing and hot-reload"""
+import copy
+import json
+import os
+import pytest
+from services.rubric_registry import (
+    RubricRegistry,
+    RubricValidationError,
+    parse_rubrica,
+    RUBRICA_PATH,
+    DETECTION_CONFIG_PATH,
+)
+
+
+@pytest.fixture
+def rubrica_raw():
+    with open(RUBRICA_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def config_files(tmp_path, rubrica_raw):
+    rubrica_path = tmp_path / "rubrica.json"
+    detection_path = tmp_path / "detection.json"
+    rubrica_path.write_text(json.dumps(rubrica_raw), encoding="utf-8")
+    detection_path.write_text(DETECTION_CONFIG_PATH.read_text(encoding="utf-8"), encoding="utf-8")
+    return rubrica_path, detection_path
+
+
+def test_criterios_indexed_by_id_and_type(rubrica_raw):
+    """Criterios are reachable by id and grouped by type with weight sums"""
+    rubrica = parse_rubrica(rubrica_raw)
+    dtm = rubrica.tipos["DTM"]
+
+    assert rubrica.criterios_by_id["DTM-04"] is dtm.criterios_by_id["DTM-04"]
+    assert dtm.peso_total == sum(c["peso"] for c in rubrica_raw["tipos_documentos_entregables"]["DTM"]["criterios"])
+    assert dtm.keywords_lower == tuple(k.lower() for k in dtm.keywords)
+    assert rubrica.umbral_aprobado == 85
+    assert rubrica.umbral_correccion == 70
+
+
+def test_duplicate_criterio_id_rejected(rubrica_raw):
+    """Duplicate criterio ids fail validation"""
+    criterios = rubrica_raw["tipos_documentos_entregables"]["DSP"]["criterios"]
+    criterios.append(copy.deepcopy(rubrica_raw["tipos_documentos_entregables"]["DTM"]["criterios"][0]))
+
+    with pytest.raises(RubricValidationError):
+        parse_rubrica(rubrica_raw)
+
+
+def test_invalid_severidad_rejected(rubrica_raw):
+    """Unknown severidad fails validation"""
+    rubrica_raw["tipos_documentos_entregables"]["DTM"]["criterios"][0]["severidad_si_falta"] = "critica"
+
+    with pytest.raises(RubricValidationError):
+        parse_rubrica(rubrica_raw)
+
+
+def test_hot_reload_swaps_snapshot(config_files, rubrica_raw):
+    """Changed files produce a new snapshot on reload"""
+    rubrica_path, detection_path = config_files
+    registry = RubricRegistry(rubrica_path, detection_path, reload_interval=0)
+    before = registry.current()
+
+    rubrica_raw["tipos_documentos_entregables"]["DTM"]["criterios"][0]["peso"] = 99
+    rubrica_path.write_text(json.dumps(rubrica_raw), encoding="utf-8")
+    os.utime(rubrica_path, ns=(before.signature[0][0] + 10**9,) * 2)
+
+    assert registry.reload() is True
+    assert registry.current() is not before
+    assert registry.current().rubrica.criterios_by_id["DTM-01"].peso == 99
+
+
+def test_invalid_reload_keeps_previous_snapshot(config_files):
+    """A broken file on disk never replaces the working snapshot"""
+    rubrica_path, detection_path = config_files
+    registry = RubricRegistry(rubrica_path, detection_path, reload_interval=0)
+    before = registry.current()
+
+    rubrica_path.write_text("{not json", encoding="utf-8")
+
+    assert registry.reload() is False
+    assert registry.current() is before
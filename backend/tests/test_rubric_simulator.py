@@ -0,0 +1,51 @@
+"""Test rubric what-if simulation"""
+import pytest
+from services.batch_scoring import RunScoringInput
+from services.rubric_registry import RubricValidationError, apply_overrides, get_rubrica
+from services.rubric_simulator import RubricSimulation
+
+
+def dtm_run(run_id, estado_default, **overrides):
+    rubrica = get_rubrica()
+    estados = {c.id: estado_default for c in rubrica.tipos["DTM"].criterios}
+    estados.update(overrides)
+    return RunScoringInput(run_id, "DTM", estados)
+
+
+def test_lower_threshold_flips_decisions():
+    """Lowering APROBADO threshold flips borderline runs"""
+    baseline = get_rubrica()
+    proposed = apply_overrides(baseline, umbrales_decision={"APROBADO": {"score_minimo": 75}})
+    simulation = RubricSimulation(baseline, proposed)
+
+    # r1 scores 75 with no bloqueantes; r2 scores 0
+    simulation.add_chunk([dtm_run("r1", "CUMPLE", **{"DTM-03": "NO", "DTM-06": "NO"}),
+                          dtm_run("r2", "NO")])
+    summary = simulation.summary()
+
+    dtm = summary["por_doc_type"]["DTM"]
+    assert dtm["runs"] == 2
+    assert dtm["flips"] == {"REQUIERE_CORRECCION->APROBADO": 1}
+    assert dtm["score_delta"]["mean"] == 0.0
+    assert summary["total"]["decision_flips"] == 1
+
+
+def test_weight_change_reports_score_delta():
+    """Re-weighting a criterio shifts scores across chunks"""
+    baseline = get_rubrica()
+    peso = baseline.criterios_by_id["DTM-01"].peso
+    proposed = apply_overrides(baseline, pesos={"DTM-01": peso * 3})
+    simulation = RubricSimulation(baseline, proposed)
+
+    simulation.add_chunk([dtm_run("r1", "NO", **{"DTM-01": "CUMPLE"})])
+    simulation.add_chunk([dtm_run("r2", "NO", **{"DTM-01": "CUMPLE"})])
+
+    dtm = simulation.summary()["por_doc_type"]["DTM"]
+    assert dtm["runs"] == 2
+    assert dtm["score_delta"]["min"] > 0
+
+
+def test_unknown_criterio_override_rejected():
+    """Overrides must target existing criterios"""
+    with pytest.raises(RubricValidationError):
+        apply_overrides(get_rubrica(), pesos={"NOPE-01": 10})
@@ -0,0 +1,64 @@
+"""Test run listing with keyset pagination"""
+from datetime import datetime, timedelta
+import pytest
+from storage.database import Run
+
+
+async def seed_runs(session_maker, n=7):
+    base = datetime(2026, 3, 1, 12, 0, 0)
+    async with session_maker() as session:
+        for i in range(n):
+            session.add(Run(
+                id=f"run-{i:02d}",
+                created_at=base + timedelta(hours=i // 2),  # pairs share created_at
+                filename=f"doc{i}.docx",
+                doc_type="DTM" if i % 2 else "DSP",
+                decision="APROBADO" if i >= 5 else "RECHAZADO",
+                score=float(i * 10),
+                outline_json={"sections": ["x" * 1000]},
+                evaluation_json={"score": i}
+            ))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_list_runs_pages_through_all_rows(client, session_maker):
+    """Keyset pages are newest first, disjoint and complete"""
+    await seed_runs(session_maker)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        body = (await client.get("/api/runs", params=params)).json()
+        seen.extend(item["run_id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [f"run-{i:02d}" for i in reversed(range(7))]
+
+
+@pytest.mark.asyncio
+async def test_list_runs_filters_and_projects_scalars(client, session_maker):
+    """Filters combine and items carry no JSON blobs"""
+    await seed_runs(session_maker)
+
+    response = await client.get("/api/runs", params={
+        "doc_type": "DTM", "decision": "RECHAZADO", "score_min": 20
+    })
+    items = response.json()["items"]
+
+    assert [i["run_id"] for i in items] == ["run-03"]
+    assert set(items[0]) == {"run_id", "filename", "doc_type", "doc_type_confidence",
+                             "decision", "score", "created_at"}
+
+
+@pytest.mark.asyncio
+async def test_list_runs_rejects_bad_cursor(client):
+    """Malformed cursors are a client error"""
+    response = await client.get("/api/runs", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
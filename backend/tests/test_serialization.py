@@ -0,0 +1,52 @@
+"""Test the encode-once response and storage path"""
+import json
+import math
+import pytest
+from sqlalchemy import select
+from storage.artifacts import load_outline
+from storage.database import Run
+from utils.json_codec import PreEncodedJSON, json_deserializer, json_serializer
+
+
+def test_pre_encoded_json_passes_through():
+    encoded = PreEncodedJSON('{"score":1.5,"texto":"ñ"}')
+
+    assert json_serializer(encoded) is encoded
+    assert json_serializer({"texto": "ñ", 1: True}) == '{"texto":"ñ","1":true}'
+
+
+def test_deserializer_reads_legacy_nan():
+    assert math.isnan(json_deserializer('{"x": NaN}')["x"])
+
+
+SECTIONS = (
+    ("Plan de Migración", "migración de datos rollback cutover " * 40),
+    ("Plan de Rollback", "rollback pasos detallados inventario volumetría " * 20),
+)
+
+
+@pytest.mark.asyncio
+async def test_create_run_response_matches_stored_models(client, session_maker, fake_llm, make_docx):
+    """One encoding feeds both the response and the stored rows"""
+    with open(make_docx(*SECTIONS, filename="plan_migracion_v1.docx"), "rb") as f:
+        response = await client.post("/api/runs", files={"file": ("plan_migracion_v1.docx", f)})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["preliminary_evaluation"]) == {"score", "decision", "fail_fast", "score_potencial"}
+    assert all({"id", "pregunta", "prioridad"} <= set(q) for q in body["preguntas"])
+
+    async with session_maker() as session:
+        run = (await session.execute(
+            select(Run.evaluation_json).where(Run.id == body["run_id"])
+        )).scalar_one()
+        assert await load_outline(session, body["run_id"]) == body["outline"]
+    assert body["outline"]["filename"] == "plan_migracion_v1.docx"
+    assert run["score"] == body["preliminary_evaluation"]["score"]
+    assert run["preguntas"] == body["preguntas"]
+
+    answers = [{"question_id": q["id"], "answer": "si"} for q in body["preguntas"]]
+    submitted = await client.post(f"/api/runs/{body['run_id']}/answers", json={"answers": answers})
+    exported = await client.get(f"/api/runs/{body['run_id']}/export.json")
+    assert submitted.headers["content-type"] == "application/json"
+    assert json.loads(submitted.content) == exported.json()
@@ -0,0 +1,97 @@
+"""Test speculative evaluation of both candidates on close detection ties"""
+import asyncio
+import pytest
+from domain.models import DocumentOutline, DocumentSection
+from services.classifier import evaluate_with_speculative_tiebreak, tie_candidates
+
+
+def make_detection(top1="DSP", top2="DTC", gap=2.0):
+    return {
+        "tipo_detectado": top1,
+        "confianza": 0.7,
+        "razon": "empate cercano",
+        "top3": [
+            {"type": top1, "score": 60.0, "why": "3 signals"},
+            {"type": top2, "score": 60.0 - gap, "why": "2 signals"},
+            {"type": "DTM", "score": 10.0, "why": "0 signals"},
+        ],
+    }
+
+
+OUTLINE = DocumentOutline(
+    filename="x.docx", word_count=200, tables_count=0, has_toc=False,
+    sections=[DocumentSection(title="APIs", level=1, content="APIs\nendpoints", location="Section 1")],
+)
+
+
+class SlowEvaluator:
+    """Stands in for DocumentEvaluator; records start and cancellation"""
+
+    def __init__(self, doc_type, started):
+        self.doc_type = doc_type
+        self.started = started
+        self.cancelled = False
+
+    async def evaluate(self):
+        self.started.append(self.doc_type)
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f"evaluation:{self.doc_type}"
+
+
+class TiebreakLLM:
+    def __init__(self, winner, started):
+        self.winner = winner
+        self.started = started
+        self.seen_started = None
+
+    async def generate_json(self, prompt, system_prompt="", prefix=""):
+        await asyncio.sleep(0)
+        # Both evaluations are already running when the tiebreaker answers
+        self.seen_started = list(self.started)
+        return {"winner": self.winner, "reasoning": "más endpoints"}
+
+
+def test_tie_candidates():
+    assert tie_candidates(make_detection(gap=2.0)) == ("DSP", "DTC")
+    assert tie_candidates(make_detection(gap=20.0)) is None
+    assert tie_candidates({**make_detection(), "tipo_detectado": "UNKNOWN"}) is None
+
+
+@pytest.mark.asyncio
+async def test_loser_is_cancelled_once_tiebreaker_resolves(monkeypatch):
+    started = []
+    llm = TiebreakLLM("DTC", started)
+    monkeypatch.setattr("services.classifier.get_llm", lambda: llm)
+    evaluators = {t: SlowEvaluator(t, started) for t in ("DSP", "DTC")}
+    detection = make_detection()
+
+    doc_type, evaluation = await evaluate_with_speculative_tiebreak(OUTLINE, "run-1", detection, evaluators)
+
+    assert (doc_type, evaluation) == ("DTC", "evaluation:DTC")
+    assert sorted(llm.seen_started) == ["DSP", "DTC"]
+    assert evaluators["DSP"].cancelled and not evaluators["DTC"].cancelled
+    assert detection["tipo_detectado"] == "DTC"
+    assert "LLM tiebreaker" in detection["razon"]
+
+
+@pytest.mark.asyncio
+async def test_failed_tiebreaker_keeps_deterministic_winner(monkeypatch):
+    class BrokenLLM:
+        async def generate_json(self, prompt, system_prompt="", prefix=""):
+            await asyncio.sleep(0)
+            raise RuntimeError("timeout")
+
+    started = []
+    monkeypatch.setattr("services.classifier.get_llm", lambda: BrokenLLM())
+    evaluators = {t: SlowEvaluator(t, started) for t in ("DSP", "DTC")}
+
+    doc_type, evaluation = await evaluate_with_speculative_tiebreak(
+        OUTLINE, "run-1", make_detection(), evaluators
+    )
+
+    assert (doc_type, evaluation) == ("DSP", "evaluation:DSP")
+    assert evaluators["DTC"].cancelled
@@ -0,0 +1,72 @@
+"""Test answer submission persistence"""
+import pytest
+from sqlalchemy import event, select
+from storage.database import Run, Question
+from storage.artifacts import load_report
+
+OUTLINE = {
+    "filename": "dtm.docx",
+    "word_count": 300,
+    "sections": [{"title": "Alcance", "level": 1, "content": "Alcance\nobjetivos", "location": "Section 1"}],
+    "tables_count": 0,
+    "has_toc": False,
+    "metadata": {}
+}
+
+
+async def seed_run(session_maker, n_questions):
+    async with session_maker() as session:
+        session.add(Run(id="run-1", filename="dtm.docx", doc_type="DTM", outline_json=OUTLINE))
+        for i in range(n_questions):
+            session.add(Question(run_id="run-1", question_id=f"Q-DTM-{i:02d}",
+                                 question=f"Pregunta {i}", priority="P1"))
+        await session.commit()
+
+
+def count_statements(session_maker):
+    engine = session_maker.kw["bind"].sync_engine
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, stmt, params, context, executemany: statements.append(stmt))
+    return statements
+
+
+async def submit(client, n_answers):
+    answers = [{"question_id": f"Q-DTM-{i:02d}", "answer": f"respuesta {i}"} for i in range(n_answers)]
+    return await client.post("/api/runs/run-1/answers", json={"answers": answers})
+
+
+@pytest.mark.asyncio
+async def test_submit_answers_constant_queries(client, session_maker, fake_llm):
+    """Query count does not depend on the number of answers"""
+    await seed_run(session_maker, 8)
+    statements = count_statements(session_maker)
+
+    counts = []
+    for n_answers in (1, 8):
+        statements.clear()
+        response = await submit(client, n_answers)
+        assert response.status_code == 200
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1]
+    assert sum("UPDATE questions" in s for s in statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_submit_answers_persists_answers_and_report(client, session_maker, fake_llm):
+    """Answers and the re-evaluated report are stored together"""
+    await seed_run(session_maker, 3)
+
+    response = await submit(client, 2)
+
+    assert response.json()["decision"] == "APROBADO"
+    async with session_maker() as session:
+        answers = (await session.execute(
+            select(Question.question_id, Question.answer).order_by(Question.question_id)
+        )).all()
+        run = await session.get(Run, "run-1")
+        report = await load_report(session, "run-1")
+    assert [a.answer for a in answers] == ["respuesta 0", "respuesta 1", None]
+    assert run.decision == "APROBADO"
+    assert report["score"] == 100.0
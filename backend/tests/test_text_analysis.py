@@ -0,0 +1,62 @@
+"""Test the shared per-run text analysis context"""
+from services.classifier import heuristic_classification
+from services.doc_type_detector import (
+    DETECTION_CONFIG, check_structural_patterns, detect_document_type, extract_features
+)
+from utils.docx_parser import search_in_document
+from utils.text_analysis import TextAnalysisContext, fold_accents
+
+
+SECTIONS = (
+    ("Plan de Migración", "Inventario de datos y cronograma"),
+    ("Plan de Rollback", "Pasos de rollback y validación"),
+)
+
+
+def test_views_are_computed_once():
+    context = TextAnalysisContext("Parámetros de Configuración", ["Uno", "DOS"])
+
+    assert context.lower is context.lower
+    assert context.folded == "parametros de configuracion"
+    assert context.tokens == {"parámetros", "de", "configuración"}
+    assert context.heading_set == {"uno", "dos"}
+    assert context.headings_text == "uno dos"
+    assert context.count("de") == 1 and context.contains("configuración")
+
+
+def test_fold_accents():
+    assert fold_accents("Causa Raíz, Ñandú") == "causa raiz, nandu"
+
+
+def test_outline_analysis_is_shared_across_stages(make_outline):
+    """Detector, classifier and evidence search all use the outline's one context"""
+    outline = make_outline(*SECTIONS, filename="plan_migracion.docx")
+    analysis = outline.analysis
+
+    detect_document_type(outline.filename, outline.headings, [], outline.full_text,
+                         context=analysis)
+    heuristic_classification(outline)
+    search_in_document(outline, ["Rollback"])
+
+    assert outline.analysis is analysis
+    assert analysis.lower is outline.full_text_lower
+    assert analysis.section_hits("rollback") == ((1, 8),)
+
+
+def test_search_in_document_keeps_section_then_keyword_order(make_outline):
+    outline = make_outline(*SECTIONS, filename="plan_migracion.docx")
+
+    evidence = search_in_document(outline, ["cronograma", "Plan"])
+
+    assert [(e["location"], e["keyword"]) for e in evidence] == [
+        ("Section 1", "cronograma"), ("Section 1", "Plan"), ("Section 2", "Plan")
+    ]
+
+
+def test_pattern_results_are_cached_per_detection():
+    features = extract_features("x.docx", ["Rollback"], [], "inventario de datos")
+
+    first = check_structural_patterns("DTM", features, DETECTION_CONFIG)
+
+    assert features["pattern_results"]
+    assert check_structural_patterns("DTM", features, DETECTION_CONFIG) == first
@@ -0,0 +1,82 @@
+"""Test per-run span timelines"""
+import asyncio
+import pytest
+from utils.tracing import set_attribute, span, start_trace
+
+
+def test_spans_nest_and_record_attributes():
+    with start_trace("create", "run-1") as trace:
+        with span("parse"):
+            set_attribute("sections", 3)
+        with span("evaluate"):
+            with span("criterio", criterio_id="DTM-01"):
+                pass
+
+    data = trace.to_dict()
+    spans = {s["name"]: s for s in data["spans"]}
+    assert [s["name"] for s in data["spans"]] == ["create", "parse", "evaluate", "criterio"]
+    assert spans["parse"]["attributes"] == {"sections": 3}
+    assert spans["criterio"]["parent_id"] == spans["evaluate"]["id"]
+    assert spans["criterio"]["depth"] == 2
+    assert data["duration_ms"] >= spans["evaluate"]["duration_ms"]
+
+
+def test_span_outside_trace_is_noop():
+    with span("parse") as current:
+        set_attribute("ignored", True)
+    assert current is None
+
+
+@pytest.mark.asyncio
+async def test_failed_and_cancelled_spans_are_marked():
+    async def slow():
+        with span("llm.call"):
+            await asyncio.sleep(1)
+
+    with start_trace("create", "run-1") as trace:
+        task = asyncio.create_task(slow())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        with pytest.raises(ValueError):
+            with span("scoring"):
+                raise ValueError("boom")
+
+    spans = {s["name"]: s for s in trace.to_dict()["spans"]}
+    assert spans["llm.call"]["status"] == "cancelled"
+    assert spans["llm.call"]["parent_id"] == spans["create"]["id"]
+    assert spans["scoring"]["status"] == "error"
+    assert spans["scoring"]["attributes"]["error"] == "ValueError: boom"
+
+
+def test_span_limit_drops_extra_spans(monkeypatch):
+    monkeypatch.setattr("utils.tracing.settings.TRACE_MAX_SPANS", 2)
+    with start_trace("create", "run-1") as trace:
+        for _ in range(3):
+            with span("criterio"):
+                pass
+
+    assert len(trace.spans) == 2
+    assert trace.to_dict()["dropped_spans"] == 2
+
+
+@pytest.mark.asyncio
+async def test_run_trace_is_stored_and_served(client, fake_llm, make_docx):
+    with open(make_docx(), "rb") as f:
+        created = await client.post("/api/runs", files={"file": ("plan.docx", f)})
+    run_id = created.json()["run_id"]
+
+    response = await client.get(f"/api/runs/{run_id}/trace")
+
+    assert response.status_code == 200
+    trace = response.json()["traces"][0]
+    names = [s["name"] for s in trace["spans"]]
+    assert names[0] == "create"
+    assert {"upload.write", "parse", "detection", "evaluate", "scoring", "db.commit"} <= set(names)
+    criterios = [s for s in trace["spans"] if s["name"] == "criterio"]
+    assert criterios and all(s["attributes"]["decidido_por"] for s in criterios)
+    assert "llm.call" in names
+
+    missing = await client.get("/api/runs/nope/trace")
+    assert missing.status_code == 404
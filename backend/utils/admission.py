@@ -0,0 +1,144 @@
+"""
+Admission control with priority lanes
+A PriorityLimiter caps how much work runs at once. Waiters queue per lane
+and are admitted in lane priority order: interactive re-evaluations
+(POST /runs/{id}/answers), then uploads (POST /runs), then batch jobs.
+Slots reserved for the interactive lane are never taken by the other lanes,
+so a burst of uploads cannot starve users answering questions. When a lane's
+queue is at its configured depth, acquire raises AdmissionRejected with a
+Retry-After estimate.
+
+Two limiters exist: `run_admission` for whole runs and `llm_limiter` for
+individual LLM calls; the latter uses the lane of the run that issues the
+call (carried in a contextvar).
+"""
+import asyncio
+import contextvars
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from utils.config import settings
+from utils.metrics import metrics
+
+LANES = ("interactive", "upload", "batch")  # priority order
+HOLD_EWMA_ALPHA = 0.2
+
+_current_lane: contextvars.ContextVar[str] = contextvars.ContextVar("admission_lane", default="upload")
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+def lane_context() -> contextvars.Context:
+    """A fresh context carrying only the current admission lane (e.g. for detached tasks)"""
+    context = contextvars.Context()
+    context.run(_current_lane.set, current_lane())
+    return context
+
+
+class AdmissionRejected(Exception):
+    """Lane queue is full; the client should retry after `retry_after` seconds"""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Admission queue full for {lane} work")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class PriorityLimiter:
+    def __init__(self, name: str, capacity: int, reserved_interactive: int = 0,
+                 max_queue: Optional[Dict[str, int]] = None):
+        self.name = name
+        self.capacity = capacity  # 0 disables the limiter
+        self.reserved_interactive = reserved_interactive
+        self.max_queue = max_queue or {}
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self._hold_seconds: Optional[float] = None
+
+        self.wait = {lane: metrics.histogram(f"{name}.wait_seconds.{lane}") for lane in LANES}
+        self.rejected = {lane: metrics.counter(f"{name}.rejected.{lane}") for lane in LANES}
+        metrics.gauge(f"{name}.in_flight", lambda: self.in_flight)
+        for lane in LANES:
+            metrics.gauge(f"{name}.queued.{lane}", lambda lane=lane: len(self._queues[lane]))
+
+    def _limit(self, lane: str) -> int:
+        if lane == "interactive":
+            return self.capacity
+        return max(1, self.capacity - self.reserved_interactive)
+
+    def _waiters_ahead(self, lane: str) -> int:
+        """Queued work admitted before a new `lane` request (same or higher priority)"""
+        return sum(len(self._queues[l]) for l in LANES[:LANES.index(lane) + 1])
+
+    def retry_after(self, lane: str) -> int:
+        """Seconds until a slot likely frees for `lane`, from the average hold time"""
+        hold = self._hold_seconds if self._hold_seconds is not None else 1.0
+        estimate = hold * (self._waiters_ahead(lane) + 1) / self._limit(lane)
+        return max(1, min(settings.ADMISSION_RETRY_AFTER_MAX_SECONDS, math.ceil(estimate)))
+
+    @asynccontextmanager
+    async def acquire(self, lane: str) -> AsyncIterator[None]:
+        """Hold one slot in `lane` for the duration of the block"""
+        if self.capacity <= 0:
+            token = _current_lane.set(lane)
+            try:
+                yield
+            finally:
+                _current_lane.reset(token)
+            return
+
+        start = time.perf_counter()
+        if not self._waiters_ahead(lane) and self.in_flight < self._limit(lane):
+            self.in_flight += 1
+        else:
+            depth = self.max_queue.get(lane)
+            if depth is not None and len(self._queues[lane]) >= depth:
+                self.rejected[lane].inc()
+                raise AdmissionRejected(lane, self.retry_after(lane))
+            waiter = asyncio.get_running_loop().create_future()
+            self._queues[lane].append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # slot was granted as we were cancelled
+                elif waiter in self._queues[lane]:
+                    self._queues[lane].remove(waiter)
+                raise
+        self.wait[lane].observe(time.perf_counter() - start)
+
+        token = _current_lane.set(lane)
+        held_from = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+            held = time.perf_counter() - held_from
+            self._hold_seconds = held if self._hold_seconds is None else (
+                HOLD_EWMA_ALPHA * held + (1 - HOLD_EWMA_ALPHA) * self._hold_seconds
+            )
+            self._release()
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and self.in_flight < self._limit(lane):
+                waiter = queue.popleft()
+                if not waiter.done():  # skip waiters cancelled while queued
+                    self.in_flight += 1
+                    waiter.set_result(None)
+
+
+run_admission = PriorityLimiter(
+    "admission.runs",
+    settings.ADMISSION_MAX_INFLIGHT_RUNS,
+    reserved_interactive=settings.ADMISSION_INTERACTIVE_RESERVED,
+    max_queue=settings.ADMISSION_QUEUE_DEPTH,
+)
+llm_limiter = PriorityLimiter("admission.llm", settings.ADMISSION_MAX_LLM_CALLS)
@@ -1,6 +1,6 @@
 """Configuration management"""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -15,15 +15,110 @@ class Settings(BaseSettings):
     ANTHROPIC_MODEL: str = "claude-3-5-sonnet-20241022"
     ANTHROPIC_MAX_TOKENS: int = 4000
     ANTHROPIC_TEMPERATURE: float = 0.1
+    ANTHROPIC_PROMPT_CACHING: bool = True
+    
+    # Concurrent identical prompts share one in-flight provider call
+    LLM_COALESCING_ENABLED: bool = True
+    
+    # Record/replay adapter (LLM_PROVIDER=replay): REPLAY_MODE is "record"
+    # (wraps REPLAY_UPSTREAM_PROVIDER), "replay" or "synthetic"
+    REPLAY_MODE: str = "replay"
+    REPLAY_FILE: str = "/tmp/rhino_llm_recording.jsonl"
+    REPLAY_UPSTREAM_PROVIDER: str = "openai"
+    REPLAY_LATENCY_MODE: str = "recorded"  # "recorded" per prompt or "distribution"
+    REPLAY_LATENCY_SCALE: float = 1.0
+    SYNTHETIC_LATENCY_MEAN_MS: float = 800.0
+    SYNTHETIC_LATENCY_STDDEV_MS: float = 200.0
+    SYNTHETIC_ERROR_RATE: float = 0.0
+    SYNTHETIC_SEED: int = 0
+    
+    # Settle clear-cut criterios with the rubric's pre-adjudication rules
+    # instead of calling the LLM
+    PREADJUDICATION_ENABLED: bool = True
+    
+    # Reuse verdicts from the closest prior revision (same filename lineage
+    # or MinHash similarity) for criterios whose evidence did not change
+    REVISION_REUSE_ENABLED: bool = True
+    REVISION_MIN_SIMILARITY: float = 0.8
+    REVISION_LINEAGE_MIN_SIMILARITY: float = 0.5
+    REVISION_CANDIDATES_MAX: int = 50
+    
+    # On a close detection tie, run the LLM tiebreaker and the evaluations of
+    # both candidate types concurrently, cancelling the loser (costs the
+    # loser's partial LLM calls; off keeps the deterministic winner)
+    SPECULATIVE_TIE_EVALUATION: bool = False
+    
+    # Map-reduce evaluation for documents above MAP_REDUCE_MIN_TOKENS
+    # (estimated): each criterio is assessed over token-bounded windows in
+    # parallel, then merged ("deterministic" or "llm" reducer). Windows are
+    # mapped MAP_REDUCE_WINDOWS_PER_ROUND at a time; later rounds run only
+    # while no window has met the criterio
+    MAP_REDUCE_ENABLED: bool = True
+    MAP_REDUCE_MIN_TOKENS: int = 8000
+    MAP_REDUCE_WINDOW_TOKENS: int = 6000
+    MAP_REDUCE_CONCURRENCY: int = 4
+    MAP_REDUCE_WINDOWS_PER_ROUND: int = 8
+    MAP_REDUCE_REDUCER: str = "deterministic"
     
     # Database
     DATABASE_TYPE: str = "sqlite"
     DATABASE_URL: str = "sqlite:///./rhinoai.db"
     
+    # Postgres pool profile
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    
+    # SQLite profile
+    SQLITE_POOL_SIZE: int = 5
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MB
+    
     # Backend
     BACKEND_PORT: int = 8000
     UPLOAD_DIR: str = "/tmp/rhino_uploads"
+    # Content-addressed uploads (default: UPLOAD_DIR/blobs); unreferenced
+    # blobs are removed after the grace period
+    BLOB_STORE_DIR: str = ""
+    BLOB_GC_GRACE_SECONDS: float = 3600.0
     LOG_LEVEL: str = "INFO"
+    # Records wait in a bounded queue for the writer thread; overflow is dropped
+    # and counted. Levels below WARNING may be sampled, e.g. {"DEBUG": 0.1}
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
+    
+    # Per-run span timelines (GET /runs/{run_id}/trace); TRACING_OTEL mirrors
+    # spans to the OpenTelemetry API when it is installed
+    TRACING_ENABLED: bool = True
+    TRACING_OTEL: bool = False
+    TRACE_MAX_SPANS: int = 2000
+    
+    # On-demand profiling of POST /runs (cProfile + tracemalloc): requests
+    # carrying X-Rhino-Profile with the admin token, or a sampled fraction
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_ADMIN_TOKEN: str = ""
+    
+    # Admission control (0 disables a cap). Runs queue per lane in priority
+    # order: interactive (answers) > upload > batch; a full lane queue gets
+    # 429 with Retry-After. Interactive work keeps ADMISSION_INTERACTIVE_RESERVED
+    # run slots for itself
+    ADMISSION_MAX_INFLIGHT_RUNS: int = 16
+    ADMISSION_INTERACTIVE_RESERVED: int = 2
+    ADMISSION_QUEUE_DEPTH: Dict[str, int] = {"interactive": 64, "upload": 32, "batch": 4}
+    ADMISSION_MAX_LLM_CALLS: int = 32
+    ADMISSION_RETRY_AFTER_MAX_SECONDS: int = 60
+    
+    # Retention (0 keeps runs forever); expired runs are archived, then pruned
+    RETENTION_DAYS: int = 0
+    RETENTION_ARCHIVE_DIR: str = "/tmp/rhino_archive"
+    RETENTION_BATCH_SIZE: int = 500
+    RETENTION_INTERVAL_SECONDS: float = 3600.0
+    
+    # Rubric hot-reload (seconds between mtime checks, 0 disables)
+    RUBRIC_RELOAD_INTERVAL_SECONDS: float = 5.0
     
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -1,23 +1,25 @@
 """DOCX parsing utilities"""
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 from docx import Document
 from docx.table import Table
 from docx.text.paragraph import Paragraph
-from domain.models import DocumentOutline, DocumentSection
+from domain.compact_outline import CompactOutlineBuilder
+from domain.models import DocumentOutline
 
 logger = logging.getLogger(__name__)
 
 
-def extract_document_structure(file_path: str) -> DocumentOutline:
+def extract_document_structure(file_path: str, filename: Optional[str] = None) -> DocumentOutline:
     """
     Extract complete structure from DOCX file
+    `filename` is the original upload name (blob paths carry only the hash)
     Returns: DocumentOutline with sections, tables, metadata
     """
     try:
         doc = Document(file_path)
         
-        sections = []
+        builder = CompactOutlineBuilder()
         word_count = 0
         tables_count = len(doc.tables)
         has_toc = False
@@ -54,15 +56,12 @@ def extract_document_structure(file_path: str) -> DocumentOutline:
                                    for l in range(1, level + 1) 
                                    if section_counter[str(l)] > 0])
                 
-                sections.append(DocumentSection(
-                    title=text,
-                    level=level,
-                    content=text,
-                    location=f"Section {location}"
-                ))
-            elif len(sections) > 0:
-                # Append content to last section
-                sections[-1].content += f"\n{text}"
+                builder.add_heading(text, level, f"Section {location}")
+            else:
+                # Append content to last section (no-op before the first heading)
+                builder.add_paragraph(text)
+        
+        compact = builder.build()
         
         # Extract metadata
         metadata = {
@@ -73,10 +72,11 @@ def extract_document_structure(file_path: str) -> DocumentOutline:
             "subject": doc.core_properties.subject or "",
         }
         
-        return DocumentOutline(
-            filename=file_path.split("/")[-1],
+        # Sections are views over the compact buffer; their text is not copied
+        return DocumentOutline.from_compact(
+            compact,
+            filename=filename or file_path.split("/")[-1],
             word_count=word_count,
-            sections=sections,
             tables_count=tables_count,
             has_toc=has_toc,
             metadata=metadata
@@ -87,28 +87,35 @@ def extract_document_structure(file_path: str) -> DocumentOutline:
         raise
 
 
-def search_in_document(outline: DocumentOutline, keywords: List[str]) -> List[Dict[str, str]]:
+def search_in_document(outline: DocumentOutline, keywords: Sequence[str],
+                       keywords_lower: Optional[Sequence[str]] = None) -> List[Dict[str, str]]:
     """
     Search for keywords in document and return evidence
+    `keywords_lower` may carry pre-lowercased keywords (same order)
     Returns: [{"location": "Section X", "snippet": "..."}]
     """
     evidence = []
+    if keywords_lower is None:
+        keywords_lower = [k.lower() for k in keywords]
     
-    for section in outline.sections:
-        content_lower = section.content.lower()
-        
-        for keyword in keywords:
-            if keyword.lower() in content_lower:
-                # Extract snippet (50 chars before and after)
-                idx = content_lower.find(keyword.lower())
-                start = max(0, idx - 50)
-                end = min(len(section.content), idx + len(keyword) + 50)
-                snippet = section.content[start:end].strip()
-                
-                evidence.append({
-                    "location": section.location,
-                    "snippet": f"...{snippet}...",
-                    "keyword": keyword
-                })
+    # Per-keyword section hits are memoized on the outline's shared analysis;
+    # only sections with a hit are visited, in document then keyword order
+    analysis = outline.analysis
+    compact = outline.compact
+    hits_by_section: Dict[int, List] = {}
+    for keyword, keyword_lower in zip(keywords, keywords_lower):
+        for i, idx in analysis.section_hits(keyword_lower):
+            hits_by_section.setdefault(i, []).append((keyword, idx))
+    
+    for i in sorted(hits_by_section):
+        for keyword, idx in hits_by_section[i]:
+            # Extract snippet (50 chars before and after)
+            snippet = compact.excerpt(i, idx - 50, idx + len(keyword) + 50).strip()
+            
+            evidence.append({
+                "location": compact.locations[i],
+                "snippet": f"...{snippet}...",
+                "keyword": keyword
+            })
     
     return evidence
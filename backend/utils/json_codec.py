@@ -0,0 +1,30 @@
+"""Fast JSON encoding shared by responses and JSON columns"""
+import json
+from typing import Any
+
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class PreEncodedJSON(str):
+    """JSON text that JSON columns store as-is (see json_serializer)"""
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, option=ORJSON_OPTIONS)
+
+
+def json_serializer(value: Any) -> str:
+    """Engine json_serializer: pre-encoded values pass through untouched"""
+    if isinstance(value, PreEncodedJSON):
+        return value
+    return dumps(value).decode("utf-8")
+
+
+def json_deserializer(value: Any) -> Any:
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        # Rows written by json.dumps may contain NaN/Infinity, which orjson rejects
+        return json.loads(value)
@@ -0,0 +1,95 @@
+"""
+Queued JSON logging
+Loggers only push records onto a bounded in-memory queue; a QueueListener
+thread does the JSON formatting and the stdout writes. When the queue is
+full the record is dropped and counted (logging.dropped) rather than
+blocking the event loop. Levels below WARNING can be sampled with
+LOG_SAMPLE_RATES (e.g. {"DEBUG": 0.1}); sampled-out records are counted too.
+"""
+import copy
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict
+
+from pythonjsonlogger import jsonlogger
+
+from utils.config import settings
+from utils.metrics import metrics
+
+LOG_FORMAT = '%(asctime)s %(name)s %(levelname)s %(message)s'
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Non-blocking enqueue; formatting is left to the listener thread"""
+
+    dropped = metrics.counter("logging.dropped")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change later); everything else is formatted downstream
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped.inc()
+        except Exception:
+            self.handleError(record)
+
+
+class DrainingQueueListener(QueueListener):
+    """Stops after writing what is queued, even when the queue is full"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+class LevelSamplingFilter(logging.Filter):
+    """Keeps a random fraction of records per level; WARNING and above always pass"""
+
+    sampled_out = metrics.counter("logging.sampled_out")
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {
+            logging.getLevelName(level.upper()): rate
+            for level, rate in rates.items()
+        }
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        if random.random() < rate:
+            return True
+        self.sampled_out.inc()
+        return False
+
+
+def setup_logging() -> DrainingQueueListener:
+    """Route the root logger through the queue; the caller stops the returned listener"""
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(jsonlogger.JsonFormatter(LOG_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = BoundedQueueHandler(log_queue)
+    if settings.LOG_SAMPLE_RATES:
+        queue_handler.addFilter(LevelSamplingFilter(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL)
+    metrics.gauge("logging.queue_depth", log_queue.qsize)
+
+    listener = DrainingQueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,68 @@
+"""
+MinHash signatures with LSH banding
+Documents are reduced to sets of word shingles; the fraction of equal
+signature slots estimates their Jaccard similarity. Signatures are split
+into bands whose hashes serve as LSH buckets: two documents share a bucket
+with high probability once their similarity passes roughly
+(1 / BANDS) ** (1 / ROWS).
+"""
+import hashlib
+import re
+import zlib
+from typing import Iterable, List, Set
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+# Permutations are (a * h + b) mod P over 31-bit values, so products fit in int64
+_PRIME = (1 << 31) - 1
+_CHUNK = 4096
+
+_rng = np.random.RandomState(20240501)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Word n-grams of lowercased text (the whole text if shorter than n)"""
+    words = _WORD.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def signature(items: Iterable[str]) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a set of strings"""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.int64)
+    result = np.full(NUM_PERM, _PRIME, dtype=np.int64)
+    hashes %= _PRIME
+    for start in range(0, len(hashes), _CHUNK):
+        block = hashes[start:start + _CHUNK, None]
+        np.minimum(result, ((block * _A + _B) % _PRIME).min(axis=0), out=result)
+    return result.astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def band_hashes(sig: np.ndarray) -> List[str]:
+    """One bucket key per band"""
+    return [
+        hashlib.blake2b(sig[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).hexdigest()
+        for i in range(BANDS)
+    ]
+
+
+def to_bytes(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<u4").astype(np.uint32)
@@ -0,0 +1,141 @@
+"""
+On-demand profiling of run creation
+A request is profiled when PROFILING_ENABLED is set and either carries
+PROFILE_HEADER with the PROFILING_ADMIN_TOKEN value or is picked by
+PROFILING_SAMPLE_RATE. It then runs under cProfile plus tracemalloc; the
+pstats dump and a JSON summary are stored as run artifacts. When nothing
+selects the request the cost is one settings check.
+
+cProfile observes the whole event-loop thread, so functions of requests
+served concurrently may appear in a profile; only one profile runs at a
+time per process.
+"""
+import cProfile
+import hmac
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from utils.config import settings
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Rhino-Profile"
+ADMIN_TOKEN_HEADER = "X-Rhino-Admin-Token"
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+_active = threading.Lock()
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """Constant-time check against PROFILING_ADMIN_TOKEN (unset: nobody is admin)"""
+    expected = settings.PROFILING_ADMIN_TOKEN
+    return bool(expected) and token is not None and hmac.compare_digest(token, expected)
+
+
+def profiling_reason(headers: Mapping[str, str]) -> Optional[str]:
+    """Why this request should be profiled ("header" | "sample"), or None"""
+    if not settings.PROFILING_ENABLED:
+        return None
+    token = headers.get(PROFILE_HEADER)
+    if token is not None:
+        if is_admin(token):
+            return "header"
+        metrics.counter("profiling.rejected").inc()
+    if settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+@dataclass
+class RunProfile:
+    run_id: str
+    reason: str
+    stats: bytes = b""  # pstats dump (marshal), loadable with pstats.Stats
+    summary: Dict[str, Any] = field(default_factory=dict)
+
+
+def _top_functions(profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": nc,
+            "primitive_calls": cc,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:TOP_FUNCTIONS]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+    stats = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]).statistics("lineno")
+    return [
+        {"location": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in stats[:TOP_ALLOCATIONS]
+    ]
+
+
+@contextmanager
+def profile_run(run_id: str, reason: Optional[str]) -> Iterator[Optional[RunProfile]]:
+    """Profile the enclosed work; yields None when not selected or a profile is running"""
+    if reason is None:
+        yield None
+        return
+    if not _active.acquire(blocking=False):
+        metrics.counter("profiling.skipped_busy").inc()
+        yield None
+        return
+
+    profile = RunProfile(run_id, reason)
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    base_memory, _ = tracemalloc.get_traced_memory()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profile
+    finally:
+        profiler.disable()
+        duration = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _active.release()
+
+        profiler.create_stats()
+        profile.stats = marshal.dumps(profiler.stats)
+        profile.summary = {
+            "run_id": run_id,
+            "reason": reason,
+            "duration_ms": round(duration * 1000, 3),
+            "memory": {
+                "peak_kb": round((peak - base_memory) / 1024, 1),
+                "retained_kb": round((current - base_memory) / 1024, 1),
+            },
+            "top_functions": _top_functions(profiler),
+            "top_allocations": _top_allocations(snapshot),
+        }
+        metrics.counter("profiling.profiles").inc()
+        logger.info(f"Profiled run", extra={"run_id": run_id, "reason": reason,
+                                             "duration_ms": profile.summary["duration_ms"]})
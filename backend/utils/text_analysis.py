@@ -0,0 +1,129 @@
+"""
+Per-run text analysis context
+One document is examined by the detector, the classifier and the
+evaluator. Each derived view (lowercase, accent-folded, tokens, headings)
+and each substring lookup is computed once on first use and shared by
+every stage that holds the same context.
+"""
+import re
+import unicodedata
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase text with diacritics removed ("Parámetros" -> "parametros")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class TextAnalysisContext:
+    def __init__(self, full_text: str, headings: Sequence[str],
+                 full_text_lower: Optional[str] = None,
+                 lower_view: Optional[Callable[[], str]] = None,
+                 section_find: Optional[Callable[[str, int], int]] = None,
+                 sections_count: int = 0):
+        self.full_text = full_text
+        self.headings = list(headings)
+        self._lower = full_text_lower
+        self._lower_view = lower_view
+        self._section_find = section_find
+        self.sections_count = sections_count
+        self._folded: Optional[str] = None
+        self._tokens: Optional[FrozenSet[str]] = None
+        self._headings_lower: Optional[List[str]] = None
+        self._headings_text: Optional[str] = None
+        self._heading_set: Optional[FrozenSet[str]] = None
+        self._word_count: Optional[int] = None
+        self._contains: Dict[str, bool] = {}
+        self._counts: Dict[str, int] = {}
+        self._section_hits: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+        self._memo: Dict[str, object] = {}
+
+    @classmethod
+    def from_outline(cls, outline) -> "TextAnalysisContext":
+        """Context over a DocumentOutline's compact buffer"""
+        compact = outline.compact
+        return cls(compact.full_text, compact.headings, lower_view=lambda: compact.lower,
+                   section_find=compact.find_lower, sections_count=len(compact))
+
+    # Whole-document views
+
+    @property
+    def lower(self) -> str:
+        if self._lower is None:
+            self._lower = self._lower_view() if self._lower_view else self.full_text.lower()
+        return self._lower
+
+    @property
+    def folded(self) -> str:
+        if self._folded is None:
+            self._folded = fold_accents(self.full_text)
+        return self._folded
+
+    @property
+    def tokens(self) -> FrozenSet[str]:
+        if self._tokens is None:
+            self._tokens = frozenset(_WORD.findall(self.lower))
+        return self._tokens
+
+    @property
+    def word_count(self) -> int:
+        if self._word_count is None:
+            self._word_count = len(self.full_text.split())
+        return self._word_count
+
+    # Heading views
+
+    @property
+    def headings_lower(self) -> List[str]:
+        if self._headings_lower is None:
+            self._headings_lower = [h.lower() for h in self.headings]
+        return self._headings_lower
+
+    @property
+    def headings_text(self) -> str:
+        """Headings joined by spaces, lowercased"""
+        if self._headings_text is None:
+            self._headings_text = " ".join(self.headings).lower()
+        return self._headings_text
+
+    @property
+    def heading_set(self) -> FrozenSet[str]:
+        if self._heading_set is None:
+            self._heading_set = frozenset(self.headings_lower)
+        return self._heading_set
+
+    # Memoized lookups (needles are expected lowercase)
+
+    def contains(self, needle: str) -> bool:
+        found = self._contains.get(needle)
+        if found is None:
+            found = self._contains[needle] = needle in self.lower
+        return found
+
+    def count(self, needle: str) -> int:
+        count = self._counts.get(needle)
+        if count is None:
+            count = self._counts[needle] = self.lower.count(needle)
+        return count
+
+    def section_hits(self, needle: str) -> Tuple[Tuple[int, int], ...]:
+        """(section index, first offset) of `needle` in each section's lowercase text"""
+        hits = self._section_hits.get(needle)
+        if hits is None:
+            found = []
+            if self._section_find is not None and self.contains(needle):
+                for i in range(self.sections_count):
+                    idx = self._section_find(needle, i)
+                    if idx != -1:
+                        found.append((i, idx))
+            hits = self._section_hits[needle] = tuple(found)
+        return hits
+
+    def memo(self, key: str, compute: Callable[[], object]) -> object:
+        """Cache an arbitrary derived value (e.g. a structural pattern check)"""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
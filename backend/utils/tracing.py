@@ -0,0 +1,132 @@
+"""
+Lightweight per-run tracing
+`start_trace` opens a trace for a run and `span` records nested, timed
+sections of work; the current span travels in a contextvar, so asyncio
+tasks started inside a span become its children. Outside a trace, `span`
+is a no-op. With TRACING_OTEL set and opentelemetry installed, each span
+is mirrored to the OpenTelemetry API (a no-op unless an SDK/exporter is
+configured by the deployment).
+"""
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.config import settings
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    id: int
+    parent_id: Optional[int]
+    name: str
+    start: float
+    end: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    def __init__(self, name: str, run_id: str):
+        self.name = name
+        self.run_id = run_id
+        self.started_at = datetime.utcnow()
+        self._t0 = time.perf_counter()
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+
+    def new_span(self, name: str, parent: Optional[Span], attributes: Dict[str, Any]) -> Optional[Span]:
+        if len(self.spans) >= settings.TRACE_MAX_SPANS:
+            self.dropped_spans += 1
+            return None
+        span = Span(len(self.spans) + 1, parent.id if parent else None, name,
+                    time.perf_counter(), attributes=attributes)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Waterfall view: spans ordered by start, offsets in ms from the trace start"""
+        depths: Dict[int, int] = {}
+        spans = []
+        for span in sorted(self.spans, key=lambda s: (s.start, s.id)):
+            depth = depths[span.id] = depths.get(span.parent_id, -1) + 1
+            end = span.end if span.end is not None else time.perf_counter()
+            spans.append({
+                "id": span.id,
+                "parent_id": span.parent_id,
+                "name": span.name,
+                "depth": depth,
+                "start_ms": round((span.start - self._t0) * 1000, 3),
+                "duration_ms": round((end - span.start) * 1000, 3),
+                "status": span.status,
+                "attributes": span.attributes,
+            })
+        ends = [s["start_ms"] + s["duration_ms"] for s in spans]
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(max(ends, default=0.0), 3),
+            "dropped_spans": self.dropped_spans,
+            "spans": spans,
+        }
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+@contextmanager
+def start_trace(name: str, run_id: str) -> Iterator[Trace]:
+    """Collect spans for one run operation (e.g. create, answers)"""
+    trace = Trace(name, run_id)
+    trace_token = _current_trace.set(trace if settings.TRACING_ENABLED else None)
+    span_token = _current_span.set(None)
+    try:
+        with span(name, run_id=run_id):
+            yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a section of work as a child of the current span"""
+    trace = _current_trace.get()
+    current = trace.new_span(name, _current_span.get(), attributes) if trace else None
+    if current is None:
+        yield None
+        return
+
+    token = _current_span.set(current)
+    otel = (otel_trace.get_tracer(__name__).start_as_current_span(name, attributes=attributes)
+            if otel_trace is not None and settings.TRACING_OTEL else None)
+    try:
+        if otel is not None:
+            with otel:
+                yield current
+        else:
+            yield current
+    except BaseException as e:
+        current.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        current.attributes.setdefault("error", f"{type(e).__name__}: {e}"[:200])
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Annotate the current span (no-op outside a trace)"""
+    current = _current_span.get()
+    if current is not None and _current_trace.get() is not None:
+        current.attributes[key] = value